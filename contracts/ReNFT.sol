@@ -8,6 +8,8 @@ import "@openzeppelin/contracts/token/ERC1155/IERC1155.sol";
 import "@openzeppelin/contracts/token/ERC721/utils/ERC721Holder.sol";
 import "@openzeppelin/contracts/token/ERC1155/utils/ERC1155Receiver.sol";
 import "@openzeppelin/contracts/token/ERC1155/utils/ERC1155Holder.sol";
+import "@openzeppelin/contracts/utils/cryptography/ECDSA.sol";
+import "@openzeppelin/contracts/utils/cryptography/draft-EIP712.sol";
 
 import "../interfaces/IResolver.sol";
 import "../interfaces/IReNFT.sol";
@@ -32,7 +34,13 @@ import "../interfaces/IReNFT.sol";
 //                   @@@@@@@@@@@@@@@@&        @@@@@@@@@@@@@@@@
 //                   @@@@@@@@@@@@@@@@&        @@@@@@@@@@@@@@@@
 
-contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
+contract ReNFT is
+    IReNFT,
+    ERC721Holder,
+    ERC1155Receiver,
+    ERC1155Holder,
+    EIP712
+{
     using SafeERC20 for ERC20;
 
     IResolver private resolver;
@@ -46,6 +54,15 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
 
     uint256 private constant SECONDS_IN_DAY = 86400;
 
+    // IResolver.PaymentToken SENTINEL through RENT
+    uint256 private constant PAYMENT_TOKEN_COUNT = 7;
+
+    // enums are encoded as uint8
+    bytes32 private constant LEND_ORDER_TYPEHASH =
+        keccak256(
+            "LendOrder(uint8 nftStandard,address nft,uint256 tokenId,uint8 lentAmount,uint8 maxRentDuration,bytes4 dailyRentPrice,bytes4 nftPrice,uint8 paymentToken,address lender,uint256 nonce,uint256 deadline)"
+        );
+
     // single storage slot: address - 160 bits, 168, 200, 232, 240, 248
     struct Lending {
         IReNFT.NFTStandard nftStandard;
@@ -71,6 +88,24 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
 
     mapping(bytes32 => LendingRenting) private lendingRenting;
 
+    // lender => order nonce => rented or cancelled
+    mapping(address => mapping(uint256 => bool)) private orderNonceUsed;
+
+    // erc20 amount owed to a recipient, netted across a returnIt or
+    // claimCollateral batch and sent once in settlePayments
+    struct Payment {
+        address token;
+        address to;
+        uint256 amount;
+    }
+
+    // a payment token as the resolver returned it. scale is 10**decimals,
+    // and zero until the token is first resolved in a call
+    struct PaymentTokenInfo {
+        address token;
+        uint256 scale;
+    }
+
     struct CallData {
         uint256 left;
         uint256 right;
@@ -84,6 +119,13 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] lendingIds;
         uint8[] rentDurations;
         IResolver.PaymentToken[] paymentTokens;
+        Payment[] payments;
+        uint256 paymentsLength;
+        // open addressing table over payments, keyed by (token, recipient):
+        // 1 + the payment's index, or 0 for a free slot
+        uint256[] paymentSlots;
+        uint256 nextLendingId;
+        PaymentTokenInfo[] paymentTokenInfo;
     }
 
     modifier onlyAdmin {
@@ -100,7 +142,7 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         address _resolver,
         address payable _beneficiary,
         address _admin
-    ) {
+    ) EIP712("ReNFT", "1") {
         ensureIsNotZeroAddr(_resolver);
         ensureIsNotZeroAddr(_beneficiary);
         ensureIsNotZeroAddr(_admin);
@@ -140,8 +182,7 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         bytes4[] memory _nftPrices,
         IResolver.PaymentToken[] memory _paymentTokens
     ) external override notPaused {
-        bundleCall(
-            handleLend,
+        CallData memory cd =
             createLendCallData(
                 _nftStandard,
                 _nfts,
@@ -151,8 +192,12 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                 _dailyRentPrices,
                 _nftPrices,
                 _paymentTokens
-            )
-        );
+            );
+        // the batch's ids are reserved before any nft contract is called, so
+        // the counter is written once and a reentrant lend cannot reuse them
+        cd.nextLendingId = lendingId;
+        lendingId += _nfts.length;
+        bundleCall(handleLend, cd);
     }
 
     function rent(
@@ -174,10 +219,15 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] memory _tokenIds,
         uint256[] memory _lendingIds
     ) external override notPaused {
-        bundleCall(
-            handleReturn,
-            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds)
-        );
+        CallData memory cd =
+            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds);
+        cd.lentAmounts = new uint256[](_nfts.length);
+        // fee, lender and renter per item
+        cd.payments = new Payment[](3 * _nfts.length);
+        cd.paymentSlots = new uint256[](6 * _nfts.length);
+        cd.paymentTokenInfo = new PaymentTokenInfo[](PAYMENT_TOKEN_COUNT);
+        bundleCall(handleReturn, cd);
+        settlePayments(cd);
     }
 
     function stopLending(
@@ -186,10 +236,10 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] memory _tokenIds,
         uint256[] memory _lendingIds
     ) external override notPaused {
-        bundleCall(
-            handleStopLending,
-            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds)
-        );
+        CallData memory cd =
+            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds);
+        cd.lentAmounts = new uint256[](_nfts.length);
+        bundleCall(handleStopLending, cd);
     }
 
     function claimCollateral(
@@ -198,37 +248,159 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] memory _tokenIds,
         uint256[] memory _lendingIds
     ) external override notPaused {
-        bundleCall(
-            handleClaimCollateral,
-            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds)
+        CallData memory cd =
+            createActionCallData(_nftStandard, _nfts, _tokenIds, _lendingIds);
+        // fee and lender per item
+        cd.payments = new Payment[](2 * _nfts.length);
+        cd.paymentSlots = new uint256[](4 * _nfts.length);
+        cd.paymentTokenInfo = new PaymentTokenInfo[](PAYMENT_TOKEN_COUNT);
+        bundleCall(handleClaimCollateral, cd);
+        settlePayments(cd);
+    }
+
+    function rentSigned(
+        IReNFT.LendOrder[] calldata _orders,
+        bytes[] calldata _signatures,
+        uint8[] calldata _rentDurations
+    ) external override notPaused {
+        require(
+            _orders.length == _signatures.length &&
+                _orders.length == _rentDurations.length,
+            "ReNFT::length mismatch"
         );
+        PaymentTokenInfo[] memory paymentTokenInfo =
+            new PaymentTokenInfo[](PAYMENT_TOKEN_COUNT);
+        for (uint256 i = 0; i < _orders.length; i++) {
+            useOrder(_orders[i], _signatures[i]);
+            handleSignedRent(_orders[i], _rentDurations[i], paymentTokenInfo);
+        }
+    }
+
+    function cancelOrders(uint256[] calldata _nonces) external override {
+        for (uint256 i = 0; i < _nonces.length; i++) {
+            orderNonceUsed[msg.sender][_nonces[i]] = true;
+            emit OrderCancelled(msg.sender, _nonces[i]);
+        }
+    }
+
+    function isOrderNonceUsed(address _lender, uint256 _nonce)
+        external
+        view
+        override
+        returns (bool)
+    {
+        return orderNonceUsed[_lender][_nonce];
+    }
+
+    function hashLendOrder(IReNFT.LendOrder calldata _order)
+        public
+        view
+        override
+        returns (bytes32)
+    {
+        // LendOrder is all static fields, so its abi encoding is its
+        // EIP-712 encodeData
+        return
+            _hashTypedDataV4(
+                keccak256(abi.encode(LEND_ORDER_TYPEHASH, _order))
+            );
+    }
+
+    // raw storage words of each lendingRenting entry, in the Lending and
+    // Renting slot layouts above. unknown keys come back as zero words
+    function getLendingRenting(
+        address[] calldata _nfts,
+        uint256[] calldata _tokenIds,
+        uint256[] calldata _lendingIds
+    )
+        external
+        view
+        override
+        returns (uint256[] memory lendings, uint256[] memory rentings)
+    {
+        require(
+            _nfts.length == _tokenIds.length &&
+                _nfts.length == _lendingIds.length,
+            "ReNFT::length mismatch"
+        );
+        lendings = new uint256[](_nfts.length);
+        rentings = new uint256[](_nfts.length);
+        for (uint256 i = 0; i < _nfts.length; i++) {
+            LendingRenting storage item =
+                lendingRenting[
+                    keccak256(
+                        abi.encodePacked(_nfts[i], _tokenIds[i], _lendingIds[i])
+                    )
+                ];
+            uint256 lending;
+            uint256 renting;
+            assembly {
+                lending := sload(item.slot)
+                renting := sload(add(item.slot, 1))
+            }
+            lendings[i] = lending;
+            rentings[i] = renting;
+        }
     }
 
     //      .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.
     // `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'
 
-    function takeFee(uint256 _rent, IResolver.PaymentToken _paymentToken)
-        private
-        returns (uint256 fee)
-    {
+    function takeFee(uint256 _rent) private view returns (uint256 fee) {
         fee = _rent * rentFee;
         fee /= 10000;
-        uint8 paymentTokenIx = uint8(_paymentToken);
-        ensureTokenNotSentinel(paymentTokenIx);
-        ERC20 paymentToken = ERC20(resolver.getPaymentToken(paymentTokenIx));
-        paymentToken.safeTransfer(beneficiary, fee);
+    }
+
+    function addPayment(
+        CallData memory _cd,
+        address _token,
+        address _to,
+        uint256 _amount
+    ) private pure {
+        if (_amount == 0) {
+            return;
+        }
+        // the table has twice the slots there can be payments, so a probe
+        // ends after a slot or two whatever the number of recipients
+        uint256 slots = _cd.paymentSlots.length;
+        uint256 slot =
+            uint256(keccak256(abi.encodePacked(_token, _to))) % slots;
+        while (_cd.paymentSlots[slot] != 0) {
+            Payment memory payment = _cd.payments[_cd.paymentSlots[slot] - 1];
+            if (payment.token == _token && payment.to == _to) {
+                payment.amount += _amount;
+                return;
+            }
+            slot = (slot + 1) % slots;
+        }
+        _cd.payments[_cd.paymentsLength++] = Payment({
+            token: _token,
+            to: _to,
+            amount: _amount
+        });
+        _cd.paymentSlots[slot] = _cd.paymentsLength;
+    }
+
+    function settlePayments(CallData memory _cd) private {
+        for (uint256 i = 0; i < _cd.paymentsLength; i++) {
+            ERC20(_cd.payments[i].token).safeTransfer(
+                _cd.payments[i].to,
+                _cd.payments[i].amount
+            );
+        }
     }
 
     function distributePayments(
-        LendingRenting storage _lendingRenting,
+        CallData memory _cd,
+        LendingRenting memory _lendingRenting,
         uint256 _secondsSinceRentStart
-    ) private {
-        uint8 paymentTokenIx = uint8(_lendingRenting.lending.paymentToken);
-        ensureTokenNotSentinel(paymentTokenIx);
-        address paymentToken = resolver.getPaymentToken(paymentTokenIx);
-        uint256 decimals = ERC20(paymentToken).decimals();
+    ) private view {
+        (address paymentToken, uint256 scale) =
+            resolvePaymentToken(
+                _cd.paymentTokenInfo,
+                _lendingRenting.lending.paymentToken
+            );
 
-        uint256 scale = 10**decimals;
         uint256 nftPrice =
             _lendingRenting.lending.lentAmount *
                 unpackPrice(_lendingRenting.lending.nftPrice, scale);
@@ -245,31 +417,35 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         require(sendLenderAmt > 0, "ReNFT::lender payment is zero");
         uint256 sendRenterAmt = totalRenterPmtWoCollateral - sendLenderAmt;
 
-        uint256 takenFee =
-            takeFee(sendLenderAmt, _lendingRenting.lending.paymentToken);
+        uint256 takenFee = takeFee(sendLenderAmt);
 
         sendLenderAmt -= takenFee;
         sendRenterAmt += nftPrice;
 
-        ERC20(paymentToken).safeTransfer(
+        addPayment(_cd, paymentToken, beneficiary, takenFee);
+        addPayment(
+            _cd,
+            paymentToken,
             _lendingRenting.lending.lenderAddress,
             sendLenderAmt
         );
-        ERC20(paymentToken).safeTransfer(
+        addPayment(
+            _cd,
+            paymentToken,
             _lendingRenting.renting.renterAddress,
             sendRenterAmt
         );
     }
 
-    function distributeClaimPayment(LendingRenting memory _lendingRenting)
-        private
-    {
-        uint8 paymentTokenIx = uint8(_lendingRenting.lending.paymentToken);
-        ensureTokenNotSentinel(paymentTokenIx);
-        ERC20 paymentToken = ERC20(resolver.getPaymentToken(paymentTokenIx));
-
-        uint256 decimals = ERC20(paymentToken).decimals();
-        uint256 scale = 10**decimals;
+    function distributeClaimPayment(
+        CallData memory _cd,
+        LendingRenting memory _lendingRenting
+    ) private view {
+        (address paymentToken, uint256 scale) =
+            resolvePaymentToken(
+                _cd.paymentTokenInfo,
+                _lendingRenting.lending.paymentToken
+            );
         uint256 nftPrice =
             _lendingRenting.lending.lentAmount *
                 unpackPrice(_lendingRenting.lending.nftPrice, scale);
@@ -277,24 +453,66 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
             unpackPrice(_lendingRenting.lending.dailyRentPrice, scale);
         uint256 maxRentPayment =
             rentPrice * _lendingRenting.renting.rentDuration;
-        uint256 takenFee =
-            takeFee(maxRentPayment, IResolver.PaymentToken(paymentTokenIx));
+        uint256 takenFee = takeFee(maxRentPayment);
         uint256 finalAmt = maxRentPayment + nftPrice;
 
         require(maxRentPayment > 0, "ReNFT::collateral plus rent is zero");
 
-        paymentToken.safeTransfer(
+        addPayment(_cd, paymentToken, beneficiary, takenFee);
+        addPayment(
+            _cd,
+            paymentToken,
             _lendingRenting.lending.lenderAddress,
             finalAmt - takenFee
         );
     }
 
+    // rent for the whole duration plus the collateral, from the renter
+    function collectRentPayment(
+        PaymentTokenInfo[] memory _paymentTokenInfo,
+        Lending memory _lending,
+        uint8 _rentDuration
+    ) private {
+        (address paymentToken, uint256 scale) =
+            resolvePaymentToken(_paymentTokenInfo, _lending.paymentToken);
+        uint256 rentPrice =
+            _rentDuration * unpackPrice(_lending.dailyRentPrice, scale);
+        uint256 nftPrice =
+            _lending.lentAmount * unpackPrice(_lending.nftPrice, scale);
+
+        require(rentPrice > 0, "ReNFT::rent price is zero");
+        require(nftPrice > 0, "ReNFT::nft price is zero");
+
+        ERC20(paymentToken).safeTransferFrom(
+            msg.sender,
+            address(this),
+            rentPrice + nftPrice
+        );
+    }
+
+    // the resolver is called once per payment token in a transaction; its
+    // answer is kept in _paymentTokenInfo for the token's other items
+    function resolvePaymentToken(
+        PaymentTokenInfo[] memory _paymentTokenInfo,
+        IResolver.PaymentToken _paymentToken
+    ) private view returns (address, uint256) {
+        uint8 paymentTokenIx = uint8(_paymentToken);
+        ensureTokenNotSentinel(paymentTokenIx);
+        PaymentTokenInfo memory info = _paymentTokenInfo[paymentTokenIx];
+        if (info.scale == 0) {
+            (info.token, info.scale) = resolver.getPaymentTokenInfo(
+                paymentTokenIx
+            );
+        }
+        return (info.token, info.scale);
+    }
+
+    // moves the bundle [_cd.left, _cd.right). 1155 token ids and amounts go
+    // to the batch transfer as in-place views of the bundle's range
     function safeTransfer(
         CallData memory _cd,
         address _from,
-        address _to,
-        uint256[] memory _tokenIds,
-        uint256[] memory _lentAmounts
+        address _to
     ) private {
         if (_cd.nftStandard[_cd.left] == IReNFT.NFTStandard.E721) {
             IERC721(_cd.nfts[_cd.left]).transferFrom(
@@ -303,13 +521,19 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                 _cd.tokenIds[_cd.left]
             );
         } else if (_cd.nftStandard[_cd.left] == IReNFT.NFTStandard.E1155) {
+            (uint256[] memory tokenIds, uint256 tokenIdsWord) =
+                sliceArr(_cd.tokenIds, _cd.left, _cd.right);
+            (uint256[] memory lentAmounts, uint256 lentAmountsWord) =
+                sliceArr(_cd.lentAmounts, _cd.left, _cd.right);
             IERC1155(_cd.nfts[_cd.left]).safeBatchTransferFrom(
                 _from,
                 _to,
-                _tokenIds,
-                _lentAmounts,
+                tokenIds,
+                lentAmounts,
                 ""
             );
+            unsliceArr(lentAmounts, lentAmountsWord);
+            unsliceArr(tokenIds, tokenIdsWord);
         } else {
             revert("ReNFT::unsupported token type");
         }
@@ -328,7 +552,7 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                         abi.encodePacked(
                             _cd.nfts[_cd.left],
                             _cd.tokenIds[i],
-                            lendingId
+                            _cd.nextLendingId
                         )
                     )
                 ];
@@ -351,7 +575,7 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                 _cd.nfts[_cd.left],
                 _cd.tokenIds[i],
                 nftIs721 ? 1 : uint8(_cd.lentAmounts[i]),
-                lendingId,
+                _cd.nextLendingId,
                 msg.sender,
                 _cd.maxRentDurations[i],
                 _cd.dailyRentPrices[i],
@@ -360,21 +584,13 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                 _cd.paymentTokens[i]
             );
 
-            lendingId++;
+            _cd.nextLendingId++;
         }
 
-        safeTransfer(
-            _cd,
-            msg.sender,
-            address(this),
-            sliceArr(_cd.tokenIds, _cd.left, _cd.right, 0),
-            sliceArr(_cd.lentAmounts, _cd.left, _cd.right, 0)
-        );
+        safeTransfer(_cd, msg.sender, address(this));
     }
 
     function handleRent(CallData memory _cd) private {
-        uint256[] memory lentAmounts = new uint256[](_cd.right - _cd.left);
-
         for (uint256 i = _cd.left; i < _cd.right; i++) {
             LendingRenting storage item =
                 lendingRenting[
@@ -387,60 +603,39 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                     )
                 ];
 
-            ensureIsNotNull(item.lending);
+            // the lending slot is read once; the checks and payment use the copy
+            Lending memory lending = item.lending;
+
+            ensureIsNotNull(lending);
             ensureIsNull(item.renting);
-            ensureIsRentable(item.lending, _cd, i, msg.sender);
-
-            uint8 paymentTokenIx = uint8(item.lending.paymentToken);
-            ensureTokenNotSentinel(paymentTokenIx);
-            address paymentToken = resolver.getPaymentToken(paymentTokenIx);
-            uint256 decimals = ERC20(paymentToken).decimals();
-
-            {
-                uint256 scale = 10**decimals;
-                uint256 rentPrice =
-                    _cd.rentDurations[i] *
-                        unpackPrice(item.lending.dailyRentPrice, scale);
-                uint256 nftPrice =
-                    item.lending.lentAmount *
-                        unpackPrice(item.lending.nftPrice, scale);
-
-                require(rentPrice > 0, "ReNFT::rent price is zero");
-                require(nftPrice > 0, "ReNFT::nft price is zero");
-
-                ERC20(paymentToken).safeTransferFrom(
-                    msg.sender,
-                    address(this),
-                    rentPrice + nftPrice
-                );
-            }
+            ensureIsRentable(lending, _cd.rentDurations[i], msg.sender);
+            collectRentPayment(
+                _cd.paymentTokenInfo,
+                lending,
+                _cd.rentDurations[i]
+            );
 
-            lentAmounts[i - _cd.left] = item.lending.lentAmount;
+            _cd.lentAmounts[i] = lending.lentAmount;
 
-            item.renting.renterAddress = payable(msg.sender);
-            item.renting.rentDuration = _cd.rentDurations[i];
-            item.renting.rentedAt = uint32(block.timestamp);
+            // one write of the whole renting slot
+            item.renting = Renting({
+                renterAddress: payable(msg.sender),
+                rentDuration: _cd.rentDurations[i],
+                rentedAt: uint32(block.timestamp)
+            });
 
             emit Rented(
                 _cd.lendingIds[i],
                 msg.sender,
                 _cd.rentDurations[i],
-                item.renting.rentedAt
+                uint32(block.timestamp)
             );
         }
 
-        safeTransfer(
-            _cd,
-            address(this),
-            msg.sender,
-            sliceArr(_cd.tokenIds, _cd.left, _cd.right, 0),
-            sliceArr(lentAmounts, _cd.left, _cd.right, _cd.left)
-        );
+        safeTransfer(_cd, address(this), msg.sender);
     }
 
     function handleReturn(CallData memory _cd) private {
-        uint256[] memory lentAmounts = new uint256[](_cd.right - _cd.left);
-
         for (uint256 i = _cd.left; i < _cd.right; i++) {
             LendingRenting storage item =
                 lendingRenting[
@@ -452,33 +647,27 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                         )
                     )
                 ];
+            // both slots are read once; the checks and payouts use the copy
+            LendingRenting memory cached = item;
 
-            ensureIsNotNull(item.lending);
-            ensureIsReturnable(item.renting, msg.sender, block.timestamp);
+            ensureIsNotNull(cached.lending);
+            ensureIsReturnable(cached.renting, msg.sender, block.timestamp);
 
             uint256 secondsSinceRentStart =
-                block.timestamp - item.renting.rentedAt;
-            distributePayments(item, secondsSinceRentStart);
+                block.timestamp - cached.renting.rentedAt;
+            distributePayments(_cd, cached, secondsSinceRentStart);
 
-            lentAmounts[i - _cd.left] = item.lending.lentAmount;
+            _cd.lentAmounts[i] = cached.lending.lentAmount;
 
             emit Returned(_cd.lendingIds[i], uint32(block.timestamp));
 
             delete item.renting;
         }
 
-        safeTransfer(
-            _cd,
-            msg.sender,
-            address(this),
-            sliceArr(_cd.tokenIds, _cd.left, _cd.right, 0),
-            sliceArr(lentAmounts, _cd.left, _cd.right, _cd.left)
-        );
+        safeTransfer(_cd, msg.sender, address(this));
     }
 
     function handleStopLending(CallData memory _cd) private {
-        uint256[] memory lentAmounts = new uint256[](_cd.right - _cd.left);
-
         for (uint256 i = _cd.left; i < _cd.right; i++) {
             LendingRenting storage item =
                 lendingRenting[
@@ -490,25 +679,20 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                         )
                     )
                 ];
+            LendingRenting memory cached = item;
 
-            ensureIsNotNull(item.lending);
-            ensureIsNull(item.renting);
-            ensureIsStoppable(item.lending, msg.sender);
+            ensureIsNotNull(cached.lending);
+            ensureIsNull(cached.renting);
+            ensureIsStoppable(cached.lending, msg.sender);
 
-            lentAmounts[i - _cd.left] = item.lending.lentAmount;
+            _cd.lentAmounts[i] = cached.lending.lentAmount;
 
             emit LendingStopped(_cd.lendingIds[i], uint32(block.timestamp));
 
             delete item.lending;
         }
 
-        safeTransfer(
-            _cd,
-            address(this),
-            msg.sender,
-            sliceArr(_cd.tokenIds, _cd.left, _cd.right, 0),
-            sliceArr(lentAmounts, _cd.left, _cd.right, _cd.left)
-        );
+        safeTransfer(_cd, address(this), msg.sender);
     }
 
     function handleClaimCollateral(CallData memory _cd) private {
@@ -523,12 +707,13 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
                         )
                     )
                 ];
+            LendingRenting memory cached = item;
 
-            ensureIsNotNull(item.lending);
-            ensureIsNotNull(item.renting);
-            ensureIsClaimable(item.renting, block.timestamp);
+            ensureIsNotNull(cached.lending);
+            ensureIsNotNull(cached.renting);
+            ensureIsClaimable(cached.renting, block.timestamp);
 
-            distributeClaimPayment(item);
+            distributeClaimPayment(_cd, cached);
 
             emit CollateralClaimed(_cd.lendingIds[i], uint32(block.timestamp));
 
@@ -537,9 +722,90 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         }
     }
 
+    // lends and rents out a signed order in one go. the nft goes straight
+    // from the lender to the renter; returnIt brings it into escrow as for
+    // any other lending
+    function handleSignedRent(
+        IReNFT.LendOrder calldata _order,
+        uint8 _rentDuration,
+        PaymentTokenInfo[] memory _paymentTokenInfo
+    ) private {
+        (LendingRenting storage item, uint256 id, Lending memory lending) =
+            recordSignedLending(_order);
+
+        ensureIsRentable(lending, _rentDuration, msg.sender);
+        collectRentPayment(_paymentTokenInfo, lending, _rentDuration);
+
+        item.renting = Renting({
+            renterAddress: payable(msg.sender),
+            rentDuration: _rentDuration,
+            rentedAt: uint32(block.timestamp)
+        });
+
+        emit Rented(id, msg.sender, _rentDuration, uint32(block.timestamp));
+
+        if (lending.nftStandard == IReNFT.NFTStandard.E721) {
+            IERC721(_order.nft).transferFrom(
+                _order.lender,
+                msg.sender,
+                _order.tokenId
+            );
+        } else {
+            IERC1155(_order.nft).safeTransferFrom(
+                _order.lender,
+                msg.sender,
+                _order.tokenId,
+                lending.lentAmount,
+                ""
+            );
+        }
+    }
+
+    function recordSignedLending(IReNFT.LendOrder calldata _order)
+        private
+        returns (
+            LendingRenting storage item,
+            uint256 id,
+            Lending memory lending
+        )
+    {
+        lending = Lending({
+            nftStandard: _order.nftStandard,
+            lenderAddress: payable(_order.lender),
+            maxRentDuration: _order.maxRentDuration,
+            dailyRentPrice: _order.dailyRentPrice,
+            nftPrice: _order.nftPrice,
+            lentAmount: _order.nftStandard == IReNFT.NFTStandard.E721
+                ? 1
+                : _order.lentAmount,
+            paymentToken: _order.paymentToken
+        });
+        ensureIsLendable(lending);
+
+        id = lendingId++;
+        item = lendingRenting[
+            keccak256(abi.encodePacked(_order.nft, _order.tokenId, id))
+        ];
+        item.lending = lending;
+
+        emit Lent(
+            _order.nft,
+            _order.tokenId,
+            lending.lentAmount,
+            id,
+            lending.lenderAddress,
+            lending.maxRentDuration,
+            lending.dailyRentPrice,
+            lending.nftPrice,
+            lending.nftStandard == IReNFT.NFTStandard.E721,
+            lending.paymentToken
+        );
+    }
+
     //      .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.     .-.
     // `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'   `._.'
 
+    // members that are not set stay empty arrays or zero
     function createLendCallData(
         IReNFT.NFTStandard[] memory _nftStandard,
         address[] memory _nfts,
@@ -550,20 +816,15 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         bytes4[] memory _nftPrices,
         IResolver.PaymentToken[] memory _paymentTokens
     ) private pure returns (CallData memory cd) {
-        cd = CallData({
-            left: 0,
-            right: 1,
-            nftStandard: _nftStandard,
-            nfts: _nfts,
-            tokenIds: _tokenIds,
-            lentAmounts: _lendAmounts,
-            lendingIds: new uint256[](0),
-            rentDurations: new uint8[](0),
-            maxRentDurations: _maxRentDurations,
-            dailyRentPrices: _dailyRentPrices,
-            nftPrices: _nftPrices,
-            paymentTokens: _paymentTokens
-        });
+        cd.right = 1;
+        cd.nftStandard = _nftStandard;
+        cd.nfts = _nfts;
+        cd.tokenIds = _tokenIds;
+        cd.lentAmounts = _lendAmounts;
+        cd.maxRentDurations = _maxRentDurations;
+        cd.dailyRentPrices = _dailyRentPrices;
+        cd.nftPrices = _nftPrices;
+        cd.paymentTokens = _paymentTokens;
     }
 
     function createRentCallData(
@@ -573,20 +834,14 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] memory _lendingIds,
         uint8[] memory _rentDurations
     ) private pure returns (CallData memory cd) {
-        cd = CallData({
-            left: 0,
-            right: 1,
-            nftStandard: _nftStandard,
-            nfts: _nfts,
-            tokenIds: _tokenIds,
-            lentAmounts: new uint256[](0),
-            lendingIds: _lendingIds,
-            rentDurations: _rentDurations,
-            maxRentDurations: new uint8[](0),
-            dailyRentPrices: new bytes4[](0),
-            nftPrices: new bytes4[](0),
-            paymentTokens: new IResolver.PaymentToken[](0)
-        });
+        cd.right = 1;
+        cd.nftStandard = _nftStandard;
+        cd.nfts = _nfts;
+        cd.tokenIds = _tokenIds;
+        cd.lentAmounts = new uint256[](_nfts.length);
+        cd.lendingIds = _lendingIds;
+        cd.rentDurations = _rentDurations;
+        cd.paymentTokenInfo = new PaymentTokenInfo[](PAYMENT_TOKEN_COUNT);
     }
 
     function createActionCallData(
@@ -595,20 +850,11 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         uint256[] memory _tokenIds,
         uint256[] memory _lendingIds
     ) private pure returns (CallData memory cd) {
-        cd = CallData({
-            left: 0,
-            right: 1,
-            nftStandard: _nftStandard,
-            nfts: _nfts,
-            tokenIds: _tokenIds,
-            lentAmounts: new uint256[](0),
-            lendingIds: _lendingIds,
-            rentDurations: new uint8[](0),
-            maxRentDurations: new uint8[](0),
-            dailyRentPrices: new bytes4[](0),
-            nftPrices: new bytes4[](0),
-            paymentTokens: new IResolver.PaymentToken[](0)
-        });
+        cd.right = 1;
+        cd.nftStandard = _nftStandard;
+        cd.nfts = _nfts;
+        cd.tokenIds = _tokenIds;
+        cd.lendingIds = _lendingIds;
     }
 
     function unpackPrice(bytes4 _price, uint256 _scale)
@@ -636,15 +882,26 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         return price;
     }
 
+    // _arr[_fromIx:_toIx] without copying: the word in front of
+    // _arr[_fromIx] (the previous element, or the length) becomes the
+    // slice's length. it is returned so unsliceArr can put it back; _arr
+    // must not be read in between. callers have already read _arr[_toIx - 1],
+    // so the range is in bounds
     function sliceArr(
         uint256[] memory _arr,
         uint256 _fromIx,
-        uint256 _toIx,
-        uint256 _arrOffset
-    ) private pure returns (uint256[] memory r) {
-        r = new uint256[](_toIx - _fromIx);
-        for (uint256 i = _fromIx; i < _toIx; i++) {
-            r[i - _fromIx] = _arr[i - _arrOffset];
+        uint256 _toIx
+    ) private pure returns (uint256[] memory r, uint256 word) {
+        assembly {
+            r := add(_arr, mul(_fromIx, 0x20))
+            word := mload(r)
+            mstore(r, sub(_toIx, _fromIx))
+        }
+    }
+
+    function unsliceArr(uint256[] memory _slice, uint256 _word) private pure {
+        assembly {
+            mstore(_slice, _word)
         }
     }
 
@@ -700,24 +957,50 @@ contract ReNFT is IReNFT, ERC721Holder, ERC1155Receiver, ERC1155Holder {
         require(uint32(_cd.nftPrices[_i]) > 0, "ReNFT::nft price is zero");
     }
 
+    // orders skip the lend call, so they get its checks here
+    function ensureIsLendable(Lending memory _lending) private pure {
+        require(_lending.lentAmount > 0, "ReNFT::lend amount is zero");
+        require(_lending.maxRentDuration > 0, "ReNFT::duration is zero");
+        require(
+            uint32(_lending.dailyRentPrice) > 0,
+            "ReNFT::rent price is zero"
+        );
+        require(uint32(_lending.nftPrice) > 0, "ReNFT::nft price is zero");
+    }
+
     function ensureIsRentable(
         Lending memory _lending,
-        CallData memory _cd,
-        uint256 _i,
+        uint8 _rentDuration,
         address _msgSender
     ) private pure {
         require(
             _msgSender != _lending.lenderAddress,
             "ReNFT::cant rent own nft"
         );
-        require(_cd.rentDurations[_i] <= type(uint8).max, "ReNFT::not uint8");
-        require(_cd.rentDurations[_i] > 0, "ReNFT::duration is zero");
+        require(_rentDuration > 0, "ReNFT::duration is zero");
         require(
-            _cd.rentDurations[_i] <= _lending.maxRentDuration,
+            _rentDuration <= _lending.maxRentDuration,
             "ReNFT::rent duration exceeds allowed max"
         );
     }
 
+    // checks the order and burns its nonce, so it is rented at most once
+    function useOrder(
+        IReNFT.LendOrder calldata _order,
+        bytes calldata _signature
+    ) private {
+        require(block.timestamp <= _order.deadline, "ReNFT::order expired");
+        require(
+            !orderNonceUsed[_order.lender][_order.nonce],
+            "ReNFT::order used or cancelled"
+        );
+        require(
+            ECDSA.recover(hashLendOrder(_order), _signature) == _order.lender,
+            "ReNFT::invalid signature"
+        );
+        orderNonceUsed[_order.lender][_order.nonce] = true;
+    }
+
     function ensureIsReturnable(
         Renting memory _renting,
         address _msgSender,
@@ -1,11 +1,20 @@
 // SPDX-License-Identifier: MIT
 pragma solidity =0.8.6;
 
+import "@openzeppelin/contracts/token/ERC20/extensions/IERC20Metadata.sol";
+
 import "../interfaces/IResolver.sol";
 
 contract Resolver is IResolver {
+    // a payment token's decimals never change, so they are read once when
+    // it is set and kept in the same slot as its address
+    struct Token {
+        address addr;
+        uint8 decimals;
+    }
+
     address private admin;
-    mapping(uint8 => address) private addresses;
+    mapping(uint8 => Token) private tokens;
 
     constructor(address _admin) {
         admin = _admin;
@@ -17,16 +26,29 @@ contract Resolver is IResolver {
         override
         returns (address)
     {
-        return addresses[_pt];
+        return tokens[_pt].addr;
+    }
+
+    function getPaymentTokenInfo(uint8 _pt)
+        external
+        view
+        override
+        returns (address, uint256)
+    {
+        Token memory token = tokens[_pt];
+        return (token.addr, 10**token.decimals);
     }
 
     function setPaymentToken(uint8 _pt, address _v) external override {
         require(_pt != 0, "ReNFT::cant set sentinel");
         require(
-            addresses[_pt] == address(0),
+            tokens[_pt].addr == address(0),
             "ReNFT::cannot reset the address"
         );
         require(msg.sender == admin, "ReNFT::only admin");
-        addresses[_pt] = _v;
+        tokens[_pt] = Token({
+            addr: _v,
+            decimals: IERC20Metadata(_v).decimals()
+        });
     }
 }
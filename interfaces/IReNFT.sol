@@ -37,11 +37,29 @@ interface IReNFT is IERC721Receiver, IERC1155Receiver {
 
     event LendingStopped(uint256 indexed lendingId, uint32 stoppedAt);
 
+    event OrderCancelled(address indexed lenderAddress, uint256 nonce);
+
     enum NFTStandard {
         E721,
         E1155
     }
 
+    // Lending fields signed off-chain by the lender (EIP-712), so that a
+    // listing needs no lend transaction. nonce is single use per lender
+    struct LendOrder {
+        NFTStandard nftStandard;
+        address nft;
+        uint256 tokenId;
+        uint8 lentAmount;
+        uint8 maxRentDuration;
+        bytes4 dailyRentPrice;
+        bytes4 nftPrice;
+        IResolver.PaymentToken paymentToken;
+        address lender;
+        uint256 nonce;
+        uint256 deadline;
+    }
+
     /**
      * @dev sends your NFT to ReNFT contract, which acts as an escrow
      * between the lender and the renter
@@ -102,4 +120,47 @@ interface IReNFT is IERC721Receiver, IERC1155Receiver {
         uint256[] memory _tokenId,
         uint256[] memory _lendingIds
     ) external;
+
+    /**
+     * @dev rents signed lend orders. The lender must have approved
+     * ReNFT for the NFT; it goes straight from the lender to the
+     * renter and the lending is recorded as if lend had been called
+     */
+    function rentSigned(
+        LendOrder[] calldata _orders,
+        bytes[] calldata _signatures,
+        uint8[] calldata _rentDurations
+    ) external;
+
+    /**
+     * @dev burns the caller's order nonces so their orders can no
+     * longer be rented
+     */
+    function cancelOrders(uint256[] calldata _nonces) external;
+
+    function isOrderNonceUsed(address _lender, uint256 _nonce)
+        external
+        view
+        returns (bool);
+
+    /**
+     * @dev EIP-712 digest the lender signs for an order
+     */
+    function hashLendOrder(LendOrder calldata _order)
+        external
+        view
+        returns (bytes32);
+
+    /**
+     * @dev packed Lending and Renting storage words of many
+     * lendings, zero for unknown ones, for off-chain readers
+     */
+    function getLendingRenting(
+        address[] calldata _nfts,
+        uint256[] calldata _tokenIds,
+        uint256[] calldata _lendingIds
+    )
+        external
+        view
+        returns (uint256[] memory lendings, uint256[] memory rentings);
 }
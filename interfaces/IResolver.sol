@@ -6,5 +6,11 @@ interface IResolver {
 
     function getPaymentToken(uint8 _pt) external view returns (address);
 
+    // the token's address and 10**decimals
+    function getPaymentTokenInfo(uint8 _pt)
+        external
+        view
+        returns (address, uint256);
+
     function setPaymentToken(uint8 _pt, address _v) external;
 }
@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence
+
+import aiohttp
+
+
+class TransactionFailed(Exception):
+    pass
+
+
+class AsyncSender:
+    """
+    sends transactions from accounts the node holds unlocked (eth_sendTransaction)
+    over asyncio. each sender's transactions get consecutive nonces and are
+    sent in order without waiting for receipts; different senders run
+    concurrently, and all receipts are awaited together at the end.
+    on_sent, if given, is called with every transaction and its hash. with a
+    profiler, every run is an "aiotx" span holding its requests and the gas
+    of its transactions
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        poll_interval: float = 0.02,
+        timeout: float = 60,
+        on_sent: Optional[Callable[[dict, str], None]] = None,
+        profiler=None,
+    ):
+        self.endpoint = endpoint
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.on_sent = on_sent
+        self.profiler = profiler
+        self._ids = itertools.count()
+
+    def run(self, txs: Sequence[dict]) -> List[dict]:
+        """receipts of txs, in order; blocking wrapper for synchronous callers"""
+        if self.profiler is None:
+            return asyncio.run(self.send_all(txs))
+        with self.profiler.span("AsyncSender.run", "aiotx") as span:
+            receipts = asyncio.run(self.send_all(txs))
+            span.gas = sum(int(receipt["gasUsed"], 16) for receipt in receipts)
+            return receipts
+
+    async def send_all(self, txs: Sequence[dict]) -> List[dict]:
+        if not txs:
+            return []
+        by_sender: Dict[str, List[int]] = defaultdict(list)
+        for i, tx in enumerate(txs):
+            by_sender[tx["from"]].append(i)
+
+        async with aiohttp.ClientSession() as session:
+            hashes = [None] * len(txs)
+
+            async def send_from(sender, indexes):
+                nonce = await self._request(
+                    session, "eth_getTransactionCount", [sender, "pending"]
+                )
+                nonce = int(nonce, 16)
+                gas = await asyncio.gather(*(self._gas(session, txs[i]) for i in indexes))
+                for offset, (i, gas_limit) in enumerate(zip(indexes, gas)):
+                    tx = dict(txs[i], nonce=hex(nonce + offset), gas=gas_limit)
+                    hashes[i] = await self._request(session, "eth_sendTransaction", [tx])
+                    if self.on_sent is not None:
+                        self.on_sent(tx, hashes[i])
+
+            await asyncio.gather(
+                *(send_from(sender, indexes) for sender, indexes in by_sender.items())
+            )
+            receipts = await asyncio.gather(*(self._receipt(session, h) for h in hashes))
+
+        failed = [
+            receipt["transactionHash"] for receipt in receipts if int(receipt["status"], 16) != 1
+        ]
+        if failed:
+            raise TransactionFailed(f"reverted: {', '.join(failed)}")
+        return receipts
+
+    async def _gas(self, session, tx) -> str:
+        if "gas" in tx:
+            return hex(tx["gas"]) if isinstance(tx["gas"], int) else tx["gas"]
+        return await self._request(session, "eth_estimateGas", [tx])
+
+    async def _receipt(self, session, tx_hash) -> dict:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.timeout
+        while True:
+            receipt = await self._request(session, "eth_getTransactionReceipt", [tx_hash])
+            if receipt is not None:
+                return receipt
+            if loop.time() > deadline:
+                raise TimeoutError(f"no receipt for {tx_hash}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _request(self, session, method, params):
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+        start = time.perf_counter()
+        try:
+            async with session.post(self.endpoint, json=payload) as response:
+                response.raise_for_status()
+                result = await response.json()
+        finally:
+            # these requests go around web3, so its middleware never sees them
+            if self.profiler is not None:
+                self.profiler.rpc(method, time.perf_counter() - start)
+        if "error" in result:
+            raise TransactionFailed(f"{method}: {result['error']}")
+        return result["result"]
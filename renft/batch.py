@@ -0,0 +1,81 @@
+from typing import List, Sequence
+
+from renft.lending import (
+    NFTStandard,
+    lendings_to_lend_args,
+    lendings_to_stop_lending_args,
+    rentings_to_rent_args,
+    rentings_to_return_args,
+)
+
+
+def bundle_key(item):
+    return (str(item.nft).lower(), item.nft_standard)
+
+
+def count_transfers(items) -> int:
+    """
+    number of nft transfers ReNFT.bundleCall makes for items in this order:
+    it only merges an E1155 item into the run of the item before it when
+    both share the nft address
+    """
+    if not items:
+        return 0
+    transfers = 1
+    left = items[0]
+    for right in items[1:]:
+        if not (
+            str(right.nft).lower() == str(left.nft).lower()
+            and right.nft_standard == NFTStandard.E1155.value
+        ):
+            transfers += 1
+            left = right
+    return transfers
+
+
+class Batch:
+    """
+    items stably sorted by (nft address, standard) so that every contract's
+    E1155 items form one contiguous run. order[i] is the caller's index of
+    the i-th item sent to the contract
+    """
+
+    def __init__(self, items: Sequence):
+        self.order = sorted(range(len(items)), key=lambda i: bundle_key(items[i]))
+        self.items = [items[i] for i in self.order]
+
+    def __len__(self):
+        return len(self.items)
+
+    def restore(self, values: Sequence) -> List:
+        """puts values emitted in bundle order back in the caller's order"""
+        restored = [None] * len(values)
+        for position, value in zip(self.order, values):
+            restored[position] = value
+        return restored
+
+    @property
+    def transfers(self) -> int:
+        return count_transfers(self.items)
+
+    def lend_args(self):
+        return lendings_to_lend_args(self.items)
+
+    def stop_lending_args(self):
+        return lendings_to_stop_lending_args(self.items)
+
+    def rent_args(self):
+        return rentings_to_rent_args(self.items)
+
+    def return_args(self):
+        return rentings_to_return_args(self.items)
+
+    def assign_lending_ids(self, txn) -> List[int]:
+        """
+        sets lending_id on every lent item from the txn's Lent events and
+        returns the ids in the caller's order
+        """
+        lending_ids = [event["lendingId"] for event in txn.events["Lent"]]
+        for item, lending_id in zip(self.items, lending_ids):
+            item.lending_id = lending_id
+        return self.restore(lending_ids)
@@ -0,0 +1,109 @@
+"""
+Compiled artifacts keyed by a hash of everything that goes into them, kept
+outside the checkout so a fresh clone or CI container can skip solc:
+
+    python -m renft.buildcache restore
+    brownie test
+    python -m renft.buildcache store
+
+brownie recompiles a contract only when its source hash or compiler settings
+differ from its artifact, so a restored build/ loads without invoking solc.
+"""
+import hashlib
+import os
+import shutil
+import sys
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Optional
+
+PROJECT = Path(__file__).parent.parent
+# changes to anything in here change the compiled artifacts
+SOURCES = ["contracts", "interfaces", "brownie-config.yaml"]
+# what brownie writes to build/ when it compiles
+ARTIFACTS = ["contracts", "interfaces"]
+KEY_FILE = ".buildcache-key"
+
+
+def cache_root() -> Path:
+    return Path(os.environ.get("RENFT_BUILD_CACHE", Path.home() / ".cache" / "renft" / "build"))
+
+
+def source_key(project: Path = PROJECT) -> str:
+    digest = hashlib.sha256()
+    for source in SOURCES:
+        path = project / source
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in filter(Path.is_file, files):
+            digest.update(str(file.relative_to(project)).encode())
+            digest.update(file.read_bytes())
+    # the compiler settings brownie fills in by default come with its version
+    try:
+        digest.update(version("eth-brownie").encode())
+    except PackageNotFoundError:
+        pass
+    return digest.hexdigest()[:16]
+
+
+def restore(project: Path = PROJECT, cache: Optional[Path] = None) -> bool:
+    """
+    copies the cached artifacts for the current sources into build/, unless
+    build/ already holds them. returns whether anything was copied
+    """
+    key = source_key(project)
+    entry = (cache or cache_root()) / key
+    build = project / "build"
+    if not entry.is_dir() or _built_key(build) == key:
+        return False
+    for name in ARTIFACTS:
+        shutil.rmtree(build / name, ignore_errors=True)
+        if (entry / name).is_dir():
+            shutil.copytree(entry / name, build / name)
+    (build / KEY_FILE).write_text(key)
+    return True
+
+
+def store(project: Path = PROJECT, cache: Optional[Path] = None) -> bool:
+    """
+    adds build/'s artifacts to the cache under the current sources' key.
+    returns False if they are cached already or nothing has been compiled
+    """
+    key = source_key(project)
+    entry = (cache or cache_root()) / key
+    build = project / "build"
+    if entry.is_dir() or not (build / "contracts").is_dir():
+        return False
+
+    staging = entry.with_name(f"{key}.{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    for name in ARTIFACTS:
+        if (build / name).is_dir():
+            shutil.copytree(build / name, staging / name)
+    try:
+        staging.rename(entry)
+    except OSError:
+        # another process cached the same sources first
+        shutil.rmtree(staging, ignore_errors=True)
+        return False
+    (build / KEY_FILE).write_text(key)
+    return True
+
+
+def _built_key(build: Path) -> Optional[str]:
+    path = build / KEY_FILE
+    return path.read_text() if path.exists() else None
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv not in (["restore"], ["store"]):
+        print("usage: python -m renft.buildcache restore|store", file=sys.stderr)
+        return 2
+    done = restore() if argv == ["restore"] else store()
+    print(f"{argv[0]} {source_key()}: {'done' if done else 'nothing to do'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+from statistics import median
+from typing import Dict, Optional, Sequence
+
+# the base fee can rise by at most 12.5% a block, so twice the next base fee
+# keeps a transaction includable through six full blocks in a row
+BASE_FEE_HEADROOM = 2
+
+
+def fees_from_history(
+    base_fees: Sequence[int],
+    rewards: Sequence[Sequence[int]],
+    gas_used_ratios: Sequence[float],
+    min_priority_fee: int = 0,
+) -> Dict[str, int]:
+    """
+    EIP-1559 fees from an eth_feeHistory window. the priority fee is the
+    median of the per-block rewards at the requested percentile, ignoring
+    empty blocks; base_fees[-1] is the base fee of the next block
+    """
+    tips = [int(reward[0]) for reward, ratio in zip(rewards, gas_used_ratios) if ratio > 0]
+    priority_fee = max(int(median(tips)) if tips else 0, min_priority_fee)
+    max_fee = BASE_FEE_HEADROOM * int(base_fees[-1]) + priority_fee
+    return {"priority_fee": priority_fee, "max_fee": max_fee}
+
+
+class FeeHistoryEstimator:
+    """
+    gas fees from the node's own recent blocks. nodes without eth_feeHistory
+    (pre-london chains, older ganache) fall back to a legacy eth_gasPrice
+    """
+
+    def __init__(
+        self,
+        web3,
+        blocks: int = 20,
+        percentile: float = 50,
+        min_priority_fee: int = 0,
+    ):
+        self.web3 = web3
+        self.blocks = blocks
+        self.percentile = percentile
+        self.min_priority_fee = min_priority_fee
+
+    def suggest(self) -> Dict[str, int]:
+        """tx params, either priority_fee and max_fee or gas_price"""
+        history = self._fee_history()
+        if history is None or not any(history["baseFeePerGas"]):
+            return {"gas_price": self.web3.eth.gas_price}
+        return fees_from_history(
+            history["baseFeePerGas"],
+            history["reward"],
+            history["gasUsedRatio"],
+            self.min_priority_fee,
+        )
+
+    def _fee_history(self) -> Optional[dict]:
+        try:
+            return self.web3.eth.fee_history(self.blocks, "latest", [self.percentile])
+        except (ValueError, AttributeError):
+            return None
@@ -0,0 +1,5 @@
+from renft.indexer.analytics import nft_report, rentals
+from renft.indexer.archive import Archive, export
+from renft.indexer.events import TOPICS, Event, decode_log
+from renft.indexer.indexer import Indexer, ReorgTooDeep
+from renft.indexer.store import Store
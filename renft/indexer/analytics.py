@@ -0,0 +1,167 @@
+"""
+History analytics over an Archive. Joins, matching and interval math are
+numpy scans over the memmapped columns; only the payouts of matched rentals
+go through renft.model, on python ints, so 18 decimal amounts and fees come
+out exactly as ReNFT computed them.
+"""
+from typing import Dict
+
+import numpy as np
+from eth_utils import to_checksum_address
+
+from renft import model
+from renft.indexer.archive import Archive
+from renft.price import DECIMALS, scale_of, unpack_price
+
+OPEN, RETURNED, CLAIMED = 0, 1, 2
+
+
+def _order(columns) -> np.ndarray:
+    return columns["block_number"].astype(np.uint64) << np.uint64(32) | columns[
+        "log_index"
+    ].astype(np.uint64)
+
+
+def _rank(sorted_ids) -> np.ndarray:
+    """position of every element within its run of equal ids"""
+    n = len(sorted_ids)
+    starts = np.r_[0, np.flatnonzero(sorted_ids[1:] != sorted_ids[:-1]) + 1]
+    return np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+
+def _lent_rows(lent, lending_ids) -> np.ndarray:
+    """row of the Lent event of every lending id"""
+    by_id = np.argsort(lent["lendingId"], kind="stable")
+    return by_id[np.searchsorted(lent["lendingId"][by_id], lending_ids)]
+
+
+def rentals(archive: Archive) -> Dict[str, np.ndarray]:
+    """
+    one row per Rented event: the Lent row it belongs to, its duration and
+    start, and when and how it ended (OPEN, RETURNED or CLAIMED)
+    """
+    rented = archive.columns("Rented")
+    returned = archive.columns("Returned")
+    claimed = archive.columns("CollateralClaimed")
+
+    end_ids = np.r_[returned["lendingId"], claimed["lendingId"]]
+    end_at = np.r_[returned["returnedAt"], claimed["claimedAt"]].astype(np.int64)
+    end_kind = np.r_[
+        np.full(len(returned["lendingId"]), RETURNED, np.uint8),
+        np.full(len(claimed["lendingId"]), CLAIMED, np.uint8),
+    ]
+    end_sort = np.lexsort((np.r_[_order(returned), _order(claimed)], end_ids))
+    end_ids = end_ids[end_sort]
+    # with a trailing slot for rentals that have not ended
+    end_at = np.r_[end_at[end_sort], 0]
+    end_kind = np.r_[end_kind[end_sort], OPEN]
+
+    # a lending's rentals and endings alternate, so its k-th rental ends
+    # with its k-th Returned or CollateralClaimed
+    rent_sort = np.lexsort((_order(rented), rented["lendingId"]))
+    lending_ids = rented["lendingId"][rent_sort]
+    rank = _rank(lending_ids)
+    first = np.searchsorted(end_ids, lending_ids, "left")
+    ended = rank < np.searchsorted(end_ids, lending_ids, "right") - first
+    end = np.where(ended, first + rank, len(end_ids))
+
+    return {
+        "lent_row": _lent_rows(archive.columns("Lent"), lending_ids),
+        "lending_id": lending_ids,
+        "rent_duration": rented["rentDuration"][rent_sort].astype(np.int64),
+        "rented_at": rented["rentedAt"][rent_sort].astype(np.int64),
+        "ended_at": end_at[end],
+        "outcome": end_kind[end],
+    }
+
+
+def nft_report(
+    archive: Archive, now: int, rent_fee: int = 0, decimals: Dict[int, int] = DECIMALS
+) -> Dict[str, np.ndarray]:
+    """
+    per (nft, token id, payment token): seconds listed and rented, their
+    ratio, the number of rentals, realized rent, the fee taken from it
+    (takeFee with rent_fee in bps), what the lenders kept of it and the
+    collateral they claimed
+    """
+    lent = archive.columns("Lent")
+    n = len(lent["lendingId"])
+    key = np.empty((n, 53), np.uint8)
+    key[:, :20] = lent["nftAddress"].view(np.uint8).reshape(n, 20)
+    key[:, 20:52] = lent["tokenId"].view(np.uint8).reshape(n, 32)
+    key[:, 52] = lent["paymentToken"]
+    groups, group = np.unique(key.view("V53").ravel(), return_inverse=True)
+    group = group.ravel()
+
+    # listed from Lent until stopped, claimed or now
+    listed_until = np.full(n, now, np.int64)
+    for name, field in (("LendingStopped", "stoppedAt"), ("CollateralClaimed", "claimedAt")):
+        columns = archive.columns(name)
+        listed_until[_lent_rows(lent, columns["lendingId"])] = columns[field]
+    listed = np.maximum(listed_until - lent["timestamp"].astype(np.int64), 0)
+
+    r = rentals(archive)
+    row = r["lent_row"]
+    due = r["rented_at"] + r["rent_duration"] * model.SECONDS_IN_DAY
+    rented_until = np.where(
+        r["outcome"] == RETURNED, r["ended_at"], np.minimum(due, now)
+    )
+    rented = np.maximum(rented_until - r["rented_at"], 0)
+
+    table = np.zeros(256, np.int64)
+    for pt, d in decimals.items():
+        table[pt] = d
+    token_decimals = table[lent["paymentToken"][row]]
+    args = (
+        lent["lentAmount"][row],
+        lent["dailyRentPrice"][row],
+        lent["nftPrice"][row],
+        r["rent_duration"],
+    )
+    rent = np.zeros(len(row), dtype=object)
+    fees = np.zeros(len(row), dtype=object)
+    collateral = np.zeros(len(row), dtype=object)
+
+    returns = r["outcome"] == RETURNED
+    if returns.any():
+        payout = model.distribute_payments(
+            *(a[returns] for a in args),
+            rented[returns],
+            token_decimals[returns],
+            rent_fee,
+        )
+        rent[returns] = payout.lender + payout.beneficiary
+        fees[returns] = payout.beneficiary
+    claims = r["outcome"] == CLAIMED
+    if claims.any():
+        payout = model.distribute_claim_payment(
+            *(a[claims] for a in args), token_decimals[claims], rent_fee
+        )
+        max_rent = r["rent_duration"][claims].astype(object) * unpack_price(
+            args[1][claims], scale_of(token_decimals[claims])
+        )
+        rent[claims] = max_rent
+        fees[claims] = payout.beneficiary
+        collateral[claims] = payout.lender + payout.beneficiary - max_rent
+
+    def per_group(values, rows=None, dtype=np.int64):
+        totals = np.zeros(len(groups), dtype=dtype)
+        np.add.at(totals, group if rows is None else group[rows], values)
+        return totals
+
+    listed_seconds = per_group(listed)
+    rented_seconds = per_group(rented, row)
+    raw = groups.view(np.uint8).reshape(-1, 53)
+    return {
+        "nft": [to_checksum_address(bytes(k[:20])) for k in raw],
+        "token_id": [int.from_bytes(bytes(k[20:52]), "big") for k in raw],
+        "payment_token": raw[:, 52].copy(),
+        "listed_seconds": listed_seconds,
+        "rented_seconds": rented_seconds,
+        "utilization": rented_seconds / np.maximum(listed_seconds, 1),
+        "rentals": per_group(np.ones(len(row), np.int64), row),
+        "rent": per_group(rent, row, object),
+        "fees": per_group(fees, row, object),
+        "lender_income": per_group(rent - fees, row, object),
+        "collateral_claimed": per_group(collateral, row, object),
+    }
@@ -0,0 +1,165 @@
+import json
+from pathlib import Path
+from typing import Dict, Sequence
+
+import numpy as np
+from hexbytes import HexBytes
+
+from renft.indexer.events import EVENTS, TOPICS, Event, decode_log
+
+# per abi type; uint256 values stay raw big endian bytes
+DTYPES = {
+    "address": "V20",
+    "uint256": "V32",
+    "uint8": "u1",
+    "uint32": "<u4",
+    "bytes4": "<u4",
+    "bool": "?",
+}
+# lending ids come from ReNFT's counter and fit a uint64
+OVERRIDES = {"lendingId": "<u8"}
+# every event also records where and when it was emitted
+META = {"block_number": "<u8", "log_index": "<u4", "timestamp": "<u8"}
+
+
+def schema(events=EVENTS) -> Dict[str, Dict[str, str]]:
+    return {
+        name: {
+            **{field: OVERRIDES.get(field, DTYPES[_type]) for _type, field, _ in fields},
+            **META,
+        }
+        for name, fields in events
+    }
+
+
+SCHEMA = schema()
+
+
+def _encode(value, dtype: str):
+    if dtype == "V20":
+        return bytes(HexBytes(value)).rjust(20, b"\0")
+    if dtype == "V32":
+        return int(value).to_bytes(32, "big")
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, "big")
+    return value
+
+
+class Archive:
+    """
+    append-only columnar copy of the ReNFT event history. every field of
+    every event is a raw file directory/<event>/<field>.bin of fixed width
+    values, readable as a numpy memmap without decoding anything.
+    meta.json holds each event's row count and the last archived block; it
+    is written after the columns, and rows beyond it (an interrupted
+    append) are cut off when the archive is opened
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.meta_path = self.directory / "meta.json"
+        if self.meta_path.exists():
+            self.meta = json.loads(self.meta_path.read_text())
+        else:
+            self.meta = {"to_block": None, "rows": {name: 0 for name in SCHEMA}}
+        for name, columns in SCHEMA.items():
+            (self.directory / name).mkdir(parents=True, exist_ok=True)
+            for field, dtype in columns.items():
+                path = self._path(name, field)
+                path.touch()
+                size = self.meta["rows"][name] * np.dtype(dtype).itemsize
+                if path.stat().st_size != size:
+                    with open(path, "r+b") as f:
+                        f.truncate(size)
+
+    @property
+    def to_block(self):
+        return self.meta["to_block"]
+
+    def __len__(self):
+        return sum(self.meta["rows"].values())
+
+    def append(self, events: Sequence[Event], timestamps: Dict[int, int], to_block: int):
+        """
+        adds events (in chain order) and marks every block up to to_block as
+        archived. timestamps maps each event's block number to its timestamp
+        """
+        by_name = {name: [] for name in SCHEMA}
+        for event in events:
+            by_name[event.name].append(event)
+        for name, rows in by_name.items():
+            if not rows:
+                continue
+            for field, dtype in SCHEMA[name].items():
+                if field == "timestamp":
+                    values = [timestamps[event.block_number] for event in rows]
+                elif field in META:
+                    values = [getattr(event, field) for event in rows]
+                else:
+                    values = [_encode(event.args[field], dtype) for event in rows]
+                with open(self._path(name, field), "ab") as f:
+                    f.write(np.array(values, dtype=dtype).tobytes())
+            self.meta["rows"][name] += len(rows)
+        self.meta["to_block"] = to_block
+        tmp = self.meta_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.meta))
+        tmp.replace(self.meta_path)
+
+    def column(self, name: str, field: str) -> np.ndarray:
+        dtype = np.dtype(SCHEMA[name][field])
+        rows = self.meta["rows"][name]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._path(name, field), dtype=dtype, mode="r", shape=(rows,))
+
+    def columns(self, name: str) -> Dict[str, np.ndarray]:
+        return {field: self.column(name, field) for field in SCHEMA[name]}
+
+    def _path(self, name: str, field: str) -> Path:
+        return self.directory / name / f"{field}.bin"
+
+
+def export(
+    web3,
+    address,
+    archive: Archive,
+    start_block: int = 0,
+    confirmations: int = 64,
+    block_range: int = 2_000,
+) -> int:
+    """
+    appends every event up to head - confirmations that is not archived yet
+    and returns how many there were. the archive is never rolled back, so
+    confirmations must exceed any reorg the chain can have
+    """
+    head = web3.eth.block_number - confirmations
+    from_block = start_block if archive.to_block is None else archive.to_block + 1
+    exported = 0
+    while from_block <= head:
+        to_block = min(from_block + block_range - 1, head)
+        try:
+            logs = web3.eth.get_logs(
+                {
+                    "address": address,
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "topics": [["0x" + topic.hex() for topic in TOPICS]],
+                }
+            )
+        except (ValueError, OSError):
+            if block_range == 1:
+                raise
+            block_range //= 2
+            continue
+        events = sorted(
+            (decode_log(log) for log in logs),
+            key=lambda event: (event.block_number, event.log_index),
+        )
+        timestamps = {
+            number: web3.eth.get_block(number)["timestamp"]
+            for number in {event.block_number for event in events}
+        }
+        archive.append(events, timestamps, to_block)
+        exported += len(events)
+        from_block = to_block + 1
+    return exported
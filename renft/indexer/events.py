@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from eth_abi import decode_abi, decode_single
+from eth_utils import event_signature_to_log_topic
+from hexbytes import HexBytes
+
+# (name, [(type, name, indexed)]) as declared in interfaces/IReNFT.sol, with
+# enums lowered to uint8
+EVENTS = [
+    (
+        "Lent",
+        [
+            ("address", "nftAddress", True),
+            ("uint256", "tokenId", True),
+            ("uint8", "lentAmount", False),
+            ("uint256", "lendingId", False),
+            ("address", "lenderAddress", True),
+            ("uint8", "maxRentDuration", False),
+            ("bytes4", "dailyRentPrice", False),
+            ("bytes4", "nftPrice", False),
+            ("bool", "isERC721", False),
+            ("uint8", "paymentToken", False),
+        ],
+    ),
+    (
+        "Rented",
+        [
+            ("uint256", "lendingId", False),
+            ("address", "renterAddress", True),
+            ("uint8", "rentDuration", False),
+            ("uint32", "rentedAt", False),
+        ],
+    ),
+    ("Returned", [("uint256", "lendingId", True), ("uint32", "returnedAt", False)]),
+    (
+        "CollateralClaimed",
+        [("uint256", "lendingId", True), ("uint32", "claimedAt", False)],
+    ),
+    (
+        "LendingStopped",
+        [("uint256", "lendingId", True), ("uint32", "stoppedAt", False)],
+    ),
+]
+
+
+@dataclass(frozen=True)
+class EventAbi:
+    name: str
+    topic: bytes
+    indexed: List[Tuple[str, str]]
+    data_names: List[str]
+    data_types: List[str]
+
+
+@dataclass
+class Event:
+    name: str
+    args: Dict
+    block_number: int
+    block_hash: bytes
+    log_index: int
+    transaction_hash: bytes
+
+
+def compile_events(events=EVENTS) -> Dict[bytes, EventAbi]:
+    table = {}
+    for name, fields in events:
+        signature = f"{name}({','.join(t for t, _, _ in fields)})"
+        topic = event_signature_to_log_topic(signature)
+        table[topic] = EventAbi(
+            name=name,
+            topic=topic,
+            indexed=[(t, n) for t, n, indexed in fields if indexed],
+            data_names=[n for _, n, indexed in fields if not indexed],
+            data_types=[t for t, _, indexed in fields if not indexed],
+        )
+    return table
+
+
+TOPICS = compile_events()
+
+
+def decode_log(log, topics=TOPICS) -> Event:
+    abi = topics[bytes(HexBytes(log["topics"][0]))]
+    args = {}
+    for (_type, name), topic in zip(abi.indexed, log["topics"][1:]):
+        args[name] = decode_single(_type, bytes(HexBytes(topic)))
+    values = decode_abi(abi.data_types, bytes(HexBytes(log["data"])))
+    args.update(zip(abi.data_names, values))
+    return Event(
+        name=abi.name,
+        args=args,
+        block_number=log["blockNumber"],
+        block_hash=bytes(HexBytes(log["blockHash"])),
+        log_index=log["logIndex"],
+        transaction_hash=bytes(HexBytes(log["transactionHash"])),
+    )
@@ -0,0 +1,114 @@
+import time
+
+from renft.indexer.events import TOPICS, decode_log
+from renft.indexer.store import Store
+
+
+class ReorgTooDeep(Exception):
+    pass
+
+
+class Indexer:
+    """
+    follows ReNFT events into a Store. logs are fetched in block ranges that
+    halve when the node rejects or times out a query and double while
+    queries come back small. after a restart it resumes from the store's
+    checkpoint; blocks whose hash changed are rolled back first.
+    listeners are called with (event, store) after each event is applied,
+    reorg_listeners with (block number, store) after a rollback to that block
+    """
+
+    def __init__(
+        self,
+        web3,
+        address,
+        store: Store,
+        start_block: int = 0,
+        confirmations: int = 0,
+        reorg_depth: int = 64,
+        min_range: int = 1,
+        max_range: int = 10_000,
+        target_logs: int = 1_000,
+        listeners=(),
+        reorg_listeners=(),
+    ):
+        self.web3 = web3
+        self.address = address
+        self.store = store
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.min_range = min_range
+        self.max_range = max_range
+        self.target_logs = target_logs
+        self.range = max_range
+        self.listeners = list(listeners)
+        self.reorg_listeners = list(reorg_listeners)
+
+    def sync(self) -> int:
+        """processes every new block up to head - confirmations; returns the number of events"""
+        head = self.web3.eth.block_number - self.confirmations
+        self.handle_reorg()
+        checkpoint = self.store.checkpoint
+        from_block = self.start_block if checkpoint is None else checkpoint + 1
+
+        applied = 0
+        while from_block <= head:
+            to_block = min(from_block + self.range - 1, head)
+            try:
+                logs = self.web3.eth.get_logs(
+                    {
+                        "address": self.address,
+                        "fromBlock": from_block,
+                        "toBlock": to_block,
+                        "topics": [["0x" + topic.hex() for topic in TOPICS]],
+                    }
+                )
+            except (ValueError, OSError):
+                if self.range == self.min_range:
+                    raise
+                self.range = max(self.range // 2, self.min_range)
+                continue
+
+            events = sorted(
+                (decode_log(log) for log in logs),
+                key=lambda event: (event.block_number, event.log_index),
+            )
+            with self.store:
+                for event in events:
+                    self.store.apply(event)
+                    for listener in self.listeners:
+                        listener(event, self.store)
+                    self.store.record_block(event.block_number, event.block_hash)
+                self.store.set_checkpoint(to_block, self._block_hash(to_block))
+                self.store.prune(to_block - self.reorg_depth)
+            applied += len(events)
+
+            if len(logs) < self.target_logs:
+                self.range = min(self.range * 2, self.max_range)
+            from_block = to_block + 1
+        return applied
+
+    def handle_reorg(self):
+        """rolls the store back to the newest recorded block still on the canonical chain"""
+        recorded = self.store.recorded_blocks()
+        if not recorded or self._block_hash(recorded[0][0]) == recorded[0][1]:
+            return
+        for number, block_hash in recorded[1:]:
+            if self._block_hash(number) == block_hash:
+                with self.store:
+                    self.store.rollback(number)
+                for listener in self.reorg_listeners:
+                    listener(number, self.store)
+                return
+        raise ReorgTooDeep(
+            f"no recorded block since {recorded[-1][0]} is canonical, resync from scratch"
+        )
+
+    def run(self, poll_interval: float = 2.0):
+        while True:
+            self.sync()
+            time.sleep(poll_interval)
+
+    def _block_hash(self, number: int) -> bytes:
+        return bytes(self.web3.eth.get_block(number)["hash"])
@@ -0,0 +1,237 @@
+import json
+import sqlite3
+from typing import Optional
+
+from eth_utils import to_checksum_address
+
+from renft.indexer.events import Event
+from renft.lending import NFTStandard, lending_key
+
+COLUMNS = (
+    "key",
+    "lending_id",
+    "nft",
+    "token_id",
+    "nft_standard",
+    "lender_address",
+    "max_rent_duration",
+    "daily_rent_price",
+    "nft_price",
+    "lent_amount",
+    "payment_token",
+    "renter_address",
+    "rent_duration",
+    "rented_at",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lending_renting (
+    key BLOB PRIMARY KEY,
+    lending_id INTEGER NOT NULL UNIQUE,
+    nft TEXT NOT NULL,
+    token_id TEXT NOT NULL,
+    nft_standard INTEGER NOT NULL,
+    lender_address TEXT NOT NULL,
+    max_rent_duration INTEGER NOT NULL,
+    daily_rent_price INTEGER NOT NULL,
+    nft_price INTEGER NOT NULL,
+    lent_amount INTEGER NOT NULL,
+    payment_token INTEGER NOT NULL,
+    renter_address TEXT,
+    rent_duration INTEGER,
+    rented_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS lending_renting_lender ON lending_renting (lender_address);
+CREATE INDEX IF NOT EXISTS lending_renting_renter ON lending_renting (renter_address);
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL,
+    key BLOB NOT NULL,
+    previous TEXT
+);
+CREATE INDEX IF NOT EXISTS journal_block ON journal (block_number);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+class Store:
+    """
+    sqlite mirror of ReNFT.lendingRenting, keyed like handleLend keys storage.
+    every change is journaled with the row it replaced, so that blocks
+    dropped by a reorg can be rolled back
+    """
+
+    def __init__(self, path=":memory:"):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self.db.__enter__()
+
+    def __exit__(self, *exc):
+        return self.db.__exit__(*exc)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM lending_renting").fetchone()[0]
+
+    @property
+    def checkpoint(self) -> Optional[int]:
+        row = self.db.execute("SELECT block_number FROM checkpoint").fetchone()
+        return None if row is None else row[0]
+
+    def set_checkpoint(self, block_number: int, block_hash: bytes):
+        self.db.execute(
+            "INSERT OR REPLACE INTO checkpoint (id, block_number) VALUES (0, ?)",
+            (block_number,),
+        )
+        self.record_block(block_number, block_hash)
+
+    def record_block(self, block_number: int, block_hash: bytes):
+        self.db.execute(
+            "INSERT OR REPLACE INTO blocks (number, hash) VALUES (?, ?)",
+            (block_number, block_hash),
+        )
+
+    def recorded_blocks(self):
+        """(number, hash) of recorded blocks, newest first"""
+        return self.db.execute(
+            "SELECT number, hash FROM blocks ORDER BY number DESC"
+        ).fetchall()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        row = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM lending_renting WHERE key = ?", (key,)
+        ).fetchone()
+        return None if row is None else self._to_dict(row)
+
+    def get_by_lending_id(self, lending_id: int) -> Optional[dict]:
+        row = self.db.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM lending_renting WHERE lending_id = ?",
+            (lending_id,),
+        ).fetchone()
+        return None if row is None else self._to_dict(row)
+
+    def rows(self):
+        cursor = self.db.execute(f"SELECT {', '.join(COLUMNS)} FROM lending_renting")
+        for row in cursor:
+            yield self._to_dict(row)
+
+    def apply(self, event: Event):
+        handler = getattr(self, f"_on_{event.name}")
+        handler(event)
+
+    def rollback(self, block_number: int):
+        """undo every change made after block_number"""
+        entries = self.db.execute(
+            "SELECT key, previous FROM journal WHERE block_number > ? ORDER BY id DESC",
+            (block_number,),
+        ).fetchall()
+        for key, previous in entries:
+            self.db.execute("DELETE FROM lending_renting WHERE key = ?", (key,))
+            if previous is not None:
+                self._insert(dict(json.loads(previous), key=key))
+        self.db.execute("DELETE FROM journal WHERE block_number > ?", (block_number,))
+        self.db.execute("DELETE FROM blocks WHERE number > ?", (block_number,))
+        self.db.execute(
+            "UPDATE checkpoint SET block_number = ? WHERE block_number > ?",
+            (block_number, block_number),
+        )
+
+    def prune(self, block_number: int):
+        """forget journal entries and block hashes that can no longer be reorged"""
+        self.db.execute("DELETE FROM journal WHERE block_number < ?", (block_number,))
+        self.db.execute("DELETE FROM blocks WHERE number < ?", (block_number,))
+
+    def _on_Lent(self, event: Event):
+        args = event.args
+        key = lending_key(args["nftAddress"], args["tokenId"], args["lendingId"])
+        self._journal(event, key)
+        self._insert(
+            {
+                "key": key,
+                "lending_id": args["lendingId"],
+                "nft": to_checksum_address(args["nftAddress"]),
+                "token_id": str(args["tokenId"]),
+                "nft_standard": (
+                    NFTStandard.E721.value
+                    if args["isERC721"]
+                    else NFTStandard.E1155.value
+                ),
+                "lender_address": to_checksum_address(args["lenderAddress"]),
+                "max_rent_duration": args["maxRentDuration"],
+                "daily_rent_price": int.from_bytes(args["dailyRentPrice"], "big"),
+                "nft_price": int.from_bytes(args["nftPrice"], "big"),
+                "lent_amount": args["lentAmount"],
+                "payment_token": args["paymentToken"],
+                "renter_address": None,
+                "rent_duration": None,
+                "rented_at": None,
+            }
+        )
+
+    def _on_Rented(self, event: Event):
+        self._set_renting(
+            event,
+            to_checksum_address(event.args["renterAddress"]),
+            event.args["rentDuration"],
+            event.args["rentedAt"],
+        )
+
+    def _on_Returned(self, event: Event):
+        self._set_renting(event, None, None, None)
+
+    def _on_LendingStopped(self, event: Event):
+        self._delete(event)
+
+    def _on_CollateralClaimed(self, event: Event):
+        self._delete(event)
+
+    def _set_renting(self, event, renter_address, rent_duration, rented_at):
+        key = self._key_of(event.args["lendingId"])
+        self._journal(event, key)
+        self.db.execute(
+            "UPDATE lending_renting SET renter_address = ?, rent_duration = ?, "
+            "rented_at = ? WHERE key = ?",
+            (renter_address, rent_duration, rented_at, key),
+        )
+
+    def _delete(self, event: Event):
+        key = self._key_of(event.args["lendingId"])
+        self._journal(event, key)
+        self.db.execute("DELETE FROM lending_renting WHERE key = ?", (key,))
+
+    def _key_of(self, lending_id: int) -> bytes:
+        row = self.db.execute(
+            "SELECT key FROM lending_renting WHERE lending_id = ?", (lending_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(f"unknown lending id {lending_id}")
+        return row[0]
+
+    def _journal(self, event: Event, key: bytes):
+        previous = self.get(key)
+        if previous is not None:
+            del previous["key"]
+            previous = json.dumps(previous)
+        self.db.execute(
+            "INSERT INTO journal (block_number, key, previous) VALUES (?, ?, ?)",
+            (event.block_number, key, previous),
+        )
+
+    def _insert(self, row: dict):
+        self.db.execute(
+            f"INSERT INTO lending_renting ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})",
+            tuple(row[column] for column in COLUMNS),
+        )
+
+    @staticmethod
+    def _to_dict(row) -> dict:
+        return dict(zip(COLUMNS, row))
@@ -0,0 +1,90 @@
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+SECONDS_IN_DAY = 86400
+
+
+@dataclass(order=True)
+class Rental:
+    expires_at: int
+    lending_id: int
+    nft: str = field(compare=False)
+    token_id: int = field(compare=False)
+    nft_standard: int = field(compare=False)
+
+    @classmethod
+    def from_row(cls, row):
+        return cls(
+            expires_at=expires_at(row["rented_at"], row["rent_duration"]),
+            lending_id=row["lending_id"],
+            nft=row["nft"],
+            token_id=int(row["token_id"]),
+            nft_standard=row["nft_standard"],
+        )
+
+
+def expires_at(rented_at: int, rent_duration: int) -> int:
+    # ReNFT.isPastReturnDate holds once now - rentedAt > rentDuration days
+    return rented_at + rent_duration * SECONDS_IN_DAY
+
+
+class ExpiryQueue:
+    """
+    open rentals in a min-heap on expiry. returned rentals are dropped lazily
+    when they reach the top, and the heap is rebuilt once stale entries
+    outnumber live ones
+    """
+
+    def __init__(self):
+        self.heap: List[Rental] = []
+        self.live: Dict[int, Rental] = {}
+
+    @classmethod
+    def from_store(cls, store):
+        queue = cls()
+        queue.reload(store)
+        return queue
+
+    def reload(self, store):
+        """replaces the queue with the store's open rentals, e.g. after a rollback"""
+        self.live = {
+            row["lending_id"]: Rental.from_row(row)
+            for row in store.rows()
+            if row["renter_address"] is not None
+        }
+        self.heap = list(self.live.values())
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.live)
+
+    def push(self, rental: Rental):
+        self.live[rental.lending_id] = rental
+        heapq.heappush(self.heap, rental)
+
+    def discard(self, lending_id: int):
+        if self.live.pop(lending_id, None) is not None:
+            if len(self.heap) > 2 * len(self.live) + 64:
+                self.heap = list(self.live.values())
+                heapq.heapify(self.heap)
+
+    def next_expiry(self) -> Optional[int]:
+        self._drop_stale()
+        return self.heap[0].expires_at if self.heap else None
+
+    def pop_expired(self, now: int, limit: Optional[int] = None) -> List[Rental]:
+        """rentals that are claimable at `now`, earliest expiry first"""
+        expired = []
+        while self.heap and (limit is None or len(expired) < limit):
+            self._drop_stale()
+            if not self.heap or self.heap[0].expires_at >= now:
+                break
+            rental = heapq.heappop(self.heap)
+            del self.live[rental.lending_id]
+            expired.append(rental)
+        return expired
+
+    def _drop_stale(self):
+        while self.heap and self.live.get(self.heap[0].lending_id) is not self.heap[0]:
+            heapq.heappop(self.heap)
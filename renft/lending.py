@@ -0,0 +1,168 @@
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+from eth_utils import keccak, to_bytes, to_checksum_address
+
+SEPARATOR = "::"
+
+
+class NFTStandard(Enum):
+    E721 = 0
+    E1155 = 1
+
+
+class PaymentToken(Enum):
+    SENTINEL = 0
+    WETH = 1
+    DAI = 2
+    USDC = 3
+    USDT = 4
+    TUSD = 5
+    RENT = 6
+
+
+@dataclass
+class Lending:
+    nft_standard: NFTStandard
+    lender_address: str
+    max_rent_duration: str
+    daily_rent_price: bytes
+    nft_price: bytes
+    lent_amount: int
+    payment_token: PaymentToken
+    # below are not part of the contract struct
+    nft: str
+    token_id: int
+    lending_id: int
+
+
+@dataclass
+class Renting:
+    renter_address: str
+    rent_duration: int
+    rented_at: int
+    # below are not part of the contract struct
+    nft_standard: NFTStandard
+    nft: str
+    token_id: int
+    lending_id: int
+
+    @classmethod
+    def from_lending(
+        cls, lending: Lending, renter_address: str, rent_duration: int, rented_at: int = 0
+    ) -> "Renting":
+        return cls(
+            renter_address=renter_address,
+            rent_duration=rent_duration,
+            rented_at=rented_at,
+            nft_standard=lending.nft_standard,
+            nft=lending.nft,
+            token_id=lending.token_id,
+            lending_id=lending.lending_id,
+        )
+
+
+@dataclass
+class LendingRenting:
+    lending: Lending
+    renting: Renting
+
+
+def concat_lending_id(nft, token_id, lending_id):
+    return f"{nft}{SEPARATOR}{token_id}{SEPARATOR}{lending_id}"
+
+
+def lending_key(nft, token_id, lending_id) -> bytes:
+    """keccak256(abi.encodePacked(nft, tokenId, lendingId)), the lendingRenting key"""
+    return keccak(
+        to_bytes(hexstr=to_checksum_address(str(nft)))
+        + int(token_id).to_bytes(32, "big")
+        + int(lending_id).to_bytes(32, "big")
+    )
+
+
+def _field(word, offset, bits):
+    return (word >> offset) & ((1 << bits) - 1)
+
+
+def unpack_lending(word: int, nft, token_id, lending_id) -> Optional[Lending]:
+    """
+    Lending from its storage slot: nftStandard at bit 0, then lenderAddress
+    (8), maxRentDuration (168), dailyRentPrice (176), nftPrice (208),
+    lentAmount (240), paymentToken (248). None if the slot is empty
+    """
+    if word == 0:
+        return None
+    return Lending(
+        nft_standard=_field(word, 0, 8),
+        lender_address=to_checksum_address(_field(word, 8, 160).to_bytes(20, "big")),
+        max_rent_duration=_field(word, 168, 8),
+        daily_rent_price=_field(word, 176, 32).to_bytes(4, "big"),
+        nft_price=_field(word, 208, 32).to_bytes(4, "big"),
+        lent_amount=_field(word, 240, 8),
+        payment_token=_field(word, 248, 8),
+        nft=nft,
+        token_id=token_id,
+        lending_id=lending_id,
+    )
+
+
+def unpack_renting(word: int, lending: Lending) -> Optional[Renting]:
+    """
+    Renting from its storage slot: renterAddress at bit 0, rentDuration
+    (160), rentedAt (168). None if the slot is empty
+    """
+    if word == 0:
+        return None
+    return Renting.from_lending(
+        lending,
+        renter_address=to_checksum_address(_field(word, 0, 160).to_bytes(20, "big")),
+        rent_duration=_field(word, 160, 8),
+        rented_at=_field(word, 168, 32),
+    )
+
+
+def lendings_to_lend_args(lendings):
+    args = [[], [], [], [], [], [], [], []]
+    for lending in lendings:
+        args[0].append(lending.nft_standard)
+        args[1].append(lending.nft)
+        args[2].append(lending.token_id)
+        args[3].append(lending.lent_amount)
+        args[4].append(lending.max_rent_duration)
+        args[5].append(lending.daily_rent_price)
+        args[6].append(lending.nft_price)
+        args[7].append(lending.payment_token)
+    return args
+
+
+def lendings_to_stop_lending_args(lendings):
+    args = [[], [], [], []]
+    for lending in lendings:
+        args[0].append(lending.nft_standard)
+        args[1].append(lending.nft)
+        args[2].append(lending.token_id)
+        args[3].append(lending.lending_id)
+    return args
+
+
+def rentings_to_rent_args(rentings):
+    args = [[], [], [], [], []]
+    for renting in rentings:
+        args[0].append(renting.nft_standard)
+        args[1].append(renting.nft)
+        args[2].append(renting.token_id)
+        args[3].append(renting.lending_id)
+        args[4].append(renting.rent_duration)
+    return args
+
+
+def rentings_to_return_args(rentings):
+    args = [[], [], [], []]
+    for renting in rentings:
+        args[0].append(renting.nft_standard)
+        args[1].append(renting.nft)
+        args[2].append(renting.token_id)
+        args[3].append(renting.lending_id)
+    return args
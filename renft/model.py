@@ -0,0 +1,109 @@
+"""
+off-chain model of the ReNFT payout math. Every function mirrors its
+namesake in contracts/ReNFT.sol on numpy object arrays of python ints, one
+element per item; items that would revert on-chain are flagged in the
+reverted mask and pay out zero.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from renft.price import as_uint, scale_of, unpack_price
+
+SECONDS_IN_DAY = 86400
+FEE_DENOMINATOR = 10000
+
+
+def take_fee(rent, rent_fee) -> np.ndarray:
+    return (as_uint(rent) * as_uint(rent_fee)) // FEE_DENOMINATOR
+
+
+@dataclass
+class Payout:
+    lender: np.ndarray
+    renter: np.ndarray
+    beneficiary: np.ndarray
+    reverted: np.ndarray
+
+
+def rent_payment(lent_amount, daily_rent_price, nft_price, rent_duration, decimals):
+    """what handleRent pulls from the renter, and where it reverts"""
+    scale = scale_of(decimals)
+    rent = as_uint(rent_duration) * unpack_price(daily_rent_price, scale)
+    collateral = as_uint(lent_amount) * unpack_price(nft_price, scale)
+    reverted = (rent == 0) | (collateral == 0)
+    return np.where(reverted, 0, rent + collateral).astype(object), reverted.astype(bool)
+
+
+def distribute_payments(
+    lent_amount,
+    daily_rent_price,
+    nft_price,
+    rent_duration,
+    seconds_since_rent_start,
+    decimals,
+    rent_fee=0,
+) -> Payout:
+    scale = scale_of(decimals)
+    collateral = as_uint(lent_amount) * unpack_price(nft_price, scale)
+    rent_price = unpack_price(daily_rent_price, scale)
+    total_renter_pmt_wo_collateral = rent_price * as_uint(rent_duration)
+    send_lender_amt = (as_uint(seconds_since_rent_start) * rent_price) // SECONDS_IN_DAY
+
+    # unpackPrice reverts on a zero nft price even though the renter's
+    # collateral is all that depends on it
+    reverted = (
+        (total_renter_pmt_wo_collateral == 0)
+        | (as_uint(nft_price) == 0)
+        | (send_lender_amt == 0)
+        | (send_lender_amt > total_renter_pmt_wo_collateral)
+    )
+    send_renter_amt = total_renter_pmt_wo_collateral - send_lender_amt
+    fee = take_fee(send_lender_amt, rent_fee)
+
+    return _payout(
+        lender=send_lender_amt - fee,
+        renter=send_renter_amt + collateral,
+        beneficiary=fee,
+        reverted=reverted,
+    )
+
+
+def distribute_claim_payment(
+    lent_amount,
+    daily_rent_price,
+    nft_price,
+    rent_duration,
+    decimals,
+    rent_fee=0,
+) -> Payout:
+    scale = scale_of(decimals)
+    collateral = as_uint(lent_amount) * unpack_price(nft_price, scale)
+    rent_price = unpack_price(daily_rent_price, scale)
+    max_rent_payment = rent_price * as_uint(rent_duration)
+    fee = take_fee(max_rent_payment, rent_fee)
+
+    return _payout(
+        lender=max_rent_payment + collateral - fee,
+        renter=np.zeros_like(max_rent_payment),
+        beneficiary=fee,
+        reverted=(max_rent_payment == 0) | (as_uint(nft_price) == 0),
+    )
+
+
+def is_past_return_date(rented_at, rent_duration, now) -> np.ndarray:
+    elapsed = as_uint(now) - as_uint(rented_at)
+    return (elapsed > as_uint(rent_duration) * SECONDS_IN_DAY).astype(bool)
+
+
+def _payout(lender, renter, beneficiary, reverted) -> Payout:
+    lender, renter, beneficiary, reverted = np.broadcast_arrays(
+        lender, renter, beneficiary, reverted
+    )
+    reverted = reverted.astype(bool)
+    return Payout(
+        lender=np.where(reverted, 0, lender).astype(object),
+        renter=np.where(reverted, 0, renter).astype(object),
+        beneficiary=np.where(reverted, 0, beneficiary).astype(object),
+        reverted=reverted,
+    )
@@ -0,0 +1,268 @@
+"""
+EIP-712 lend orders for ReNFT.rentSigned. A lender signs the Lending fields
+off-chain once they have approved ReNFT for the nft; nothing touches the
+chain until a renter submits the order with rentSigned.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from eth_keys import keys
+from eth_utils import keccak, to_bytes, to_checksum_address
+
+from renft.lending import Lending, NFTStandard
+from renft.price import as_uint
+
+NAME = "ReNFT"
+VERSION = "1"
+EIP712_DOMAIN_TYPE = (
+    "EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+)
+# enums are encoded as uint8, as in ReNFT.LEND_ORDER_TYPEHASH
+LEND_ORDER_TYPE = (
+    "LendOrder(uint8 nftStandard,address nft,uint256 tokenId,uint8 lentAmount,"
+    "uint8 maxRentDuration,bytes4 dailyRentPrice,bytes4 nftPrice,uint8 paymentToken,"
+    "address lender,uint256 nonce,uint256 deadline)"
+)
+LEND_ORDER_TYPEHASH = keccak(text=LEND_ORDER_TYPE)
+
+
+@dataclass
+class LendOrder:
+    nft_standard: int
+    nft: str
+    token_id: int
+    lent_amount: int
+    max_rent_duration: int
+    daily_rent_price: bytes
+    nft_price: bytes
+    payment_token: int
+    lender: str
+    nonce: int
+    deadline: int
+
+    @classmethod
+    def from_lending(cls, lending: Lending, nonce: int, deadline: int) -> "LendOrder":
+        return cls(
+            nft_standard=lending.nft_standard,
+            nft=lending.nft,
+            token_id=lending.token_id,
+            lent_amount=lending.lent_amount,
+            max_rent_duration=lending.max_rent_duration,
+            daily_rent_price=lending.daily_rent_price,
+            nft_price=lending.nft_price,
+            payment_token=lending.payment_token,
+            lender=lending.lender_address,
+            nonce=nonce,
+            deadline=deadline,
+        )
+
+    def to_lending(self, lending_id: int = 0) -> Lending:
+        """the Lending rentSigned records, with the lentAmount it stores"""
+        return Lending(
+            nft_standard=self.nft_standard,
+            lender_address=self.lender,
+            max_rent_duration=self.max_rent_duration,
+            daily_rent_price=self.daily_rent_price,
+            nft_price=self.nft_price,
+            lent_amount=1 if self.nft_standard == NFTStandard.E721.value else self.lent_amount,
+            payment_token=self.payment_token,
+            nft=self.nft,
+            token_id=self.token_id,
+            lending_id=lending_id,
+        )
+
+    def as_tuple(self) -> tuple:
+        """the LendOrder struct as a contract call argument"""
+        return (
+            self.nft_standard,
+            to_checksum_address(str(self.nft)),
+            self.token_id,
+            self.lent_amount,
+            self.max_rent_duration,
+            _bytes4(self.daily_rent_price),
+            _bytes4(self.nft_price),
+            self.payment_token,
+            to_checksum_address(str(self.lender)),
+            self.nonce,
+            self.deadline,
+        )
+
+
+def _bytes4(price) -> bytes:
+    return int(as_uint(price)[0]).to_bytes(4, "big")
+
+
+def _uint(value) -> bytes:
+    return int(value).to_bytes(32, "big")
+
+
+def _address(address) -> bytes:
+    return to_bytes(hexstr=to_checksum_address(str(address))).rjust(32, b"\0")
+
+
+def domain_separator(chain_id: int, verifying_contract, name=NAME, version=VERSION) -> bytes:
+    return keccak(
+        keccak(text=EIP712_DOMAIN_TYPE)
+        + keccak(text=name)
+        + keccak(text=version)
+        + _uint(chain_id)
+        + _address(verifying_contract)
+    )
+
+
+def struct_hash(order: LendOrder) -> bytes:
+    # every field is static, so encodeData is one 32 byte word per field
+    return keccak(
+        LEND_ORDER_TYPEHASH
+        + _uint(order.nft_standard)
+        + _address(order.nft)
+        + _uint(order.token_id)
+        + _uint(order.lent_amount)
+        + _uint(order.max_rent_duration)
+        + _bytes4(order.daily_rent_price).ljust(32, b"\0")
+        + _bytes4(order.nft_price).ljust(32, b"\0")
+        + _uint(order.payment_token)
+        + _address(order.lender)
+        + _uint(order.nonce)
+        + _uint(order.deadline)
+    )
+
+
+def order_digest(order: LendOrder, domain: bytes) -> bytes:
+    """what ReNFT.hashLendOrder returns for the order"""
+    return keccak(b"\x19\x01" + domain + struct_hash(order))
+
+
+def sign_order(order: LendOrder, private_key, domain: bytes) -> bytes:
+    """65 byte r ++ s ++ v signature, v in {27, 28} as ECDSA.recover expects"""
+    if not isinstance(private_key, keys.PrivateKey):
+        private_key = keys.PrivateKey(to_bytes(hexstr=str(private_key)))
+    signature = private_key.sign_msg_hash(order_digest(order, domain))
+    return signature.to_bytes()[:64] + bytes([signature.v + 27])
+
+
+def recover_signer(order: LendOrder, signature: bytes, domain: bytes) -> Optional[str]:
+    if len(signature) != 65 or signature[64] not in (27, 28):
+        return None
+    vrs = (
+        signature[64] - 27,
+        int.from_bytes(signature[:32], "big"),
+        int.from_bytes(signature[32:64], "big"),
+    )
+    try:
+        public_key = keys.Signature(vrs=vrs).recover_public_key_from_msg_hash(
+            order_digest(order, domain)
+        )
+    except Exception:
+        return None
+    return public_key.to_checksum_address()
+
+
+class OrderBook:
+    """
+    signed orders by nft, validated on the way in. a lender's nonces are
+    handed out by next_nonce so that every order they sign is unique: it
+    skips the nonces of orders in the book and those `used(lender, nonce)`
+    reports as rented or cancelled (ReNFT.isOrderNonceUsed), so a new book
+    on the same ReNFT does not hand out spent nonces again
+    """
+
+    def __init__(self, chain_id: int, renft, used=None):
+        self.domain = domain_separator(chain_id, renft)
+        self.used = used
+        # (nft, token id) -> (lender, nonce) -> (order, signature)
+        self.orders = defaultdict(dict)
+        # lender -> lowest nonce not yet handed out or seen
+        self.nonces: Dict[str, int] = defaultdict(int)
+
+    def __len__(self):
+        return sum(len(orders) for orders in self.orders.values())
+
+    def next_nonce(self, lender) -> int:
+        lender = to_checksum_address(str(lender))
+        nonce = self.nonces[lender]
+        while self.used is not None and self.used(lender, nonce):
+            nonce += 1
+        self.nonces[lender] = nonce + 1
+        return nonce
+
+    def sign(self, lendings: Sequence[Lending], private_key, deadline: int) -> List[bytes]:
+        """signs and adds an order per lending; private_key is their lender's"""
+        signatures = []
+        for lending in lendings:
+            order = LendOrder.from_lending(lending, self.next_nonce(lending.lender_address), deadline)
+            signature = sign_order(order, private_key, self.domain)
+            self.add(order, signature)
+            signatures.append(signature)
+        return signatures
+
+    def validate(self, order: LendOrder, signature: bytes, now: Optional[int] = None) -> List[str]:
+        """the reasons rentSigned would reject the order, short of on-chain state"""
+        errors = []
+        if now is not None and now > order.deadline:
+            errors.append("expired")
+        lending = order.to_lending()
+        if lending.lent_amount == 0:
+            errors.append("lend amount is zero")
+        if lending.max_rent_duration == 0:
+            errors.append("max rent duration is zero")
+        if int(as_uint(lending.daily_rent_price)[0]) == 0:
+            errors.append("rent price is zero")
+        if int(as_uint(lending.nft_price)[0]) == 0:
+            errors.append("nft price is zero")
+        if recover_signer(order, signature, self.domain) != to_checksum_address(str(order.lender)):
+            errors.append("invalid signature")
+        return errors
+
+    def add(self, order: LendOrder, signature: bytes, now: Optional[int] = None):
+        errors = self.validate(order, signature, now)
+        if errors:
+            raise ValueError(f"order {order.lender}:{order.nonce}: {', '.join(errors)}")
+        key = (to_checksum_address(str(order.nft)), int(order.token_id))
+        lender = to_checksum_address(str(order.lender))
+        self.orders[key][(lender, order.nonce)] = (order, signature)
+        self.nonces[lender] = max(self.nonces[lender], order.nonce + 1)
+
+    def add_many(self, signed: Iterable[Tuple[LendOrder, bytes]], now: Optional[int] = None) -> int:
+        """adds the valid orders and returns how many were dropped"""
+        dropped = 0
+        for order, signature in signed:
+            try:
+                self.add(order, signature, now)
+            except ValueError:
+                dropped += 1
+        return dropped
+
+    def remove(self, order: LendOrder):
+        key = (to_checksum_address(str(order.nft)), int(order.token_id))
+        self.orders[key].pop((to_checksum_address(str(order.lender)), order.nonce), None)
+        if not self.orders[key]:
+            del self.orders[key]
+
+    def prune(self, now: int, used=None) -> int:
+        """
+        drops expired orders and those whose nonce `used(lender, nonce)`
+        reports as rented or cancelled (ReNFT.isOrderNonceUsed)
+        """
+        stale = [
+            order
+            for orders in self.orders.values()
+            for order, _ in orders.values()
+            if now > order.deadline or (used is not None and used(order.lender, order.nonce))
+        ]
+        for order in stale:
+            self.remove(order)
+        return len(stale)
+
+    def for_nft(self, nft, token_id) -> List[Tuple[LendOrder, bytes]]:
+        return list(self.orders.get((to_checksum_address(str(nft)), int(token_id)), {}).values())
+
+
+def rent_signed_args(signed: Sequence[Tuple[LendOrder, bytes]], rent_durations: Sequence[int]):
+    """ReNFT.rentSigned arguments for (order, signature) pairs"""
+    return [
+        [order.as_tuple() for order, _ in signed],
+        [signature for _, signature in signed],
+        list(rent_durations),
+    ]
@@ -0,0 +1,111 @@
+"""
+bytes4 price codec. A price is a 16 bit whole part followed by a 16 bit
+decimal part in ten-thousandths, both clamped to 9999, and is scaled by
+10**decimals of the payment token (ReNFT.unpackPrice). Everything works on
+numpy object arrays of python ints, one element per price.
+"""
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+
+from renft.lending import PaymentToken
+
+MAX_PRICE_PART = 9999
+# unpackPrice divides the scale by 10000 for the decimal part
+MIN_SCALE = 10000
+
+DECIMALS = {
+    PaymentToken.WETH.value: 18,
+    PaymentToken.DAI.value: 18,
+    PaymentToken.USDC.value: 6,
+    PaymentToken.USDT.value: 6,
+    PaymentToken.TUSD.value: 18,
+    PaymentToken.RENT.value: 18,
+}
+SCALES = {pt: 10 ** decimals for pt, decimals in DECIMALS.items()}
+
+
+def as_uint(values) -> np.ndarray:
+    # bytes4 prices may come in as ints, hex strings or raw bytes
+    def to_int(v):
+        if isinstance(v, (bytes, bytearray)):
+            return int.from_bytes(v, "big")
+        if isinstance(v, str):
+            return int(v, 16)
+        return int(v)
+
+    arr = np.atleast_1d(np.asarray(values, dtype=object))
+    return np.frompyfunc(to_int, 1, 1)(arr).astype(object)
+
+
+def scale_of(decimals) -> np.ndarray:
+    return 10 ** as_uint(decimals)
+
+
+def scales_of(payment_tokens, scales: Dict[int, int] = SCALES) -> np.ndarray:
+    """scale of every payment token index, from a precomputed table"""
+    return np.frompyfunc(scales.__getitem__, 1, 1)(as_uint(payment_tokens)).astype(object)
+
+
+def is_unpackable_price(price, scale) -> np.ndarray:
+    # ensureIsUnpackablePrice
+    return ((as_uint(price) > 0) & (as_uint(scale) >= MIN_SCALE)).astype(bool)
+
+
+def unpack_price(price, scale) -> np.ndarray:
+    """token amounts of packed prices; 0 where unpackPrice would revert"""
+    price, scale = np.broadcast_arrays(as_uint(price), as_uint(scale))
+    whole = np.minimum(price >> 16, MAX_PRICE_PART)
+    decimal = np.minimum(price & 0xFFFF, MAX_PRICE_PART)
+    unpacked = whole * scale + decimal * (scale // 10000)
+    return np.where(is_unpackable_price(price, scale), unpacked, 0).astype(object)
+
+
+def pack_price(amount, scale) -> np.ndarray:
+    """
+    packed prices of token amounts, rounded down to a ten-thousandth of a
+    token. raises if a whole part does not fit in 9999
+    """
+    amount, scale = np.broadcast_arrays(as_uint(amount), as_uint(scale))
+    if (scale < MIN_SCALE).any():
+        raise ValueError(f"scale below {MIN_SCALE}")
+    whole = amount // scale
+    if (whole > MAX_PRICE_PART).any():
+        raise ValueError(f"price above {MAX_PRICE_PART} whole tokens")
+    decimal = (amount % scale) // (scale // 10000)
+    return ((whole << 16) | decimal).astype(object)
+
+
+def to_bytes4(prices) -> list:
+    return [int(price).to_bytes(4, "big") for price in as_uint(prices)]
+
+
+@dataclass
+class Quote:
+    rent: np.ndarray
+    collateral: np.ndarray
+    total: np.ndarray
+    # handleRent reverts on a zero rent or collateral
+    reverted: np.ndarray
+
+
+def quote(lendings: Sequence, rent_durations, scales: Dict[int, int] = SCALES) -> Quote:
+    """
+    what rent pulls from the renter for each (lending, rent duration) pair:
+    rent for the whole duration plus lentAmount times the nft price
+    """
+    scale = scales_of([lending.payment_token for lending in lendings], scales)
+    rent = as_uint(rent_durations) * unpack_price(
+        [lending.daily_rent_price for lending in lendings], scale
+    )
+    collateral = as_uint([lending.lent_amount for lending in lendings]) * unpack_price(
+        [lending.nft_price for lending in lendings], scale
+    )
+    reverted = ((rent == 0) | (collateral == 0)).astype(bool)
+    return Quote(
+        rent=rent,
+        collateral=collateral,
+        total=np.where(reverted, 0, rent + collateral).astype(object),
+        reverted=reverted,
+    )
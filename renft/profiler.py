@@ -0,0 +1,162 @@
+import functools
+import inspect
+import json
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class Span:
+    def __init__(self, name: str, kind: str, parent: Optional["Span"] = None):
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.children: List[Span] = []
+        self.wall = 0.0
+        self.gas: Optional[int] = None
+        # rpc method -> calls and seconds, made directly inside this span
+        self.rpc: Dict[str, int] = Counter()
+        self.rpc_time: Dict[str, float] = defaultdict(float)
+
+    @property
+    def path(self) -> List[str]:
+        span, path = self, []
+        while span.parent is not None:
+            path.append(span.name)
+            span = span.parent
+        return path[::-1]
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+    def self_time(self) -> float:
+        """
+        wall time not spent in child spans or rpc round trips. requests that
+        overlap (AsyncSender) can add up to more than the wall time
+        """
+        children = sum(child.wall for child in self.children)
+        return max(0.0, self.wall - children - sum(self.rpc_time.values()))
+
+
+class Profiler:
+    """
+    nested wall time, gas and rpc counts. spans are opened around functions
+    (wrap, instrument) or explicitly (span); install middleware on a web3
+    instance to attribute every JSON-RPC request to the innermost open span
+    """
+
+    def __init__(self):
+        self.root = Span("root", "root")
+        self.stack = [self.root]
+
+    @contextmanager
+    def span(self, name: str, kind: str):
+        span = Span(name, kind, self.stack[-1])
+        self.stack[-1].children.append(span)
+        self.stack.append(span)
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wall = time.perf_counter() - start
+            self.stack.pop()
+
+    def wrap(self, fn, name: str, kind: str):
+        """
+        fn inside a span. the wrapper is generated with fn's own parameters,
+        because brownie's state machine reads rule strategies from
+        __code__.co_varnames and __defaults__ rather than the signature
+        """
+        params = ", ".join(inspect.signature(fn).parameters)
+        source = (
+            f"def {fn.__name__}({params}):\n"
+            f"    with _span(_name, _kind):\n"
+            f"        return _fn({params})\n"
+        )
+        namespace = {"_span": self.span, "_name": name, "_kind": kind, "_fn": fn}
+        exec(source, namespace)
+        wrapper = functools.update_wrapper(namespace[fn.__name__], fn)
+        wrapper.__defaults__ = fn.__defaults__
+        return wrapper
+
+    def instrument(self, cls, prefixes=("rule_", "invariant_", "setup")):
+        """subclass of cls whose methods starting with any of prefixes are spans"""
+        wrapped = {
+            attr: self.wrap(getattr(cls, attr), attr, "rule")
+            for attr in dir(cls)
+            if attr.startswith(prefixes) and callable(getattr(cls, attr))
+        }
+        return type(cls.__name__, (cls,), wrapped)
+
+    def rpc(self, method: str, seconds: float):
+        """counts a request against the innermost open span"""
+        span = self.stack[-1]
+        span.rpc[method] += 1
+        span.rpc_time[method] += seconds
+
+    def middleware(self, make_request, web3):
+        def middleware(method, params):
+            start = time.perf_counter()
+            try:
+                return make_request(method, params)
+            finally:
+                self.rpc(method, time.perf_counter() - start)
+
+        return middleware
+
+    def records(self) -> List[dict]:
+        records = []
+        for span in self.root.walk():
+            if span is self.root:
+                continue
+            spans = list(span.walk())
+            records.append(
+                {
+                    "path": span.path,
+                    "kind": span.kind,
+                    "wall": span.wall,
+                    "gas": sum(s.gas or 0 for s in spans),
+                    "rpc": sum(sum(s.rpc.values()) for s in spans),
+                    "rpc_time": sum(sum(s.rpc_time.values()) for s in spans),
+                    "rpc_methods": dict(sum((Counter(s.rpc) for s in spans), Counter())),
+                }
+            )
+        return records
+
+    def summary(self) -> Dict[str, dict]:
+        """totals per span name"""
+        summary = defaultdict(
+            lambda: {"count": 0, "wall": 0.0, "gas": 0, "rpc": 0, "rpc_time": 0.0}
+        )
+        for record in self.records():
+            totals = summary[record["path"][-1]]
+            totals["count"] += 1
+            totals["wall"] += record["wall"]
+            totals["gas"] += record["gas"]
+            totals["rpc"] += record["rpc"]
+            totals["rpc_time"] += record["rpc_time"]
+        return dict(summary)
+
+    def folded(self) -> List[str]:
+        """collapsed stacks in microseconds of self time, for flamegraph.pl or speedscope"""
+        stacks = Counter()
+        for span in self.root.walk():
+            if span is self.root:
+                continue
+            path = ";".join(span.path)
+            stacks[path] += round(span.self_time() * 1e6)
+            for method, seconds in span.rpc_time.items():
+                stacks[f"{path};rpc:{method}"] += round(seconds * 1e6)
+        return [f"{stack} {us}" for stack, us in stacks.items() if us > 0]
+
+    def write(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "spans.json").write_text(
+            json.dumps({"summary": self.summary(), "spans": self.records()}, indent=2)
+        )
+        (directory / "stacks.folded").write_text("\n".join(self.folded()) + "\n")
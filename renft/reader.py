@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from eth_abi import decode_abi, encode_abi
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from renft.lending import LendingRenting, unpack_lending, unpack_renting
+from renft.rpc import batch_request
+
+GET_LENDING_RENTING = function_signature_to_4byte_selector(
+    "getLendingRenting(address[],uint256[],uint256[])"
+)
+
+
+class LendingRentingReader:
+    """
+    bulk reads of ReNFT.lendingRenting through getLendingRenting. keys are
+    (nft, token id, lending id); they are split into calls of at most
+    chunk_size keys, which keeps each eth_call under the node's gas and
+    response limits, and the calls run on max_workers threads. every call
+    reads the same block, so a refresh is a consistent snapshot
+    """
+
+    def __init__(self, endpoint: str, address, chunk_size: int = 500, max_workers: int = 8):
+        self.endpoint = endpoint
+        self.address = to_checksum_address(str(address))
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+
+    def read(self, keys: Sequence[Tuple], block="latest") -> List[Optional[LendingRenting]]:
+        """LendingRenting per key in the order given, None for unknown keys"""
+        if not keys:
+            return []
+        if not isinstance(block, int):
+            (head,) = batch_request(self.endpoint, [("eth_getBlockByNumber", [block, False])])
+            block = int(head["number"], 16)
+        chunks = [keys[i : i + self.chunk_size] for i in range(0, len(keys), self.chunk_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = pool.map(lambda chunk: self._read_chunk(chunk, block), chunks)
+            return [item for chunk in results for item in chunk]
+
+    def _read_chunk(self, keys, block: int) -> List[Optional[LendingRenting]]:
+        nfts = [to_checksum_address(str(nft)) for nft, _, _ in keys]
+        token_ids = [int(token_id) for _, token_id, _ in keys]
+        lending_ids = [int(lending_id) for _, _, lending_id in keys]
+        data = GET_LENDING_RENTING + encode_abi(
+            ["address[]", "uint256[]", "uint256[]"], [nfts, token_ids, lending_ids]
+        )
+        (result,) = batch_request(
+            self.endpoint,
+            [("eth_call", [{"to": self.address, "data": "0x" + data.hex()}, hex(block)])],
+        )
+        lendings, rentings = decode_abi(["uint256[]", "uint256[]"], bytes.fromhex(result[2:]))
+
+        items = []
+        for nft, token_id, lending_id, lending_word, renting_word in zip(
+            nfts, token_ids, lending_ids, lendings, rentings
+        ):
+            lending = unpack_lending(lending_word, nft, token_id, lending_id)
+            if lending is None:
+                items.append(None)
+            else:
+                items.append(LendingRenting(lending, unpack_renting(renting_word, lending)))
+        return items
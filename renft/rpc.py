@@ -0,0 +1,38 @@
+from typing import List, Sequence, Tuple
+
+import requests
+
+
+class RPCError(Exception):
+    pass
+
+
+def batch_request(endpoint: str, calls: Sequence[Tuple[str, list]], timeout: float = 30) -> List:
+    """
+    sends (method, params) pairs as one JSON-RPC batch and returns the
+    results in the order of calls
+    """
+    if not calls:
+        return []
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    response = requests.post(endpoint, json=payload, timeout=timeout)
+    response.raise_for_status()
+    # servers may answer a batch in any order
+    results = sorted(response.json(), key=lambda result: result["id"])
+    errors = [result["error"] for result in results if "error" in result]
+    if errors:
+        raise RPCError(errors[0])
+    return [result["result"] for result in results]
+
+
+def batch_call(endpoint: str, calls: Sequence[Tuple[str, bytes]], block="latest") -> List[bytes]:
+    """eth_call of every (to, data) pair at one block, in one request"""
+    block = hex(block) if isinstance(block, int) else block
+    results = batch_request(
+        endpoint,
+        [("eth_call", [{"to": to, "data": "0x" + data.hex()}, block]) for to, data in calls],
+    )
+    return [bytes.fromhex(result[2:]) for result in results]
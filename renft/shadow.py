@@ -0,0 +1,225 @@
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+from eth_abi import decode_single, encode_single
+from eth_utils import function_signature_to_4byte_selector, to_checksum_address
+
+from renft import model
+from renft.lending import NFTStandard
+from renft.rpc import batch_call
+
+ERC20_BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address)")
+ERC721_OWNER_OF = function_signature_to_4byte_selector("ownerOf(uint256)")
+ERC1155_BALANCE_OF = function_signature_to_4byte_selector("balanceOf(address,uint256)")
+ERC20_ALLOWANCE = function_signature_to_4byte_selector("allowance(address,address)")
+IS_APPROVED_FOR_ALL = function_signature_to_4byte_selector("isApprovedForAll(address,address)")
+
+
+def _address(address) -> str:
+    return to_checksum_address(str(address))
+
+
+class Holdings:
+    """
+    expected token balances and approvals. every entry maps to one view
+    call, so the whole set is checked against the chain with a single
+    batched request
+    """
+
+    def __init__(self):
+        # (token, holder) -> amount
+        self.erc20 = defaultdict(int)
+        # (nft, token id) -> owner
+        self.erc721 = {}
+        # (nft, token id, holder) -> amount
+        self.erc1155 = defaultdict(int)
+        # (token, owner, spender) -> amount
+        self.allowances = defaultdict(int)
+        # (nft, owner, operator) -> approved
+        self.approvals = {}
+
+    def approve(self, token, owner, spender, amount):
+        self.allowances[(_address(token), _address(owner), _address(spender))] = amount
+
+    def spend(self, token, owner, spender, amount):
+        self.allowances[(_address(token), _address(owner), _address(spender))] -= amount
+
+    def allowance(self, token, owner, spender) -> int:
+        return self.allowances.get((_address(token), _address(owner), _address(spender)), 0)
+
+    def balance(self, token, holder) -> int:
+        return self.erc20.get((_address(token), _address(holder)), 0)
+
+    def set_approval_for_all(self, nft, owner, operator, approved=True):
+        self.approvals[(_address(nft), _address(owner), _address(operator))] = approved
+
+    def is_approved_for_all(self, nft, owner, operator) -> bool:
+        return self.approvals.get((_address(nft), _address(owner), _address(operator)), False)
+
+    def transfer_erc20(self, token, src, dst, amount):
+        if src is not None:
+            self.erc20[(_address(token), _address(src))] -= amount
+        if dst is not None:
+            self.erc20[(_address(token), _address(dst))] += amount
+
+    def transfer_nft(self, nft, nft_standard, token_id, src, dst, amount=1):
+        nft, token_id = _address(nft), int(token_id)
+        if nft_standard == NFTStandard.E721.value:
+            self.erc721[(nft, token_id)] = _address(dst)
+            return
+        if src is not None:
+            self.erc1155[(nft, token_id, _address(src))] -= amount
+        self.erc1155[(nft, token_id, _address(dst))] += amount
+
+    def diff(self, endpoint) -> List[str]:
+        """one line per entry that differs from the chain"""
+        expected, calls = [], []
+        for (token, holder), amount in self.erc20.items():
+            expected.append((f"{token}.balanceOf({holder})", amount))
+            calls.append((token, ERC20_BALANCE_OF + encode_single("address", holder)))
+        for (nft, token_id), owner in self.erc721.items():
+            expected.append((f"{nft}.ownerOf({token_id})", owner))
+            calls.append((nft, ERC721_OWNER_OF + encode_single("uint256", token_id)))
+        for (nft, token_id, holder), amount in self.erc1155.items():
+            expected.append((f"{nft}.balanceOf({holder}, {token_id})", amount))
+            calls.append(
+                (
+                    nft,
+                    ERC1155_BALANCE_OF + encode_single("(address,uint256)", (holder, token_id)),
+                )
+            )
+        for (token, owner, spender), amount in self.allowances.items():
+            expected.append((f"{token}.allowance({owner}, {spender})", amount))
+            calls.append(
+                (token, ERC20_ALLOWANCE + encode_single("(address,address)", (owner, spender)))
+            )
+        for (nft, owner, operator), approved in self.approvals.items():
+            expected.append((f"{nft}.isApprovedForAll({owner}, {operator})", approved))
+            calls.append(
+                (nft, IS_APPROVED_FOR_ALL + encode_single("(address,address)", (owner, operator)))
+            )
+
+        mismatches = []
+        for (label, want), data in zip(expected, batch_call(endpoint, calls)):
+            if isinstance(want, str):
+                got = _address(decode_single("address", data))
+            elif isinstance(want, bool):
+                got = decode_single("bool", data)
+            else:
+                got = decode_single("uint256", data)
+            if got != want:
+                mismatches.append(f"{label}: model {want}, chain {got}")
+        return mismatches
+
+
+class ShadowReNFT:
+    """
+    in-process ReNFT that moves tokens in its Holdings the way the contract
+    would, for calls that went through on chain. payouts come from
+    renft.model; payment_tokens maps the payment token index to
+    (token address, decimals)
+    """
+
+    def __init__(
+        self,
+        address,
+        beneficiary,
+        payment_tokens: Dict[int, Tuple[str, int]],
+        rent_fee: int = 0,
+    ):
+        self.address = _address(address)
+        self.beneficiary = _address(beneficiary)
+        self.payment_tokens = payment_tokens
+        self.rent_fee = rent_fee
+        self.holdings = Holdings()
+        # lending id -> lending, and renting with its rentedAt once rented
+        self.lendings = {}
+        self.rentings = {}
+        # the contract and beneficiary are checked even before they hold anything
+        for token, _ in payment_tokens.values():
+            self.holdings.transfer_erc20(token, None, self.address, 0)
+            self.holdings.transfer_erc20(token, None, self.beneficiary, 0)
+
+    def mint_erc20(self, token, holder, amount):
+        self.holdings.transfer_erc20(token, None, holder, amount)
+
+    def mint_nft(self, nft, nft_standard, token_id, holder, amount=1):
+        self.holdings.transfer_nft(nft, nft_standard, token_id, None, holder, amount)
+
+    def lend(self, lendings: Sequence):
+        for lending in lendings:
+            self.lendings[lending.lending_id] = lending
+            self._move_nft(lending, lending.lender_address, self.address)
+
+    def stop_lending(self, lendings: Sequence):
+        for lending in lendings:
+            del self.lendings[lending.lending_id]
+            self._move_nft(lending, self.address, lending.lender_address)
+
+    def rent(self, rentings: Sequence, rented_at: int):
+        lendings = [self.lendings[renting.lending_id] for renting in rentings]
+        amounts, _ = model.rent_payment(
+            [lending.lent_amount for lending in lendings],
+            [lending.daily_rent_price for lending in lendings],
+            [lending.nft_price for lending in lendings],
+            [renting.rent_duration for renting in rentings],
+            self._decimals(lendings),
+        )
+        for lending, renting, amount in zip(lendings, rentings, amounts):
+            self.rentings[lending.lending_id] = (renting, rented_at)
+            token = self._token(lending)
+            self.holdings.transfer_erc20(token, renting.renter_address, self.address, amount)
+            self.holdings.spend(token, renting.renter_address, self.address, amount)
+            self._move_nft(lending, self.address, renting.renter_address)
+
+    def return_it(self, rentings: Sequence, now: int):
+        lendings = [self.lendings[renting.lending_id] for renting in rentings]
+        rented = [self.rentings.pop(lending.lending_id) for lending in lendings]
+        payout = model.distribute_payments(
+            [lending.lent_amount for lending in lendings],
+            [lending.daily_rent_price for lending in lendings],
+            [lending.nft_price for lending in lendings],
+            [renting.rent_duration for renting, _ in rented],
+            [now - rented_at for _, rented_at in rented],
+            self._decimals(lendings),
+            self.rent_fee,
+        )
+        for i, (lending, (renting, _)) in enumerate(zip(lendings, rented)):
+            self._pay(lending, payout.beneficiary[i], payout.lender[i])
+            self.holdings.transfer_erc20(
+                self._token(lending), self.address, renting.renter_address, payout.renter[i]
+            )
+            self._move_nft(lending, renting.renter_address, self.address)
+
+    def claim_collateral(self, rentings: Sequence):
+        lendings = [self.lendings.pop(renting.lending_id) for renting in rentings]
+        rented = [self.rentings.pop(lending.lending_id) for lending in lendings]
+        payout = model.distribute_claim_payment(
+            [lending.lent_amount for lending in lendings],
+            [lending.daily_rent_price for lending in lendings],
+            [lending.nft_price for lending in lendings],
+            [renting.rent_duration for renting, _ in rented],
+            self._decimals(lendings),
+            self.rent_fee,
+        )
+        for i, lending in enumerate(lendings):
+            self._pay(lending, payout.beneficiary[i], payout.lender[i])
+
+    def diff(self, endpoint) -> List[str]:
+        return self.holdings.diff(endpoint)
+
+    def _pay(self, lending, fee, lender_amount):
+        token = self._token(lending)
+        self.holdings.transfer_erc20(token, self.address, self.beneficiary, fee)
+        self.holdings.transfer_erc20(token, self.address, lending.lender_address, lender_amount)
+
+    def _move_nft(self, lending, src, dst):
+        self.holdings.transfer_nft(
+            lending.nft, lending.nft_standard, lending.token_id, src, dst, lending.lent_amount
+        )
+
+    def _token(self, lending) -> str:
+        return self.payment_tokens[lending.payment_token][0]
+
+    def _decimals(self, lendings) -> List[int]:
+        return [self.payment_tokens[lending.payment_token][1] for lending in lendings]
@@ -0,0 +1,136 @@
+"""
+lendingRenting read straight from ReNFT's storage with eth_getStorageAt.
+Unlike getLendingRenting (renft.reader) it needs no view function on the
+deployed contract and does not depend on the event history being complete.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from eth_utils import keccak, to_checksum_address
+
+from renft.lending import LendingRenting, lending_key, unpack_lending, unpack_renting
+from renft.rpc import batch_request
+
+# resolver, admin, beneficiary, lendingId, paused and rentFee come first; the
+# base contracts declare no storage
+LENDING_RENTING_SLOT = 6
+
+# the Lending word then the Renting word, big endian, so a packed field at
+# bit b of width w is bytes 32 - (b + w) / 8 to 32 - b / 8 of its word
+LAYOUT = np.dtype(
+    {
+        "names": [
+            "payment_token",
+            "lent_amount",
+            "nft_price",
+            "daily_rent_price",
+            "max_rent_duration",
+            "lender_address",
+            "nft_standard",
+            "rented_at",
+            "rent_duration",
+            "renter_address",
+        ],
+        "formats": ["u1", "u1", ">u4", ">u4", "u1", "V20", "u1", ">u4", "u1", "V20"],
+        "offsets": [0, 1, 2, 6, 10, 11, 31, 32 + 7, 32 + 11, 32 + 12],
+        "itemsize": 64,
+    }
+)
+
+
+def lending_renting_slot(nft, token_id, lending_id, slot: int = LENDING_RENTING_SLOT) -> int:
+    """storage slot of lendingRenting[key].lending; .renting is the next one"""
+    return int.from_bytes(
+        keccak(lending_key(nft, token_id, lending_id) + slot.to_bytes(32, "big")), "big"
+    )
+
+
+class LendingRentings:
+    """
+    the two slots of every key as one (n, 64) uint8 array, 64 bytes a
+    lending whatever the number of keys. fields views it as numpy columns
+    of the packed fields; indexing decodes one key into renft.lending
+    dataclasses, None for unknown keys
+    """
+
+    __slots__ = ("keys", "words")
+
+    def __init__(self, keys: Sequence[Tuple], words: np.ndarray):
+        self.keys = keys
+        self.words = words
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __getitem__(self, i) -> Optional[LendingRenting]:
+        nft, token_id, lending_id = self.keys[i]
+        lending = unpack_lending(
+            int.from_bytes(self.words[i, :32].tobytes(), "big"),
+            to_checksum_address(str(nft)),
+            int(token_id),
+            int(lending_id),
+        )
+        if lending is None:
+            return None
+        renting = unpack_renting(int.from_bytes(self.words[i, 32:].tobytes(), "big"), lending)
+        return LendingRenting(lending, renting)
+
+    @property
+    def fields(self) -> np.ndarray:
+        return self.words.view(LAYOUT).ravel()
+
+    @property
+    def exists(self) -> np.ndarray:
+        return self.words[:, :32].any(axis=1)
+
+    @property
+    def rented(self) -> np.ndarray:
+        return self.words[:, 32:].any(axis=1)
+
+
+class StorageReader:
+    """
+    bulk reads of lendingRenting with batched eth_getStorageAt, two slots per
+    key. keys are (nft, token id, lending id), chunk_size of them per batch
+    request on max_workers threads, every request at the same block
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        address,
+        slot: int = LENDING_RENTING_SLOT,
+        chunk_size: int = 500,
+        max_workers: int = 8,
+    ):
+        self.endpoint = endpoint
+        self.address = to_checksum_address(str(address))
+        self.slot = slot
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+
+    def read(self, keys: Sequence[Tuple], block="latest") -> LendingRentings:
+        words = np.zeros((len(keys), 64), dtype=np.uint8)
+        if not keys:
+            return LendingRentings(keys, words)
+        if not isinstance(block, int):
+            (head,) = batch_request(self.endpoint, [("eth_getBlockByNumber", [block, False])])
+            block = int(head["number"], 16)
+        starts = range(0, len(keys), self.chunk_size)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # each chunk fills its own rows of words
+            list(pool.map(lambda start: self._read_chunk(keys, words, start, block), starts))
+        return LendingRentings(keys, words)
+
+    def _read_chunk(self, keys, words: np.ndarray, start: int, block: int):
+        end = min(start + self.chunk_size, len(keys))
+        calls = []
+        for nft, token_id, lending_id in keys[start:end]:
+            slot = lending_renting_slot(nft, token_id, lending_id, self.slot)
+            for offset in (0, 1):
+                calls.append(("eth_getStorageAt", [self.address, hex(slot + offset), hex(block)]))
+        values = batch_request(self.endpoint, calls)
+        # nodes may drop leading zeros
+        raw = bytes.fromhex("".join(value[2:].rjust(64, "0") for value in values))
+        words[start:end] = np.frombuffer(raw, dtype=np.uint8).reshape(end - start, 64)
@@ -0,0 +1,203 @@
+"""
+Transaction traces of stateful test runs. A Recorder sees every JSON-RPC
+request the harness makes and keeps, for the current run, the transactions it
+sent and the chain time it skipped. The trace of a failing run replays on a
+copy of the same world as plain eth_sendTransaction requests, without
+hypothesis, brownie or the shadow model.
+"""
+import gzip
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import requests
+
+from renft.rpc import batch_request
+
+VERSION = 1
+# what a replay sends of a transaction; the node assigns nonces again
+TX_FIELDS = ("from", "to", "data", "value", "gas")
+
+
+def sent_hash(response: dict) -> Optional[str]:
+    """
+    hash of the transaction an eth_sendTransaction response is for. ganache
+    mines reverted transactions but answers with an error keyed by their hash
+    """
+    if "result" in response:
+        return response["result"]
+    data = response.get("error", {}).get("data")
+    if isinstance(data, dict):
+        return next((key for key in data if key.startswith("0x")), None)
+    return None
+
+
+def _int(value) -> int:
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def build_steps(steps: List[list], receipts: Dict[str, dict], timestamps: Dict[int, int]) -> List[list]:
+    """
+    recorded steps as trace steps, ["tx", tx, seconds since the first
+    transaction, status], ["sleep", seconds] or ["mine"]. transactions sent
+    together (AsyncSender) are mined in whatever order the node received
+    them, so each run of consecutive transactions is put in chain order
+    """
+    trace, pending = [], []
+    start = None
+
+    def flush():
+        nonlocal start
+        pending.sort(
+            key=lambda step: (
+                _int(receipts[step[2]]["blockNumber"]),
+                _int(receipts[step[2]]["transactionIndex"]),
+            )
+        )
+        for _, tx, tx_hash in pending:
+            receipt = receipts[tx_hash]
+            timestamp = timestamps[_int(receipt["blockNumber"])]
+            start = timestamp if start is None else start
+            trace.append(["tx", tx, timestamp - start, _int(receipt["status"])])
+        pending.clear()
+
+    for step in steps:
+        if step[0] == "tx":
+            pending.append(step)
+        else:
+            flush()
+            trace.append(step)
+    flush()
+    return trace
+
+
+class Recorder:
+    """
+    the steps of the current run. install wraps a provider's make_request so
+    that brownie's own evm_* requests are seen too; transactions sent around
+    web3 are passed to sent. a revert to a snapshot starts a new run, which is
+    how brownie's state machine starts every example
+    """
+
+    def __init__(self, world: Optional[dict] = None):
+        self.world = world
+        self.steps: List[list] = []
+
+    def install(self, provider):
+        make_request = provider.make_request
+
+        def recorded(method, params):
+            response = make_request(method, params)
+            self.request(method, params, response)
+            return response
+
+        provider.make_request = recorded
+
+    @staticmethod
+    def uninstall(provider):
+        del provider.make_request
+
+    def request(self, method: str, params: list, response: dict):
+        if method == "evm_revert":
+            self.steps = []
+        elif method == "eth_sendTransaction":
+            tx_hash = sent_hash(response)
+            if tx_hash is not None:
+                self.sent(params[0], tx_hash)
+        elif method == "evm_increaseTime":
+            self.steps.append(["sleep", _int(params[0])])
+        elif method == "evm_mine":
+            self.steps.append(["mine"])
+
+    def sent(self, tx: dict, tx_hash: str):
+        self.steps.append(["tx", {field: tx[field] for field in TX_FIELDS if field in tx}, tx_hash])
+
+    def trace(self, endpoint: str, test: str = "") -> dict:
+        """the current run with the outcome of every transaction, read back from the node"""
+        hashes = [step[2] for step in self.steps if step[0] == "tx"]
+        receipts = dict(
+            zip(hashes, batch_request(endpoint, [("eth_getTransactionReceipt", [h]) for h in hashes]))
+        )
+        blocks = sorted({_int(receipt["blockNumber"]) for receipt in receipts.values()})
+        timestamps = {
+            number: _int(block["timestamp"])
+            for number, block in zip(
+                blocks,
+                batch_request(endpoint, [("eth_getBlockByNumber", [hex(n), False]) for n in blocks]),
+            )
+        }
+        return {
+            "version": VERSION,
+            "test": test,
+            "world": self.world,
+            "steps": build_steps(self.steps, receipts, timestamps),
+        }
+
+
+def save(path, trace: dict):
+    """gzipped JSON lines: the header, then one step per line"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {key: value for key, value in trace.items() if key != "steps"}
+    with gzip.open(path, "wt") as f:
+        f.write(json.dumps(header, separators=(",", ":")) + "\n")
+        for step in trace["steps"]:
+            f.write(json.dumps(step, separators=(",", ":")) + "\n")
+
+
+def load(path) -> dict:
+    with gzip.open(path, "rt") as f:
+        trace = json.loads(f.readline())
+        trace["steps"] = [json.loads(line) for line in f]
+    if trace["version"] != VERSION:
+        raise ValueError(f"{path}: trace version {trace['version']}, expected {VERSION}")
+    return trace
+
+
+def replay(endpoint: str, trace: dict, timeout: float = 30) -> List[str]:
+    """
+    sends the steps of a trace in order, moving chain time forward so that
+    every transaction is mined as many seconds after the first as it was when
+    recorded, and returns where the outcome differs from the recording
+    """
+    session = requests.Session()
+    ids = itertools.count()
+
+    def request(method, params):
+        payload = {"jsonrpc": "2.0", "id": next(ids), "method": method, "params": params}
+        response = session.post(endpoint, json=payload, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    # ganache answers evm_increaseTime with its total time adjustment
+    offset = _int(request("evm_increaseTime", [0])["result"])
+    start = None
+    sent = []
+    for i, step in enumerate(trace["steps"]):
+        if step[0] == "sleep":
+            offset = _int(request("evm_increaseTime", [step[1]])["result"])
+        elif step[0] == "mine":
+            request("evm_mine", [])
+        else:
+            _, tx, at, status = step
+            now = int(time.time()) + offset
+            start = now - at if start is None else start
+            if start + at > now:
+                offset = _int(request("evm_increaseTime", [start + at - now])["result"])
+            response = request("eth_sendTransaction", [tx])
+            sent.append((i, sent_hash(response), status, response.get("error")))
+
+    hashes = [tx_hash for _, tx_hash, _, _ in sent if tx_hash is not None]
+    receipts = dict(
+        zip(hashes, batch_request(endpoint, [("eth_getTransactionReceipt", [h]) for h in hashes]))
+    )
+    divergences = []
+    for i, tx_hash, status, error in sent:
+        if tx_hash is None:
+            divergences.append(f"step {i}: rejected: {error}")
+        elif _int(receipts[tx_hash]["status"]) != status:
+            replayed = _int(receipts[tx_hash]["status"])
+            divergences.append(f"step {i}: {tx_hash} status {status} -> {replayed}")
+    return divergences
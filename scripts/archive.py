@@ -0,0 +1,21 @@
+from brownie import ReNFT, chain, web3
+
+from renft.indexer import Archive, export, nft_report
+
+ARCHIVE_DIR = "build/archive"
+
+
+def main(directory=ARCHIVE_DIR, confirmations=64):
+    renft = ReNFT[-1]
+    start_block = renft.tx.block_number if renft.tx is not None else 0
+    archive = Archive(directory)
+    exported = export(web3, renft.address, archive, start_block, int(confirmations))
+    print(f"{exported} new events, {len(archive)} archived up to block {archive.to_block}")
+
+    report = nft_report(archive, now=chain.time(), rent_fee=renft.rentFee())
+    for i in range(len(report["nft"])):
+        print(
+            f"{report['nft'][i]} #{report['token_id'][i]} token {report['payment_token'][i]}: "
+            f"{report['rentals'][i]} rentals, {report['utilization'][i]:.1%} utilized, "
+            f"rent {report['rent'][i]}, fees {report['fees'][i]}"
+        )
@@ -0,0 +1,239 @@
+import json
+import subprocess
+from pathlib import Path
+
+import brownie
+from brownie import accounts, chain, project
+
+from renft.lending import (
+    NFTStandard,
+    PaymentToken,
+    Lending,
+    Renting,
+    lendings_to_lend_args,
+    lendings_to_stop_lending_args,
+    rentings_to_rent_args,
+    rentings_to_return_args,
+)
+
+BASELINE = Path("benchmarks/gas.json")
+LATEST = Path("benchmarks/gas.latest.json")
+# checkouts of the contracts a baseline was measured from
+WORKTREES = Path("build/benchmark")
+
+# 10 and 50 show the per-item cost of batching well past the 1-8 range
+BATCH_SIZES = (1, 2, 3, 4, 5, 6, 7, 8, 10, 50)
+SECONDS_IN_DAY = 86400
+OPS = ("lend", "rent", "returnIt", "stopLending", "claimCollateral")
+
+# how the items of a batch are spread over nft contracts. bundleCall only
+# merges adjacent E1155 items of the same contract, so contiguous and
+# interleaved batches of the same two contracts cost differently
+LAYOUTS = {
+    "721": lambda i, n, nfts: (NFTStandard.E721, nfts["e721"][i % 2]),
+    "1155": lambda i, n, nfts: (NFTStandard.E1155, nfts["e1155"][0]),
+    "1155_contiguous": lambda i, n, nfts: (
+        NFTStandard.E1155,
+        nfts["e1155"][0 if i < (n + 1) // 2 else 1],
+    ),
+    "1155_interleaved": lambda i, n, nfts: (NFTStandard.E1155, nfts["e1155"][i % 2]),
+    "mixed": lambda i, n, nfts: (
+        (NFTStandard.E721, nfts["e721"][0])
+        if i % 2 == 0
+        else (NFTStandard.E1155, nfts["e1155"][0])
+    ),
+    "721_lenders": lambda i, n, nfts: (NFTStandard.E721, nfts["e721"][i % 2]),
+}
+# layouts whose every item has a lender of its own, so no payout is netted:
+# the worst case for the payments returnIt and claimCollateral allocate.
+# lend and stopLending take one transaction per lender there
+ONE_LENDER_PER_ITEM = {"721_lenders"}
+
+
+class World:
+    def __init__(self, contracts=brownie, lenders=max(BATCH_SIZES)):
+        # contracts: the project to deploy from, by default the checked out one
+        self.deployer = accounts[0]
+        self.beneficiary = accounts[1]
+        self.lender = accounts[2]
+        self.renter = accounts[3]
+        from_deployer = {"from": self.deployer}
+
+        self.dai = contracts.DAI.deploy(from_deployer)
+        self.resolver = contracts.Resolver.deploy(self.deployer, from_deployer)
+        self.resolver.setPaymentToken(PaymentToken.DAI.value, self.dai, from_deployer)
+        self.renft = contracts.ReNFT.deploy(
+            self.resolver, self.beneficiary, self.deployer, from_deployer
+        )
+        self.nfts = {
+            "e721": [contracts.E721.deploy(from_deployer) for _ in range(2)],
+            "e1155": [contracts.E1155.deploy(from_deployer) for _ in range(2)],
+        }
+        # for ONE_LENDER_PER_ITEM, created here so a chain.revert keeps them
+        self.lenders = [accounts.add() for _ in range(lenders)]
+        for lender in self.lenders:
+            self.deployer.transfer(lender, "1 ether")
+        for nft in self.nfts["e721"] + self.nfts["e1155"]:
+            for lender in [self.lender] + self.lenders:
+                nft.setApprovalForAll(self.renft, True, {"from": lender})
+        self.dai.faucet({"from": self.renter})
+        self.dai.approve(self.renft, 2 ** 256 - 1, {"from": self.renter})
+
+    def mint_lendings(self, layout, n):
+        lendings = []
+        for i in range(n):
+            nft_standard, nft = LAYOUTS[layout](i, n, self.nfts)
+            lender = self.lenders[i] if layout in ONE_LENDER_PER_ITEM else self.lender
+            txn = nft.faucet({"from": lender})
+            if nft_standard == NFTStandard.E721:
+                token_id = txn.events["Transfer"]["tokenId"]
+            else:
+                token_id = txn.events["TransferSingle"]["id"]
+            lendings.append(
+                Lending(
+                    lender_address=lender,
+                    nft_standard=nft_standard.value,
+                    lent_amount=1,
+                    max_rent_duration=1,
+                    daily_rent_price=1,
+                    nft_price=3,
+                    payment_token=PaymentToken.DAI.value,
+                    nft=nft.address,
+                    token_id=token_id,
+                    lending_id=0,
+                )
+            )
+        return lendings
+
+    def by_lender(self, lendings):
+        lenders = {}
+        for lending in lendings:
+            lenders.setdefault(lending.lender_address.address, []).append(lending)
+        return lenders.values()
+
+    def lend(self, lendings):
+        """the gas used lending, in one transaction per lender"""
+        gas_used = 0
+        for lent in self.by_lender(lendings):
+            txn = self.renft.lend(
+                *lendings_to_lend_args(lent), {"from": lent[0].lender_address}
+            )
+            for lending, event in zip(lent, txn.events["Lent"]):
+                lending.lending_id = event["lendingId"]
+            gas_used += txn.gas_used
+        return gas_used
+
+    def stop_lending(self, lendings):
+        return sum(
+            self.renft.stopLending(
+                *lendings_to_stop_lending_args(lent), {"from": lent[0].lender_address}
+            ).gas_used
+            for lent in self.by_lender(lendings)
+        )
+
+    def rent(self, lendings):
+        rentings = [
+            Renting(
+                renter_address=self.renter,
+                rent_duration=1,
+                rented_at=0,
+                nft_standard=lending.nft_standard,
+                nft=lending.nft,
+                token_id=lending.token_id,
+                lending_id=lending.lending_id,
+            )
+            for lending in lendings
+        ]
+        txn = self.renft.rent(*rentings_to_rent_args(rentings), {"from": self.renter})
+        return rentings, txn
+
+
+def measure(world, layout, n):
+    gas = {}
+
+    lendings = world.mint_lendings(layout, n)
+    gas["lend"] = world.lend(lendings)
+    rentings, txn = world.rent(lendings)
+    gas["rent"] = txn.gas_used
+    chain.sleep(SECONDS_IN_DAY // 24)
+    gas["returnIt"] = world.renft.returnIt(
+        *rentings_to_return_args(rentings), {"from": world.renter}
+    ).gas_used
+    gas["stopLending"] = world.stop_lending(lendings)
+
+    lendings = world.mint_lendings(layout, n)
+    world.lend(lendings)
+    rentings, _ = world.rent(lendings)
+    chain.sleep(2 * SECONDS_IN_DAY)
+    # anyone may claim, whoever lent the items
+    gas["claimCollateral"] = world.renft.claimCollateral(
+        *rentings_to_return_args(rentings), {"from": world.lender}
+    ).gas_used
+
+    return gas
+
+
+def run(sizes=BATCH_SIZES, contracts=brownie):
+    world = World(contracts, lenders=max(sizes))
+    chain.snapshot()
+    results = {op: {layout: {} for layout in LAYOUTS} for op in OPS}
+    for layout in LAYOUTS:
+        for n in sizes:
+            for op, gas_used in measure(world, layout, n).items():
+                results[op][layout][str(n)] = gas_used
+            chain.revert()
+    return results
+
+
+def diff(baseline, results):
+    print(
+        f"{'op':<16}{'layout':<18}{'n':>3}{'baseline':>11}{'gas':>11}{'delta':>9}"
+        f"{'per item':>10}{'was':>10}"
+    )
+    for op, layouts in results.items():
+        for layout, batches in layouts.items():
+            for n, gas_used in batches.items():
+                before = baseline.get(op, {}).get(layout, {}).get(n)
+                delta = "" if before is None else f"{gas_used - before:+d}"
+                was = "" if before is None else before // int(n)
+                print(
+                    f"{op:<16}{layout:<18}{n:>3}{before or '':>11}{gas_used:>11}"
+                    f"{delta:>9}{gas_used // int(n):>10}{was:>10}"
+                )
+
+
+def write(path, results):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+
+
+def main(*sizes):
+    """`brownie run benchmark main 1 10 50` measures only those batch sizes"""
+    results = run([int(n) for n in sizes] or BATCH_SIZES)
+    if not BASELINE.exists():
+        print(f"no {BASELINE}: run `brownie run benchmark baseline <git ref>` first")
+    baseline = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    diff(baseline, results)
+    write(LATEST, results)
+
+
+def update():
+    """the checked out contracts become the baseline"""
+    write(BASELINE, run())
+
+
+def baseline(ref):
+    """
+    measures the contracts as of git ref, e.g. the commit before a contract
+    change, and writes them as the baseline. they are checked out into a
+    worktree and compiled as a project of their own, so the scripts and
+    helpers measuring them are the current ones
+    """
+    worktree = WORKTREES / ref
+    if not worktree.exists():
+        subprocess.run(["git", "worktree", "add", "--detach", str(worktree), ref], check=True)
+    contracts = project.load(worktree, name="BenchmarkBaseline")
+    try:
+        write(BASELINE, run(contracts=contracts))
+    finally:
+        contracts.close()
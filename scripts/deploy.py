@@ -1,12 +1,110 @@
-from brownie import Resolver, ReNFT, accounts
-from brownie.network.gas.strategies import GasNowStrategy
+from brownie import DAI, TUSD, USDC, WETH, ReNFT, Resolver, accounts, network, web3
 
+from renft.gas import FeeHistoryEstimator
+from renft.lending import PaymentToken
 
-def main():
+BENEFICIARY = "0x28f11c3D76169361D22D8aE53551827Ac03360B0"
+GWEI = 10 ** 9
+
+# the setPaymentToken calls go out before the resolver is mined, so their gas
+# cannot be estimated. a first write to one slot costs ~45k, and reading the
+# token's decimals another ~5k
+SET_PAYMENT_TOKEN_GAS = 70_000
+
+PAYMENT_TOKENS = {
+    "polygon-main": {
+        PaymentToken.WETH: "0x7ceB23fD6bC0adD59E62ac25578270cFf1b9f619",
+        PaymentToken.DAI: "0x8f3Cf7ad23Cd3CaDbD9735AFf958023239c6A063",
+        PaymentToken.USDC: "0x2791Bca1f2de4661ED88A30C99A7a9449Aa84174",
+        PaymentToken.USDT: "0xc2132D05D31c914a87C6611C10748AEb04B58e8F",
+    },
+}
+# polygon validators drop transactions tipping less than this
+MIN_PRIORITY_FEE = {"polygon-main": 30 * GWEI}
+# deployed in the same pass on networks without real tokens
+MOCK_TOKENS = {
+    PaymentToken.WETH: WETH,
+    PaymentToken.DAI: DAI,
+    PaymentToken.USDC: USDC,
+    PaymentToken.TUSD: TUSD,
+}
+
+
+class Pipeline:
+    """
+    sends transactions from one account back to back with locally assigned
+    nonces, without waiting for receipts. deployment addresses follow from
+    the nonce, so later transactions can target contracts still in the pool
+    """
+
+    def __init__(self, account, fees):
+        self.account = account
+        self.fees = fees
+        self.nonce = web3.eth.get_transaction_count(account.address, "pending")
+        self.txs = []
+
+    def deploy(self, container, *args) -> str:
+        address = self.account.get_deployment_address(self.nonce)
+        self.txs.append(container.deploy(*args, {"from": self.account, **self._params()}))
+        return address
+
+    def call(self, container, address, fn_name, args, gas_limit):
+        data = web3.eth.contract(abi=container.abi).encodeABI(fn_name=fn_name, args=args)
+        self.txs.append(
+            self.account.transfer(address, 0, data=data, **self._params(gas_limit))
+        )
 
-    a = accounts.load("")
-    resolver = "0x945e589a4715d1915e6fe14f08e4887bc4019341"
-    beneficiary = "0x28f11c3D76169361D22D8aE53551827Ac03360B0"
-    gas_strategy = GasNowStrategy("fast")
-    from_a = {"from": a, "gas_price": gas_strategy}
-    _ = ReNFT.deploy(resolver, beneficiary, a.address, from_a)
+    def wait(self):
+        for tx in self.txs:
+            tx.wait(1)
+        failed = [tx.txid for tx in self.txs if tx.status != 1]
+        if failed:
+            raise RuntimeError(f"reverted: {', '.join(failed)}")
+        return sum(tx.gas_used for tx in self.txs)
+
+    def _params(self, gas_limit=None):
+        # Account.transfer sends from the account itself and takes no "from"
+        params = {"nonce": self.nonce, "required_confs": 0, **self.fees}
+        if gas_limit is not None:
+            params["gas_limit"] = gas_limit
+        self.nonce += 1
+        return params
+
+
+def deploy(account, payment_tokens=None, beneficiary=BENEFICIARY, min_priority_fee=0):
+    """
+    deploys Resolver, registers every payment token and deploys ReNFT in one
+    pass; missing payment tokens are deployed from the mocks first
+    """
+    fees = FeeHistoryEstimator(web3, min_priority_fee=min_priority_fee).suggest()
+    pipeline = Pipeline(account, fees)
+
+    if payment_tokens is None:
+        payment_tokens = {pt: pipeline.deploy(mock) for pt, mock in MOCK_TOKENS.items()}
+    resolver = pipeline.deploy(Resolver, account)
+    for pt, token in payment_tokens.items():
+        pipeline.call(
+            Resolver, resolver, "setPaymentToken", [pt.value, token], SET_PAYMENT_TOKEN_GAS
+        )
+    renft = pipeline.deploy(ReNFT, resolver, beneficiary, account)
+
+    gas_used = pipeline.wait()
+    resolver, renft = Resolver.at(resolver), ReNFT.at(renft)
+    for pt, token in payment_tokens.items():
+        assert resolver.getPaymentToken(pt.value) == token, pt
+    print(f"{len(pipeline.txs)} transactions, {gas_used} gas, fees {fees}")
+    print(f"Resolver {resolver.address}")
+    print(f"ReNFT {renft.address}")
+    return resolver, renft
+
+
+def main():
+    active = network.show_active()
+    if active in PAYMENT_TOKENS:
+        deploy(
+            accounts.load(""),
+            PAYMENT_TOKENS[active],
+            min_priority_fee=MIN_PRIORITY_FEE.get(active, 0),
+        )
+    else:
+        deploy(accounts[0])
@@ -0,0 +1,263 @@
+"""
+Mass expiry: opens thousands of rentals with durations spread over
+MAX_RENT_DURATION days, then moves chain time forward a day at a time. Every
+day some renters return early, and then every rental that expired is claimed
+by the keeper in its own batches; throughput and gas are reported per wave.
+
+    brownie run expiry main <rentals> <seed>
+"""
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from brownie import E721, E1155, accounts, chain, history, web3
+from brownie.exceptions import VirtualMachineError
+
+from renft.aiotx import AsyncSender
+from renft.batch import Batch
+from renft.keeper import ExpiryQueue, Rental, SECONDS_IN_DAY, expires_at
+from renft.lending import Lending, NFTStandard, Renting
+from renft.price import SCALES, pack_price, quote, to_bytes4
+
+from scripts.deploy import deploy
+from scripts.keeper import Keeper
+from scripts.loadgen import TOKENS
+
+RESULTS = Path("build/expiry.json")
+
+# ganache's unlocked accounts, so setup transactions can go through AsyncSender
+LENDERS = range(1, 6)
+RENTERS = range(6, 10)
+NFTS_PER_STANDARD = 3
+LEND_BATCH = 20
+RENT_BATCH = 20
+RETURN_BATCH = 20
+MAX_RENT_DURATION = 7
+# share of rentals returned before they expire
+RETURN_SHARE = 0.3
+# returns happen half way through a day, claims this long after its expiries
+RETURN_AT = SECONDS_IN_DAY // 2
+CLAIM_AFTER = 3600
+# what one faucet call mints of a payment token, in whole tokens
+FAUCET_TOKENS = 1000
+
+
+class Wave:
+    def __init__(self, day):
+        self.day = day
+        self.ops = {}
+
+    def measure(self, op, fn):
+        """runs fn, which returns how many rentals it closed, over the txs it sends"""
+        start, wall = len(history), time.perf_counter()
+        items = fn()
+        wall = time.perf_counter() - wall
+        txs = history[start:]
+        gas = sum(tx.gas_used for tx in txs)
+        self.ops[op] = {
+            "items": items,
+            "txs": len(txs),
+            "reverted": sum(tx.status != 1 for tx in txs),
+            "gas": gas,
+            "gas_per_item": gas // items if items else 0,
+            "items_per_sec": items / wall if wall else 0.0,
+            "seconds": wall,
+        }
+
+    def report(self, open_rentals):
+        print(f"day {self.day:>2} open {open_rentals:>6}", end="")
+        for op, stats in self.ops.items():
+            print(
+                f" | {op} {stats['items']:>5} in {stats['txs']:>3} txs "
+                f"{stats['gas_per_item']} gas/item {stats['items_per_sec']:.1f}/s",
+                end="",
+            )
+        print()
+        return {"day": self.day, "open": open_rentals, **self.ops}
+
+
+class Scenario:
+    def __init__(self, rentals, seed=0):
+        self.random = random.Random(seed)
+        self.rentals = rentals
+        deployer = accounts[0]
+        resolver, self.renft = deploy(deployer)
+        # deployed without waiting for confirmations, so read back from the resolver
+        self.tokens = {
+            pt: container.at(resolver.getPaymentToken(pt)) for pt, container in TOKENS.items()
+        }
+        self.nfts = [
+            (container.deploy({"from": deployer}), nft_standard.value)
+            for container, nft_standard in ((E721, NFTStandard.E721), (E1155, NFTStandard.E1155))
+            for _ in range(NFTS_PER_STANDARD)
+        ]
+        self.sender = AsyncSender(web3.provider.endpoint_uri)
+        self.keeper = Keeper(self.renft, deployer, ExpiryQueue())
+        # lending id -> (renter, renting, day it is returned on or None)
+        self.open = {}
+
+    def run(self):
+        lendings = self.lend(self.mint())
+        self.rent(lendings)
+        start = chain.time()
+        waves = []
+        for day in range(1, MAX_RENT_DURATION + 1):
+            wave = Wave(day)
+            self.warp(start + (day - 1) * SECONDS_IN_DAY + RETURN_AT)
+            wave.measure("returnIt", lambda: self.return_due(day))
+            self.warp(start + day * SECONDS_IN_DAY + CLAIM_AFTER)
+            wave.measure("claimCollateral", lambda: self.claim())
+            waves.append(wave.report(len(self.open)))
+        return waves
+
+    @staticmethod
+    def warp(timestamp):
+        if timestamp > chain.time():
+            chain.sleep(timestamp - chain.time())
+            chain.mine()
+
+    def mint(self):
+        """lendings of freshly minted nfts, spread over the lenders"""
+        owners = [accounts[i] for i in LENDERS]
+        picks = [(owners[n % len(owners)], self.random.choice(self.nfts)) for n in range(self.rentals)]
+        receipts = self.sender.run(
+            [self._tx(owner, nft, nft.faucet) for owner, (nft, _) in picks]
+            + [
+                self._tx(owner, nft, nft.setApprovalForAll, self.renft, True)
+                for owner in owners
+                for nft, _ in self.nfts
+            ]
+        )
+
+        lendings = []
+        for (owner, (nft, nft_standard)), receipt in zip(picks, receipts):
+            log = receipt["logs"][0]
+            if nft_standard == NFTStandard.E721.value:
+                token_id, lent_amount = int(log["topics"][3], 16), 1
+            else:
+                data = log["data"][2:]
+                token_id = int(data[:64], 16)
+                lent_amount = self.random.randint(1, int(data[64:128], 16))
+            payment_token = self.random.choice(list(self.tokens))
+            scale = SCALES[payment_token]
+            daily_rent_price, nft_price = to_bytes4(
+                pack_price(
+                    [self.random.randint(1, 100) * scale // 100, self.random.randint(1, 10) * scale],
+                    scale,
+                )
+            )
+            lendings.append(
+                Lending(
+                    lender_address=owner,
+                    nft_standard=nft_standard,
+                    lent_amount=lent_amount,
+                    max_rent_duration=MAX_RENT_DURATION,
+                    daily_rent_price=daily_rent_price,
+                    nft_price=nft_price,
+                    payment_token=payment_token,
+                    nft=nft.address,
+                    token_id=token_id,
+                    lending_id=0,
+                )
+            )
+        return lendings
+
+    def lend(self, lendings):
+        by_lender = defaultdict(list)
+        for lending in lendings:
+            by_lender[lending.lender_address].append(lending)
+        for lender, items in by_lender.items():
+            for i in range(0, len(items), LEND_BATCH):
+                batch = Batch(items[i : i + LEND_BATCH])
+                batch.assign_lending_ids(self.renft.lend(*batch.lend_args(), {"from": lender}))
+        return lendings
+
+    def rent(self, lendings):
+        renters = [accounts[i] for i in RENTERS]
+        durations = [self.random.randint(1, MAX_RENT_DURATION) for _ in lendings]
+        assigned = [renters[n % len(renters)] for n in range(len(lendings))]
+        self.fund(assigned, lendings, durations)
+
+        by_renter = defaultdict(list)
+        for renter, lending, duration in zip(assigned, lendings, durations):
+            by_renter[renter].append(
+                Renting(
+                    renter_address=renter,
+                    rent_duration=duration,
+                    rented_at=0,
+                    nft_standard=lending.nft_standard,
+                    nft=lending.nft,
+                    token_id=lending.token_id,
+                    lending_id=lending.lending_id,
+                )
+            )
+        for renter, rentings in by_renter.items():
+            for i in range(0, len(rentings), RENT_BATCH):
+                batch = Batch(rentings[i : i + RENT_BATCH])
+                txn = self.renft.rent(*batch.rent_args(), {"from": renter})
+                for renting in batch.items:
+                    renting.rented_at = txn.timestamp
+                    returned_on = None
+                    if self.random.random() < RETURN_SHARE:
+                        returned_on = self.random.randint(1, renting.rent_duration)
+                    self.open[renting.lending_id] = (renter, renting, returned_on)
+                    self.keeper.queue.push(
+                        Rental(
+                            expires_at=expires_at(txn.timestamp, renting.rent_duration),
+                            lending_id=renting.lending_id,
+                            nft=renting.nft,
+                            token_id=renting.token_id,
+                            nft_standard=renting.nft_standard,
+                        )
+                    )
+
+    def fund(self, renters, lendings, durations):
+        """faucets every renter enough of each payment token for all of their rentals"""
+        needed = defaultdict(int)
+        for renter, lending, total in zip(renters, lendings, quote(lendings, durations).total):
+            needed[(renter, lending.payment_token)] += total
+        txs = []
+        for (renter, pt), amount in needed.items():
+            token = self.tokens[pt]
+            faucets = -(-amount // (FAUCET_TOKENS * SCALES[pt]))
+            txs += [self._tx(renter, token, token.faucet)] * faucets
+            txs.append(self._tx(renter, token, token.approve, self.renft, amount))
+        self.sender.run(txs)
+
+    def return_due(self, day):
+        due = defaultdict(list)
+        for renter, renting, returned_on in self.open.values():
+            if returned_on == day:
+                due[renter].append(renting)
+        returned = 0
+        for renter, rentings in due.items():
+            for i in range(0, len(rentings), RETURN_BATCH):
+                batch = Batch(rentings[i : i + RETURN_BATCH])
+                try:
+                    self.renft.returnIt(*batch.return_args(), {"from": renter})
+                except VirtualMachineError:
+                    continue
+                for renting in batch.items:
+                    del self.open[renting.lending_id]
+                    self.keeper.queue.discard(renting.lending_id)
+                returned += len(batch)
+        return returned
+
+    def claim(self):
+        # a rental whose claim reverted stays open
+        claimed = self.keeper.claim(chain.time())
+        for rental in claimed:
+            del self.open[rental.lending_id]
+        return len(claimed)
+
+    @staticmethod
+    def _tx(owner, contract, method, *args):
+        return {"from": str(owner), "to": contract.address, "data": method.encode_input(*args)}
+
+
+def main(rentals=5_000, seed=0):
+    waves = Scenario(int(rentals), int(seed)).run()
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(json.dumps(waves, indent=2))
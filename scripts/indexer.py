@@ -0,0 +1,11 @@
+from brownie import ReNFT, web3
+
+from renft.indexer import Indexer, Store
+
+DB_PATH = "indexer.sqlite"
+
+
+def main():
+    renft = ReNFT[-1]
+    start_block = renft.tx.block_number if renft.tx is not None else 0
+    Indexer(web3, renft.address, Store(DB_PATH), start_block=start_block).run()
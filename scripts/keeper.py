@@ -0,0 +1,75 @@
+import time
+
+from brownie import ReNFT, accounts, web3
+from brownie.exceptions import VirtualMachineError
+
+from renft.batch import Batch
+from renft.indexer import Indexer, Store
+from renft.keeper import ExpiryQueue, Rental
+
+DB_PATH = "indexer.sqlite"
+MAX_BATCH = 50
+POLL_INTERVAL = 2
+
+
+class Keeper:
+    def __init__(self, renft, sender, queue):
+        self.renft = renft
+        self.sender = sender
+        self.queue = queue
+
+    def on_event(self, event, store):
+        if event.name == "Rented":
+            row = store.get_by_lending_id(event.args["lendingId"])
+            self.queue.push(Rental.from_row(row))
+        elif event.name in ("Returned", "CollateralClaimed"):
+            self.queue.discard(event.args["lendingId"])
+
+    def on_reorg(self, block_number, store):
+        # rentals of dropped blocks go; those mined again come back through on_event
+        self.queue.reload(store)
+
+    def claim(self, now):
+        """the rentals expired by `now` that were claimed"""
+        claimed = []
+        while True:
+            expired = self.queue.pop_expired(now, limit=MAX_BATCH)
+            if not expired:
+                return claimed
+            claimed += self.send(expired)
+
+    def send(self, rentals):
+        # a rental returned or claimed by someone else since we last synced
+        # reverts the whole batch, so bisect until the bad ones are isolated
+        batch = Batch(rentals)
+        try:
+            self.renft.claimCollateral(*batch.return_args(), {"from": self.sender})
+        except VirtualMachineError:
+            if len(rentals) == 1:
+                print(f"claim of lending {rentals[0].lending_id} reverted, dropping it")
+                return []
+            middle = len(rentals) // 2
+            return self.send(rentals[:middle]) + self.send(rentals[middle:])
+        return list(rentals)
+
+
+def main():
+    renft = ReNFT[-1]
+    store = Store(DB_PATH)
+    keeper = Keeper(renft, accounts[0], ExpiryQueue.from_store(store))
+    start_block = renft.tx.block_number if renft.tx is not None else 0
+    indexer = Indexer(
+        web3,
+        renft.address,
+        store,
+        start_block=start_block,
+        listeners=[keeper.on_event],
+        reorg_listeners=[keeper.on_reorg],
+    )
+    while True:
+        indexer.sync()
+        now = web3.eth.get_block("latest")["timestamp"]
+        claimed = keeper.claim(now)
+        if claimed:
+            print(f"claimed {len(claimed)}, {len(keeper.queue)} rentals open")
+        time.sleep(POLL_INTERVAL)
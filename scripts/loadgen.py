@@ -0,0 +1,325 @@
+import json
+import random
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import numpy as np
+from brownie import DAI, E721, E1155, TUSD, USDC, WETH, accounts, chain
+from brownie.exceptions import VirtualMachineError
+
+from renft.batch import Batch
+from renft.keeper import ExpiryQueue, Rental, expires_at
+from renft.lending import NFTStandard, PaymentToken, Lending, Renting
+from renft.price import SCALES, pack_price, quote, to_bytes4
+
+from scripts.deploy import deploy
+
+RESULTS = Path("build/loadgen.json")
+
+LENDERS = 20
+RENTERS = 20
+NFTS_PER_STANDARD = 3
+MAX_BATCH = 10
+MAX_RENT_DURATION = 3
+REPORT_EVERY = 200
+# chain time that passes per report window, so rentals age into returns and claims
+SECONDS_PER_WINDOW = 6 * 3600
+# a return needs the lender's share of rent to be non-zero
+MIN_RENT_AGE = 600
+# ops and their relative weights; lend outweighs the ops that close lendings
+# so the open set keeps growing
+MIX = {"lend": 6, "rent": 4, "returnIt": 2, "stopLending": 1, "claimCollateral": 1}
+TOKENS = {
+    PaymentToken.WETH.value: WETH,
+    PaymentToken.DAI.value: DAI,
+    PaymentToken.USDC.value: USDC,
+    PaymentToken.TUSD.value: TUSD,
+}
+
+
+class Stats:
+    def __init__(self):
+        self.ops = defaultdict(lambda: {"txs": 0, "items": 0, "reverted": 0, "gas": [], "latency": []})
+        self.window = defaultdict(int)
+        self.window_start = time.perf_counter()
+        self.rows = []
+
+    def record(self, op, items, txn, latency):
+        stats = self.ops[op]
+        stats["txs"] += 1
+        stats["items"] += items
+        stats["gas"].append(txn.gas_used)
+        stats["latency"].append(latency)
+        self.window[op] += 1
+
+    def reverted(self, op):
+        self.ops[op]["reverted"] += 1
+
+    def report(self, open_lendings, rented):
+        now = time.perf_counter()
+        ops = sum(self.window.values())
+        row = {
+            "open_lendings": open_lendings,
+            "rented": rented,
+            "ops_per_sec": ops / (now - self.window_start),
+            "ops": dict(self.window),
+        }
+        for op, stats in self.ops.items():
+            latency = np.array(stats["latency"][-REPORT_EVERY:])
+            row[op] = {
+                "gas_per_tx": int(np.mean(stats["gas"][-REPORT_EVERY:])),
+                "p50_ms": float(np.percentile(latency, 50) * 1000),
+                "p99_ms": float(np.percentile(latency, 99) * 1000),
+            }
+        self.rows.append(row)
+        self.window = defaultdict(int)
+        self.window_start = now
+
+        print(f"open {open_lendings:>7} rented {rented:>6} {row['ops_per_sec']:>7.1f} ops/s", end="")
+        for op in MIX:
+            if op in row:
+                print(f" | {op} {row[op]['gas_per_tx']} gas {row[op]['p50_ms']:.0f}/{row[op]['p99_ms']:.0f}ms", end="")
+        print()
+
+    def summary(self):
+        return {
+            op: {
+                "txs": stats["txs"],
+                "items": stats["items"],
+                "reverted": stats["reverted"],
+                "gas_per_tx": int(np.mean(stats["gas"])),
+                "gas_per_item": int(np.sum(stats["gas"]) / stats["items"]),
+                "p50_ms": float(np.percentile(stats["latency"], 50) * 1000),
+                "p99_ms": float(np.percentile(stats["latency"], 99) * 1000),
+            }
+            for op, stats in self.ops.items()
+            if stats["txs"]
+        }
+
+
+class Load:
+    """
+    a population of lenders and renters driving random lend, rent,
+    returnIt, stopLending and claimCollateral batches against one ReNFT
+    """
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        deployer = accounts[0]
+        resolver, self.renft = deploy(deployer)
+        # deployed without waiting for confirmations, so read back from the resolver
+        self.tokens = {
+            pt: container.at(resolver.getPaymentToken(pt)) for pt, container in TOKENS.items()
+        }
+        self.nfts = [E721.deploy({"from": deployer}) for _ in range(NFTS_PER_STANDARD)] + [
+            E1155.deploy({"from": deployer}) for _ in range(NFTS_PER_STANDARD)
+        ]
+
+        self.lenders = [self.fund(accounts.add()) for _ in range(LENDERS)]
+        self.renters = [self.fund(accounts.add()) for _ in range(RENTERS)]
+        for lender in self.lenders:
+            for nft in self.nfts:
+                nft.setApprovalForAll(self.renft, True, {"from": lender})
+        for renter in self.renters:
+            for token in self.tokens.values():
+                token.approve(self.renft, 2 ** 256 - 1, {"from": renter})
+
+        # lender -> lendings not rented out
+        self.available = defaultdict(list)
+        # renter -> lending id -> (lending, renting, rented_at)
+        self.rentals = defaultdict(dict)
+        self.expiries = ExpiryQueue()
+        self.open = 0
+        self.stats = Stats()
+
+    @staticmethod
+    def fund(account):
+        accounts[0].transfer(account, "10 ether")
+        return account
+
+    def run(self, target_open):
+        ops = 0
+        while self.open < target_open:
+            op = self.random.choices(list(MIX), weights=list(MIX.values()))[0]
+            if getattr(self, op)():
+                ops += 1
+                if ops % REPORT_EVERY == 0:
+                    self.stats.report(self.open, len(self.expiries))
+                    chain.sleep(SECONDS_PER_WINDOW)
+        return self.stats
+
+    def send(self, op, items, fn, *args):
+        start = time.perf_counter()
+        try:
+            txn = fn(*args)
+        except VirtualMachineError:
+            self.stats.reverted(op)
+            return None
+        self.stats.record(op, items, txn, time.perf_counter() - start)
+        return txn
+
+    def lend(self):
+        lender = self.random.choice(self.lenders)
+        lendings = [self.listing(lender) for _ in range(self.random.randint(1, MAX_BATCH))]
+        batch = Batch(lendings)
+        txn = self.send("lend", len(batch), self.renft.lend, *batch.lend_args(), {"from": lender})
+        if txn is None:
+            return False
+        batch.assign_lending_ids(txn)
+        self.available[lender] += lendings
+        self.open += len(lendings)
+        return True
+
+    def listing(self, lender):
+        nft = self.random.choice(self.nfts)
+        txn = nft.faucet({"from": lender})
+        if "TransferSingle" in txn.events:
+            nft_standard = NFTStandard.E1155.value
+            token_id = txn.events["TransferSingle"]["id"]
+            lent_amount = self.random.randint(1, 10)
+        else:
+            nft_standard = NFTStandard.E721.value
+            token_id = txn.events["Transfer"]["tokenId"]
+            lent_amount = 1
+        payment_token = self.random.choice(list(self.tokens))
+        scale = SCALES[payment_token]
+        daily_rent_price, nft_price = to_bytes4(
+            pack_price(
+                [self.random.randint(1, 500) * scale // 100, self.random.randint(1, 50) * scale],
+                scale,
+            )
+        )
+        return Lending(
+            lender_address=lender,
+            nft_standard=nft_standard,
+            lent_amount=lent_amount,
+            max_rent_duration=MAX_RENT_DURATION,
+            daily_rent_price=daily_rent_price,
+            nft_price=nft_price,
+            payment_token=payment_token,
+            nft=nft.address,
+            token_id=token_id,
+            lending_id=0,
+        )
+
+    def take_available(self):
+        """up to MAX_BATCH lendings of one lender that are not rented out"""
+        lenders = [lender for lender, items in self.available.items() if items]
+        if not lenders:
+            return None, []
+        lender = self.random.choice(lenders)
+        items = self.available[lender]
+        n = self.random.randint(1, min(MAX_BATCH, len(items)))
+        taken, self.available[lender] = items[-n:], items[:-n]
+        return lender, taken
+
+    def rent(self):
+        renter = self.random.choice(self.renters)
+        _, lendings = self.take_available()
+        if not lendings:
+            return False
+        duration = self.random.randint(1, MAX_RENT_DURATION)
+        self.fund_rent(renter, lendings, duration)
+        rentings = [
+            Renting(
+                renter_address=renter,
+                rent_duration=duration,
+                rented_at=0,
+                nft_standard=lending.nft_standard,
+                nft=lending.nft,
+                token_id=lending.token_id,
+                lending_id=lending.lending_id,
+            )
+            for lending in lendings
+        ]
+        batch = Batch(rentings)
+        txn = self.send("rent", len(batch), self.renft.rent, *batch.rent_args(), {"from": renter})
+        if txn is None:
+            self.available[lendings[0].lender_address] += lendings
+            return False
+        rented_at = txn.timestamp
+        for lending, renting in zip(lendings, rentings):
+            self.rentals[renter][lending.lending_id] = (lending, renting, rented_at)
+            self.expiries.push(
+                Rental(
+                    expires_at=expires_at(rented_at, duration),
+                    lending_id=lending.lending_id,
+                    nft=lending.nft,
+                    token_id=lending.token_id,
+                    nft_standard=lending.nft_standard,
+                )
+            )
+        return True
+
+    def fund_rent(self, renter, lendings, duration):
+        needed = defaultdict(int)
+        for lending, total in zip(lendings, quote(lendings, [duration] * len(lendings)).total):
+            needed[lending.payment_token] += total
+        for pt, amount in needed.items():
+            token = self.tokens[pt]
+            while token.balanceOf(renter) < amount:
+                token.faucet({"from": renter})
+
+    def returnIt(self):
+        now = chain.time()
+        renters = [renter for renter, rentals in self.rentals.items() if rentals]
+        if not renters:
+            return False
+        renter = self.random.choice(renters)
+        returnable = [
+            (lending, renting)
+            for lending, renting, rented_at in self.rentals[renter].values()
+            if rented_at + MIN_RENT_AGE < now < expires_at(rented_at, renting.rent_duration)
+        ][:MAX_BATCH]
+        if not returnable:
+            return False
+        batch = Batch([renting for _, renting in returnable])
+        txn = self.send(
+            "returnIt", len(batch), self.renft.returnIt, *batch.return_args(), {"from": renter}
+        )
+        if txn is None:
+            return False
+        for lending, _ in returnable:
+            del self.rentals[renter][lending.lending_id]
+            self.expiries.discard(lending.lending_id)
+            self.available[lending.lender_address].append(lending)
+        return True
+
+    def stopLending(self):
+        lender, lendings = self.take_available()
+        if not lendings:
+            return False
+        batch = Batch(lendings)
+        txn = self.send(
+            "stopLending", len(batch), self.renft.stopLending, *batch.stop_lending_args(), {"from": lender}
+        )
+        if txn is None:
+            self.available[lender] += lendings
+            return False
+        self.open -= len(lendings)
+        return True
+
+    def claimCollateral(self):
+        expired = self.expiries.pop_expired(chain.time(), limit=MAX_BATCH)
+        if not expired:
+            return False
+        batch = Batch(expired)
+        lender = self.random.choice(self.lenders)
+        txn = self.send(
+            "claimCollateral", len(batch), self.renft.claimCollateral, *batch.return_args(), {"from": lender}
+        )
+        if txn is None:
+            return False
+        for rental in expired:
+            for rentals in self.rentals.values():
+                rentals.pop(rental.lending_id, None)
+        self.open -= len(expired)
+        return True
+
+
+def main(target_open=20_000, seed=0):
+    stats = Load(int(seed)).run(int(target_open))
+    RESULTS.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS.write_text(json.dumps({"summary": stats.summary(), "windows": stats.rows}, indent=2))
+    print(json.dumps(stats.summary(), indent=2))
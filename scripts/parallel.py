@@ -0,0 +1,125 @@
+"""
+Runs the stateful test in N processes, each against its own local chain, then
+merges the results. Worker w runs `--rounds` times in a row with the seeds
+base + w * rounds + 0 .. rounds - 1, so no two runs share a seed.
+
+    python scripts/parallel.py -n 8 --rounds 4 -- -x
+
+Arguments after `--` are passed on to every `brownie test` worker.
+"""
+import argparse
+import os
+import random
+import re
+import subprocess
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+OUTPUT = Path("build/parallel")
+STATISTICS = re.compile(
+    r"(\d+) passing examples?, (\d+) failing examples?, (\d+) invalid examples?"
+)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=random.randrange(2 ** 32))
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--test", default="tests/stateful_test.py")
+    parser.add_argument("pytest_args", nargs="*")
+    return parser.parse_args(argv)
+
+
+def seeds(worker, args):
+    return range(args.seed + worker * args.rounds, args.seed + (worker + 1) * args.rounds)
+
+
+def run(worker, args):
+    """the worker's rounds one after the other on its chain; the exit codes"""
+    env = dict(os.environ, RENFT_RPC_PORT=str(args.port + worker))
+    codes = []
+    for seed in seeds(worker, args):
+        cmd = [
+            "brownie",
+            "test",
+            args.test,
+            f"--hypothesis-seed={seed}",
+            "--hypothesis-show-statistics",
+            f"--junitxml={OUTPUT / f'seed-{seed}.xml'}",
+            *args.pytest_args,
+        ]
+        with open(OUTPUT / f"seed-{seed}.log", "w") as log:
+            process = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, env=env)
+        codes.append(process.returncode)
+    return codes
+
+
+def summarize(worker, seed):
+    summary = {"tests": 0, "failures": 0, "errors": 0, "time": 0.0, "examples": [0, 0, 0]}
+    failures = []
+    report = OUTPUT / f"seed-{seed}.xml"
+    if report.exists():
+        root = ET.parse(report).getroot()
+        for suite in root.iter("testsuite"):
+            for key in ("tests", "failures", "errors"):
+                summary[key] += int(suite.get(key, 0))
+            summary["time"] += float(suite.get("time", 0))
+        for case in root.iter("testcase"):
+            for failure in list(case.iter("failure")) + list(case.iter("error")):
+                message = (failure.get("message") or "").split("\n")[0]
+                failures.append(
+                    f"worker {worker} (--hypothesis-seed={seed}) "
+                    f"{case.get('name')}: {message}"
+                )
+    log = (OUTPUT / f"seed-{seed}.log").read_text()
+    for match in STATISTICS.finditer(log):
+        for i, count in enumerate(match.groups()):
+            summary["examples"][i] += int(count)
+    return summary, failures
+
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    OUTPUT.mkdir(parents=True, exist_ok=True)
+
+    # compile once up front so the workers don't race writing build/
+    subprocess.run([sys.executable, "-m", "renft.buildcache", "restore"], check=True)
+    subprocess.run(["brownie", "compile"], check=True)
+    subprocess.run([sys.executable, "-m", "renft.buildcache", "store"], check=True)
+
+    with ThreadPoolExecutor(args.workers) as pool:
+        codes = list(pool.map(lambda worker: run(worker, args), range(args.workers)))
+
+    total = {"tests": 0, "failures": 0, "errors": 0, "examples": [0, 0, 0]}
+    all_failures = []
+    for worker, worker_codes in enumerate(codes):
+        for seed, code in zip(seeds(worker, args), worker_codes):
+            summary, failures = summarize(worker, seed)
+            all_failures += failures
+            for key in ("tests", "failures", "errors"):
+                total[key] += summary[key]
+            total["examples"] = [a + b for a, b in zip(total["examples"], summary["examples"])]
+            print(
+                f"worker {worker} seed {seed}: exit {code}, {summary['tests']} tests, "
+                f"{summary['failures'] + summary['errors']} failed, "
+                f"{summary['examples'][0]} examples in {summary['time']:.1f}s"
+            )
+
+    passing, failing, invalid = total["examples"]
+    print(
+        f"\n{args.workers} workers x {args.rounds} rounds, base seed {args.seed}: "
+        f"{total['tests']} tests, {total['failures'] + total['errors']} failed; {passing} passing, "
+        f"{failing} failing, {invalid} invalid examples"
+    )
+    for failure in all_failures:
+        print(failure)
+    print(f"worker logs in {OUTPUT}")
+    return int(any(code for worker_codes in codes for code in worker_codes))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
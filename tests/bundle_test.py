@@ -0,0 +1,93 @@
+import pytest
+from brownie import accounts, chain
+
+from renft.lending import (
+    PaymentToken,
+    Renting,
+    lendings_to_lend_args,
+    lendings_to_stop_lending_args,
+    rentings_to_rent_args,
+    rentings_to_return_args,
+)
+
+# bundles of 1155s that start part way into the batch, behind a 721 and
+# behind another contract's bundle. safeTransfer borrows the word in front of
+# each bundle's range, so every later read of the arrays relies on putting it back
+LAYOUT = [
+    ("e721", 0),
+    ("e1155", 0),
+    ("e1155", 0),
+    ("e721", 1),
+    ("e1155", 1),
+    ("e1155", 1),
+    ("e1155", 1),
+    ("e1155", 0),
+]
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_1155_bundles_in_the_middle_of_a_batch(world, renft, payment_tokens, mint_lending):
+    lender, renter = accounts[2], accounts[3]
+    dai = payment_tokens[PaymentToken.DAI.value]
+    dai.faucet({"from": renter})
+    dai.approve(renft, 2 ** 256 - 1, {"from": renter})
+    contracts = {name: world[name][:2] for name in ("e721", "e1155")}
+    for nft in contracts["e721"] + contracts["e1155"]:
+        nft.setApprovalForAll(renft, True, {"from": renter})
+
+    # a different amount per 1155, so a shifted slice moves the wrong amounts
+    lendings = [
+        mint_lending(
+            lender,
+            contracts[name][ix],
+            lent_amount=1 if name == "e721" else 2 + i,
+            max_rent_duration=1,
+            daily_rent_price=1,
+            nft_price=3,
+        )
+        for i, (name, ix) in enumerate(LAYOUT)
+    ]
+
+    def holdings(holder):
+        held = []
+        for (name, ix), lending in zip(LAYOUT, lendings):
+            nft = contracts[name][ix]
+            if name == "e721":
+                held.append(int(nft.ownerOf(lending.token_id) == holder))
+            else:
+                held.append(nft.balanceOf(holder, lending.token_id))
+        return held
+
+    amounts = [lending.lent_amount for lending in lendings]
+
+    txn = renft.lend(*lendings_to_lend_args(lendings), {"from": lender})
+    lent = txn.events["Lent"]
+    assert [(event["tokenId"], event["lentAmount"]) for event in lent] == [
+        (lending.token_id, lending.lent_amount) for lending in lendings
+    ]
+    for lending, event in zip(lendings, lent):
+        lending.lending_id = event["lendingId"]
+    assert holdings(renft) == amounts
+
+    rentings = [Renting.from_lending(lending, renter.address, 1) for lending in lendings]
+    txn = renft.rent(*rentings_to_rent_args(rentings), {"from": renter})
+    assert [event["lendingId"] for event in txn.events["Rented"]] == [
+        lending.lending_id for lending in lendings
+    ]
+    assert holdings(renter) == amounts
+    assert holdings(renft) == [0] * len(lendings)
+
+    chain.sleep(3600)
+    txn = renft.returnIt(*rentings_to_return_args(rentings), {"from": renter})
+    assert [event["lendingId"] for event in txn.events["Returned"]] == [
+        lending.lending_id for lending in lendings
+    ]
+    assert holdings(renft) == amounts
+    assert holdings(renter) == [0] * len(lendings)
+
+    renft.stopLending(*lendings_to_stop_lending_args(lendings), {"from": lender})
+    assert holdings(lender) == [1 if name == "e721" else 10 for name, _ in LAYOUT]
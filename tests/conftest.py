@@ -0,0 +1,347 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import brownie
+import pytest
+from brownie._config import CONFIG
+from brownie.exceptions import VirtualMachineError
+from brownie.network.contract import ContractTx
+
+from renft import buildcache, trace
+from renft.batch import Batch
+from renft.profiler import Profiler
+
+from renft.lending import Lending, NFTStandard, PaymentToken
+
+PROJECT = Path(__file__).parent.parent
+SNAPSHOTS = PROJECT / "build" / "snapshots"
+MANIFEST = "world.json"
+# changes to anything in here change what the world looks like
+SNAPSHOT_SOURCES = ["contracts", "interfaces", "brownie-config.yaml", "tests/conftest.py"]
+
+BENEFICIARY_MNEMONIC = "test test test test test test test test test test test junk"
+PAYMENT_TOKENS = {
+    PaymentToken.WETH.value: "WETH",
+    PaymentToken.DAI.value: "DAI",
+    PaymentToken.USDC.value: "USDC",
+    PaymentToken.TUSD.value: "TUSD",
+}
+NFTS_PER_STANDARD = 5
+# what mint_lending asks unless told otherwise: a token a day, five of collateral
+DAILY_RENT_PRICE = bytes.fromhex("00010000")
+NFT_PRICE = bytes.fromhex("00050000")
+
+# manifest of the snapshotted world for this session, if any
+WORLD = {}
+SESSION_DB = None
+
+
+def snapshot_key(network_settings):
+    digest = hashlib.sha256()
+    for source in SNAPSHOT_SOURCES:
+        path = PROJECT / source
+        files = sorted(path.rglob("*")) if path.is_dir() else [path]
+        for file in filter(Path.is_file, files):
+            digest.update(str(file.relative_to(PROJECT)).encode())
+            digest.update(file.read_bytes())
+    cmd_settings = {k: v for k, v in network_settings["cmd_settings"].items() if k != "port"}
+    digest.update(json.dumps(cmd_settings, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+
+def deploy_world(project, accounts):
+    deployer = accounts[0]
+    from_deployer = {"from": deployer}
+
+    payment_tokens = {
+        pt: getattr(project, name).deploy(from_deployer) for pt, name in PAYMENT_TOKENS.items()
+    }
+    resolver = project.Resolver.deploy(deployer, from_deployer)
+    for pt, token in payment_tokens.items():
+        resolver.setPaymentToken(pt, token, from_deployer)
+    e721s = [project.E721.deploy(from_deployer) for _ in range(NFTS_PER_STANDARD)]
+    e1155s = [project.E1155.deploy(from_deployer) for _ in range(NFTS_PER_STANDARD)]
+    beneficiary = accounts.from_mnemonic(BENEFICIARY_MNEMONIC, count=1)
+    renft = project.ReNFT.deploy(resolver, beneficiary, deployer, from_deployer)
+
+    return {
+        "payment_tokens": payment_tokens,
+        "resolver": resolver,
+        "e721": e721s,
+        "e1155": e1155s,
+        "renft": renft,
+        "beneficiary": beneficiary.address,
+    }
+
+
+def to_manifest(world):
+    return {
+        "payment_tokens": {
+            str(pt): token.address for pt, token in world["payment_tokens"].items()
+        },
+        "resolver": world["resolver"].address,
+        "e721": [nft.address for nft in world["e721"]],
+        "e1155": [nft.address for nft in world["e1155"]],
+        "renft": world["renft"].address,
+        "beneficiary": world["beneficiary"],
+    }
+
+
+def load_world(project, manifest):
+    return {
+        "payment_tokens": {
+            int(pt): getattr(project, PAYMENT_TOKENS[int(pt)]).at(address)
+            for pt, address in manifest["payment_tokens"].items()
+        },
+        "resolver": project.Resolver.at(manifest["resolver"]),
+        "e721": [project.E721.at(address) for address in manifest["e721"]],
+        "e1155": [project.E1155.at(address) for address in manifest["e1155"]],
+        "renft": project.ReNFT.at(manifest["renft"]),
+        "beneficiary": manifest["beneficiary"],
+    }
+
+
+def build_snapshot(network, settings, snapshot):
+    staging = snapshot.with_name(f"{snapshot.name}.{os.getpid()}")
+    shutil.rmtree(staging, ignore_errors=True)
+    (staging / "chain").mkdir(parents=True)
+
+    cmd = settings["cmd"]
+    settings["cmd"] = f"{cmd} --db {staging / 'chain'}"
+    brownie.network.connect(network)
+    try:
+        world = to_manifest(
+            deploy_world(brownie.project.get_loaded_projects()[0], brownie.accounts)
+        )
+    finally:
+        brownie.network.disconnect()
+        settings["cmd"] = cmd
+
+    (staging / MANIFEST).write_text(json.dumps(world, indent=2))
+    try:
+        staging.rename(snapshot)
+    except OSError:
+        # another worker built the same snapshot first
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--differential",
+        action="store_true",
+        help="check every balance of the shadow model against the chain after each step",
+    )
+    parser.addoption(
+        "--profile",
+        metavar="DIR",
+        help="record time, gas and rpc calls per rule and transaction into DIR",
+    )
+    parser.addoption(
+        "--record-traces",
+        metavar="DIR",
+        help="write the transactions of every failing run into DIR, for replay_test.py",
+    )
+    parser.addoption(
+        "--replay",
+        metavar="DIR",
+        help="traces for tests/replay_test.py to replay",
+    )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    global SESSION_DB
+
+    if not brownie.project.get_loaded_projects():
+        return
+    # the project has been compiled by now; later checkouts can skip solc
+    buildcache.store()
+
+    network = CONFIG.argv.get("network") or CONFIG.settings["networks"]["default"]
+    settings = CONFIG.networks[network]
+
+    # scripts/parallel.py gives every worker its own local chain
+    port = os.environ.get("RENFT_RPC_PORT")
+    if port is not None:
+        settings["cmd_settings"]["port"] = int(port)
+
+    if os.environ.get("RENFT_NO_SNAPSHOT") or not settings.get("cmd", "").startswith("ganache"):
+        return
+
+    snapshot = SNAPSHOTS / snapshot_key(settings)
+    if not (snapshot / MANIFEST).exists():
+        build_snapshot(network, settings, snapshot)
+
+    # ganache writes to its db, so every session runs on a copy
+    SESSION_DB = Path(tempfile.mkdtemp(prefix="renft-chain-"))
+    shutil.copytree(snapshot / "chain", SESSION_DB / "chain")
+    settings["cmd"] = f"{settings['cmd']} --db {SESSION_DB / 'chain'}"
+    WORLD.update(json.loads((snapshot / MANIFEST).read_text()))
+
+
+def pytest_unconfigure(config):
+    if SESSION_DB is not None:
+        shutil.rmtree(SESSION_DB, ignore_errors=True)
+
+
+@pytest.fixture(scope="module")
+def world():
+    project = brownie.project.get_loaded_projects()[0]
+    if WORLD:
+        return load_world(project, WORLD)
+    return deploy_world(project, brownie.accounts)
+
+
+@pytest.fixture(scope="module")
+def manifest(world):
+    return to_manifest(world)
+
+
+@pytest.fixture(scope="module")
+def payment_tokens(world):
+    return world["payment_tokens"]
+
+
+@pytest.fixture(scope="module")
+def resolver(world):
+    return world["resolver"]
+
+
+@pytest.fixture(scope="module")
+def nfts(world):
+    return world["e721"] + world["e1155"]
+
+
+@pytest.fixture(scope="module")
+def renft(world):
+    return world["renft"]
+
+
+@pytest.fixture(scope="module")
+def beneficiary(world):
+    return world["beneficiary"]
+
+
+@pytest.fixture
+def mint_lending(renft):
+    """
+    the Lending of an nft freshly minted to lender, not lent yet. its
+    standard follows from the mint; lent_amount defaults to 1 for a 721 and
+    3 for an 1155. ReNFT is approved for the nft unless approve is False
+    """
+
+    def mint_lending(
+        lender,
+        nft,
+        payment_token=PaymentToken.DAI.value,
+        lent_amount=None,
+        max_rent_duration=5,
+        daily_rent_price=DAILY_RENT_PRICE,
+        nft_price=NFT_PRICE,
+        approve=True,
+    ):
+        txn = nft.faucet({"from": lender})
+        if "TransferSingle" in txn.events:
+            nft_standard, token_id = NFTStandard.E1155.value, txn.events["TransferSingle"]["id"]
+            lent_amount = 3 if lent_amount is None else lent_amount
+        else:
+            nft_standard, token_id = NFTStandard.E721.value, txn.events["Transfer"]["tokenId"]
+            lent_amount = 1 if lent_amount is None else lent_amount
+        if approve:
+            nft.setApprovalForAll(renft, True, {"from": lender})
+        return Lending(
+            nft_standard=nft_standard,
+            lender_address=lender.address,
+            max_rent_duration=max_rent_duration,
+            daily_rent_price=daily_rent_price,
+            nft_price=nft_price,
+            lent_amount=lent_amount,
+            payment_token=payment_token,
+            nft=nft.address,
+            token_id=token_id,
+            lending_id=0,
+        )
+
+    return mint_lending
+
+
+@pytest.fixture
+def lend(renft):
+    """lends one lender's lendings in one batch and sets their lending ids"""
+
+    def lend(lendings):
+        batch = Batch(lendings)
+        txn = renft.lend(*batch.lend_args(), {"from": lendings[0].lender_address})
+        batch.assign_lending_ids(txn)
+        return txn
+
+    return lend
+
+
+@pytest.fixture(scope="session")
+def differential(request):
+    return request.config.getoption("--differential")
+
+
+@pytest.fixture(scope="session")
+def profiler(request):
+    directory = request.config.getoption("--profile")
+    if directory is None:
+        yield None
+        return
+
+    profiler = Profiler()
+    transact = ContractTx.__call__
+
+    def profiled(tx, *args, **kwargs):
+        with profiler.span(tx._name, "tx") as span:
+            receipt = None
+            try:
+                receipt = transact(tx, *args, **kwargs)
+            except VirtualMachineError as exc:
+                # reverted transactions still burn gas
+                receipt = next((t for t in brownie.history if t.txid == exc.txid), None)
+                raise
+            finally:
+                span.gas = None if receipt is None else receipt.gas_used
+            return receipt
+
+    ContractTx.__call__ = profiled
+    brownie.web3.middleware_onion.add(profiler.middleware, "renft_profiler")
+    try:
+        yield profiler
+    finally:
+        brownie.web3.middleware_onion.remove("renft_profiler")
+        ContractTx.__call__ = transact
+        profiler.write(directory)
+
+
+@pytest.fixture(scope="module")
+def recorder(request, manifest):
+    if request.config.getoption("--record-traces") is None:
+        yield None
+        return
+
+    recorder = trace.Recorder(manifest)
+    recorder.install(brownie.web3.provider)
+    try:
+        yield recorder
+    finally:
+        trace.Recorder.uninstall(brownie.web3.provider)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    recorder = getattr(item, "funcargs", {}).get("recorder")
+    if report.when != "call" or not report.failed or recorder is None:
+        return
+    # the chain is still at the end of the failing run; fn_isolation reverts it later
+    directory = Path(item.config.getoption("--record-traces"))
+    path = directory / f"{item.name}-{len(list(directory.glob(f'{item.name}-*')))}.jsonl.gz"
+    trace.save(path, recorder.trace(brownie.web3.provider.endpoint_uri, item.nodeid))
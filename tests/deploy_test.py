@@ -0,0 +1,18 @@
+import pytest
+
+from scripts.deploy import MOCK_TOKENS, deploy
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_deploy_registers_every_payment_token(accounts):
+    resolver, renft = deploy(accounts[0])
+    for pt, container in MOCK_TOKENS.items():
+        token = container.at(resolver.getPaymentToken(pt.value))
+        assert token.decimals() > 0
+        assert resolver.getPaymentTokenInfo(pt.value) == (token, 10 ** token.decimals())
+    assert renft.paused() is False
+    assert renft.rentFee() == 0
@@ -0,0 +1,61 @@
+import pytest
+from brownie import accounts, chain
+
+from renft.batch import Batch
+from renft.keeper import SECONDS_IN_DAY, ExpiryQueue, Rental, expires_at
+from renft.lending import PaymentToken, Renting
+from scripts.keeper import Keeper
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_claim_bisects_around_rentals_that_were_returned_out_of_band(
+    renft, nfts, payment_tokens, mint_lending, lend
+):
+    lender, renter = accounts[2], accounts[3]
+    lendings = [
+        mint_lending(lender, nfts[i % 3], max_rent_duration=3, nft_price=bytes.fromhex("00020000"))
+        for i in range(6)
+    ]
+    lend(lendings)
+
+    dai = payment_tokens[PaymentToken.DAI.value]
+    dai.faucet({"from": renter})
+    dai.approve(renft, 2 ** 256 - 1, {"from": renter})
+    rentings = [
+        Renting.from_lending(lending, renter.address, 1 + i % 2)
+        for i, lending in enumerate(lendings)
+    ]
+    txn = renft.rent(*Batch(rentings).rent_args(), {"from": renter})
+
+    queue = ExpiryQueue()
+    for renting in rentings:
+        queue.push(
+            Rental(
+                expires_at=expires_at(txn.timestamp, renting.rent_duration),
+                lending_id=renting.lending_id,
+                nft=renting.nft,
+                token_id=renting.token_id,
+                nft_standard=renting.nft_standard,
+            )
+        )
+    # returned behind the keeper's back: claiming them reverts
+    returned = [rentings[1], rentings[4]]
+    renft.returnIt(*Batch(returned).return_args(), {"from": renter})
+
+    chain.sleep(2 * SECONDS_IN_DAY + 60)
+    chain.mine()
+    keeper = Keeper(renft, accounts[0], queue)
+    claimed = keeper.claim(chain.time())
+
+    expected = {r.lending_id for r in rentings} - {r.lending_id for r in returned}
+    assert {rental.lending_id for rental in claimed} == expected
+    assert len(claimed) == len(expected)
+    assert len(queue) == 0
+    _, words = renft.getLendingRenting(
+        [r.nft for r in rentings], [r.token_id for r in rentings], [r.lending_id for r in rentings]
+    )
+    assert list(words) == [0] * len(rentings)
@@ -0,0 +1,25 @@
+import pytest
+
+from scripts import loadgen
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_loadgen_reaches_target_with_a_tiny_population(monkeypatch):
+    monkeypatch.setattr(loadgen, "LENDERS", 2)
+    monkeypatch.setattr(loadgen, "RENTERS", 2)
+    monkeypatch.setattr(loadgen, "NFTS_PER_STANDARD", 1)
+    monkeypatch.setattr(loadgen, "MAX_BATCH", 3)
+    monkeypatch.setattr(loadgen, "REPORT_EVERY", 10)
+
+    load = loadgen.Load(seed=1)
+    stats = load.run(target_open=15)
+
+    assert load.open >= 15
+    summary = stats.summary()
+    assert summary["lend"]["txs"] > 0 and summary["lend"]["gas_per_item"] > 0
+    assert "rent" in summary
+    assert len(stats.rows) == sum(s["txs"] for s in summary.values()) // 10
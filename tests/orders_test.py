@@ -0,0 +1,168 @@
+import brownie
+import pytest
+from brownie import accounts, chain
+
+from renft.batch import Batch
+from renft.lending import NFTStandard, PaymentToken
+from renft.orders import LendOrder, OrderBook, order_digest, rent_signed_args, sign_order
+from renft.price import quote
+
+DAY = 86400
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+@pytest.fixture(scope="module")
+def lender():
+    # orders are signed off-chain, so the lender needs a key of its own
+    lender = accounts.add()
+    accounts[0].transfer(lender, "10 ether")
+    return lender
+
+
+@pytest.fixture(scope="module")
+def renter():
+    return accounts[3]
+
+
+@pytest.fixture(scope="module")
+def dai(payment_tokens):
+    return payment_tokens[PaymentToken.DAI.value]
+
+
+@pytest.fixture
+def book(renft):
+    return OrderBook(chain.id, renft, used=renft.isOrderNonceUsed)
+
+
+@pytest.fixture
+def listing(nfts, mint_lending, lender):
+    """the unlent Lending of an nft minted to the lender, for an order to sign"""
+
+    def listing(nft_standard=NFTStandard.E721.value, approve=True):
+        nft = nfts[0] if nft_standard == NFTStandard.E721.value else nfts[-1]
+        return mint_lending(lender, nft, max_rent_duration=3, approve=approve)
+
+    return listing
+
+
+@pytest.fixture
+def fund(dai, renft, renter):
+    dai.faucet({"from": renter})
+    dai.approve(renft, 2 ** 256 - 1, {"from": renter})
+
+
+def test_hash_lend_order_matches_the_off_chain_digest(renft, book, listing):
+    order = LendOrder.from_lending(listing(), nonce=7, deadline=chain.time() + DAY)
+    assert renft.hashLendOrder(order.as_tuple()) == "0x" + order_digest(order, book.domain).hex()
+
+
+def test_signed_order_is_rented_once(renft, nfts, dai, book, listing, lender, renter, fund):
+    lendings = [listing(), listing(NFTStandard.E1155.value)]
+    book.sign(lendings, lender.private_key, deadline=chain.time() + DAY)
+    signed = [book.for_nft(lending.nft, lending.token_id)[0] for lending in lendings]
+    durations = [2, 3]
+
+    before = dai.balanceOf(renter)
+    txn = renft.rentSigned(*rent_signed_args(signed, durations), {"from": renter})
+
+    lent, rented = txn.events["Lent"], txn.events["Rented"]
+    assert [event["lenderAddress"] for event in lent] == [lender] * 2
+    assert [event["renterAddress"] for event in rented] == [renter] * 2
+    assert [event["rentDuration"] for event in rented] == durations
+    assert nfts[0].ownerOf(lendings[0].token_id) == renter
+    assert nfts[-1].balanceOf(renter, lendings[1].token_id) == lendings[1].lent_amount
+    assert dai.balanceOf(renter) == before - sum(quote(lendings, durations).total)
+    assert dai.balanceOf(renft) == sum(quote(lendings, durations).total)
+    assert all(renft.isOrderNonceUsed(lender, order.nonce) for order, _ in signed)
+
+    with brownie.reverts("ReNFT::order used or cancelled"):
+        renft.rentSigned(*rent_signed_args(signed[:1], [1]), {"from": renter})
+
+
+def test_cancelled_order_reverts(renft, book, listing, lender, renter, fund):
+    lending = listing()
+    (signature,) = book.sign([lending], lender.private_key, deadline=chain.time() + DAY)
+    ((order, _),) = book.for_nft(lending.nft, lending.token_id)
+
+    txn = renft.cancelOrders([order.nonce], {"from": lender})
+    assert txn.events["OrderCancelled"]["nonce"] == order.nonce
+    assert renft.isOrderNonceUsed(lender, order.nonce)
+
+    with brownie.reverts("ReNFT::order used or cancelled"):
+        renft.rentSigned([order.as_tuple()], [signature], [1], {"from": renter})
+
+
+def test_new_book_skips_nonces_spent_on_chain(renft, book, listing, lender, renter, fund):
+    lending = listing()
+    book.sign([lending], lender.private_key, deadline=chain.time() + DAY)
+    signed = book.for_nft(lending.nft, lending.token_id)
+    renft.rentSigned(*rent_signed_args(signed, [1]), {"from": renter})
+    assert renft.isOrderNonceUsed(lender, 0)
+
+    # e.g. the process restarted: a fresh book must not sign nonce 0 again
+    restarted = OrderBook(chain.id, renft, used=renft.isOrderNonceUsed)
+    second = listing()
+    restarted.sign([second], lender.private_key, deadline=chain.time() + DAY)
+    ((order, signature),) = restarted.for_nft(second.nft, second.token_id)
+    assert order.nonce == 1
+    txn = renft.rentSigned([order.as_tuple()], [signature], [1], {"from": renter})
+    assert txn.events["Rented"]["renterAddress"] == renter
+
+
+def test_expired_order_reverts(renft, book, listing, lender, renter, fund):
+    order = LendOrder.from_lending(listing(), nonce=0, deadline=chain.time() - 1)
+    signature = sign_order(order, lender.private_key, book.domain)
+
+    with brownie.reverts("ReNFT::order expired"):
+        renft.rentSigned([order.as_tuple()], [signature], [1], {"from": renter})
+    assert not renft.isOrderNonceUsed(lender, order.nonce)
+
+
+def test_order_signed_by_someone_else_reverts(renft, book, listing, renter, fund):
+    order = LendOrder.from_lending(listing(), nonce=0, deadline=chain.time() + DAY)
+    signature = sign_order(order, accounts.add().private_key, book.domain)
+
+    with brownie.reverts("ReNFT::invalid signature"):
+        renft.rentSigned([order.as_tuple()], [signature], [1], {"from": renter})
+
+
+def test_order_without_approval_reverts(renft, book, listing, lender, renter, fund):
+    order = LendOrder.from_lending(listing(approve=False), nonce=0, deadline=chain.time() + DAY)
+    signature = sign_order(order, lender.private_key, book.domain)
+
+    with brownie.reverts("ERC721: transfer caller is not owner nor approved"):
+        renft.rentSigned([order.as_tuple()], [signature], [1], {"from": renter})
+    # the revert also undoes burning the nonce
+    assert not renft.isOrderNonceUsed(lender, order.nonce)
+
+
+def test_signed_rentals_are_returned_and_claimed(
+    renft, nfts, dai, book, listing, lender, renter, fund
+):
+    returned, claimed = listing(), listing(NFTStandard.E1155.value)
+    book.sign([returned, claimed], lender.private_key, deadline=chain.time() + DAY)
+    signed = [book.for_nft(lending.nft, lending.token_id)[0] for lending in (returned, claimed)]
+    txn = renft.rentSigned(*rent_signed_args(signed, [2, 1]), {"from": renter})
+    for lending, event in zip((returned, claimed), txn.events["Lent"]):
+        lending.lending_id = event["lendingId"]
+
+    chain.sleep(3600)
+    nfts[0].setApprovalForAll(renft, True, {"from": renter})
+    renft.returnIt(*Batch([returned]).return_args(), {"from": renter})
+    assert nfts[0].ownerOf(returned.token_id) == renft
+
+    # the lender takes their nft back out of escrow like any other lending
+    renft.stopLending(*Batch([returned]).stop_lending_args(), {"from": lender})
+    assert nfts[0].ownerOf(returned.token_id) == lender
+
+    chain.sleep(2 * DAY)
+    before = dai.balanceOf(lender)
+    renft.claimCollateral(*Batch([claimed]).return_args(), {"from": lender})
+    assert dai.balanceOf(lender) - before == sum(quote([claimed], [1]).total)
+    assert nfts[-1].balanceOf(renter, claimed.token_id) == claimed.lent_amount
+    with brownie.reverts():
+        renft.claimCollateral(*Batch([claimed]).return_args(), {"from": lender})
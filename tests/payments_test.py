@@ -0,0 +1,202 @@
+from collections import defaultdict
+
+import pytest
+from brownie import accounts, chain
+
+from renft.batch import Batch
+from renft.lending import PaymentToken, Renting
+from renft.model import distribute_claim_payment, distribute_payments, rent_payment
+
+DAY = 86400
+# 1.5 tokens a day, 2.25 tokens of collateral per unit lent
+DAILY_RENT_PRICE = bytes.fromhex("00011388")
+NFT_PRICE = bytes.fromhex("000209c4")
+RENT_FEE = 500
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+@pytest.fixture
+def fee(renft):
+    renft.setRentFee(RENT_FEE, {"from": accounts[0]})
+    return RENT_FEE
+
+
+@pytest.fixture
+def lent(mint_lending, lend):
+    """a lending of lender's at this module's prices, lent on its own"""
+
+    def lent(lender, nft, payment_token):
+        lending = mint_lending(
+            lender,
+            nft,
+            payment_token,
+            daily_rent_price=DAILY_RENT_PRICE,
+            nft_price=NFT_PRICE,
+        )
+        lend([lending])
+        return lending
+
+    return lent
+
+
+@pytest.mark.parametrize("payment_token", [PaymentToken.DAI.value, PaymentToken.USDC.value])
+def test_rent_and_return_pay_what_the_model_does(
+    renft, nfts, payment_tokens, beneficiary, fee, lent, payment_token
+):
+    lender, renter = accounts[2], accounts[3]
+    lending = lent(lender, nfts[0], payment_token)
+    token = payment_tokens[payment_token]
+    decimals = token.decimals()
+    assert decimals == (6 if payment_token == PaymentToken.USDC.value else 18)
+    token.faucet({"from": renter})
+    token.approve(renft, 2 ** 256 - 1, {"from": renter})
+
+    renting = Renting.from_lending(lending, renter.address, 3)
+    before = token.balanceOf(renter)
+    rented = renft.rent(*Batch([renting]).rent_args(), {"from": renter})
+    (paid,), (reverted,) = rent_payment(
+        lending.lent_amount, DAILY_RENT_PRICE, NFT_PRICE, renting.rent_duration, decimals
+    )
+    assert not reverted
+    assert before - token.balanceOf(renter) == paid
+    assert token.balanceOf(renft) == paid
+
+    chain.sleep(DAY + DAY // 3)
+    nfts[0].setApprovalForAll(renft, True, {"from": renter})
+    balances = [token.balanceOf(a) for a in (lender, renter, beneficiary)]
+    returned = renft.returnIt(*Batch([renting]).return_args(), {"from": renter})
+    expected = distribute_payments(
+        lending.lent_amount,
+        DAILY_RENT_PRICE,
+        NFT_PRICE,
+        renting.rent_duration,
+        returned.timestamp - rented.timestamp,
+        decimals,
+        fee,
+    )
+    assert not expected.reverted[0]
+    assert [token.balanceOf(a) - b for a, b in zip((lender, renter, beneficiary), balances)] == [
+        expected.lender[0],
+        expected.renter[0],
+        expected.beneficiary[0],
+    ]
+    assert token.balanceOf(renft) == 0
+
+
+@pytest.mark.parametrize("payment_token", [PaymentToken.DAI.value, PaymentToken.USDC.value])
+def test_claim_collateral_pays_what_the_model_does(
+    renft, nfts, payment_tokens, beneficiary, fee, lent, payment_token
+):
+    lender, renter = accounts[2], accounts[3]
+    lending = lent(lender, nfts[-1], payment_token)
+    token = payment_tokens[payment_token]
+    decimals = token.decimals()
+    token.faucet({"from": renter})
+    token.approve(renft, 2 ** 256 - 1, {"from": renter})
+
+    renting = Renting.from_lending(lending, renter.address, 2)
+    renft.rent(*Batch([renting]).rent_args(), {"from": renter})
+
+    chain.sleep(3 * DAY)
+    balances = [token.balanceOf(a) for a in (lender, beneficiary)]
+    renft.claimCollateral(*Batch([renting]).return_args(), {"from": lender})
+    expected = distribute_claim_payment(
+        lending.lent_amount, DAILY_RENT_PRICE, NFT_PRICE, renting.rent_duration, decimals, fee
+    )
+    assert [token.balanceOf(a) - b for a, b in zip((lender, beneficiary), balances)] == [
+        expected.lender[0],
+        expected.beneficiary[0],
+    ]
+    assert token.balanceOf(renft) == 0
+
+
+def test_batches_net_payments_per_token_and_recipient(
+    renft, nfts, payment_tokens, beneficiary, fee, lent
+):
+    lenders, renter, claimer = (accounts[2], accounts[4]), accounts[3], accounts[5]
+    dai, usdc = PaymentToken.DAI.value, PaymentToken.USDC.value
+    # returned: both lenders, both tokens, and a bundle of two 1155s
+    returned = [
+        lent(lenders[0], nfts[0], dai),
+        lent(lenders[1], nfts[1], usdc),
+        lent(lenders[0], nfts[-1], usdc),
+        lent(lenders[1], nfts[-1], dai),
+        lent(lenders[0], nfts[2], dai),
+    ]
+    claimed = [
+        lent(lenders[1], nfts[3], dai),
+        lent(lenders[0], nfts[-2], usdc),
+        lent(lenders[1], nfts[-2], usdc),
+        lent(lenders[0], nfts[4], dai),
+    ]
+    for pt in (dai, usdc):
+        payment_tokens[pt].faucet({"from": renter})
+        payment_tokens[pt].approve(renft, 2 ** 256 - 1, {"from": renter})
+    for nft in (nfts[0], nfts[1], nfts[2], nfts[-1]):
+        nft.setApprovalForAll(renft, True, {"from": renter})
+
+    rentings = [
+        Renting.from_lending(lending, renter.address, 3 if lending in returned else 1)
+        for lending in returned + claimed
+    ]
+    rented = renft.rent(*Batch(rentings).rent_args(), {"from": renter})
+
+    chain.sleep(DAY + DAY // 2)
+    holders = [*lenders, renter, beneficiary]
+
+    def balances():
+        return {
+            (pt, str(holder)): payment_tokens[pt].balanceOf(holder)
+            for pt in (dai, usdc)
+            for holder in holders
+        }
+
+    before = balances()
+    txn = renft.returnIt(*Batch(rentings[: len(returned)]).return_args(), {"from": renter})
+    expected = defaultdict(int)
+    for lending in returned:
+        payout = distribute_payments(
+            lending.lent_amount,
+            DAILY_RENT_PRICE,
+            NFT_PRICE,
+            3,
+            txn.timestamp - rented.timestamp,
+            payment_tokens[lending.payment_token].decimals(),
+            fee,
+        )
+        assert not payout.reverted[0]
+        expected[(lending.payment_token, lending.lender_address)] += payout.lender[0]
+        expected[(lending.payment_token, renter.address)] += payout.renter[0]
+        expected[(lending.payment_token, str(beneficiary))] += payout.beneficiary[0]
+    after = balances()
+    assert {key: after[key] - before[key] for key in after} == {
+        key: expected[key] for key in after
+    }
+    # one transfer per token and recipient, not one per item and party
+    tokens = {payment_tokens[pt].address for pt in (dai, usdc)}
+    transfers = [event for event in txn.events["Transfer"] if event.address in tokens]
+    assert len(transfers) == sum(amount > 0 for amount in expected.values())
+
+    before = balances()
+    renft.claimCollateral(*Batch(rentings[len(returned) :]).return_args(), {"from": claimer})
+    expected = defaultdict(int)
+    for lending in claimed:
+        payout = distribute_claim_payment(
+            lending.lent_amount,
+            DAILY_RENT_PRICE,
+            NFT_PRICE,
+            1,
+            payment_tokens[lending.payment_token].decimals(),
+            fee,
+        )
+        expected[(lending.payment_token, lending.lender_address)] += payout.lender[0]
+        expected[(lending.payment_token, str(beneficiary))] += payout.beneficiary[0]
+    after = balances()
+    assert {key: after[key] - before[key] for key in after} == {
+        key: expected[key] for key in after
+    }
+    assert all(token.balanceOf(renft) == 0 for token in payment_tokens.values())
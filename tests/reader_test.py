@@ -0,0 +1,62 @@
+import pytest
+from brownie import accounts, web3
+
+from renft.batch import Batch
+from renft.lending import LendingRenting, PaymentToken, Renting
+from renft.reader import LendingRentingReader
+from renft.storage import StorageReader
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_get_lending_renting_matches_lend_and_rent(
+    renft, nfts, payment_tokens, mint_lending, lend
+):
+    lender, renter = accounts[2], accounts[3]
+    lendings = [
+        mint_lending(
+            lender,
+            nft,
+            lent_amount=2 + i if i >= 2 else 1,
+            max_rent_duration=2 + i,
+            daily_rent_price=(0x00010000 + i).to_bytes(4, "big"),
+            nft_price=(0x00030000 + i).to_bytes(4, "big"),
+        )
+        for i, nft in enumerate((nfts[0], nfts[1], nfts[-1], nfts[-1]))
+    ]
+    lend(lendings)
+
+    dai = payment_tokens[PaymentToken.DAI.value]
+    dai.faucet({"from": renter})
+    dai.approve(renft, 2 ** 256 - 1, {"from": renter})
+    rentings = [
+        Renting.from_lending(lending, renter.address, 1 + i)
+        for i, lending in enumerate(lendings[1::2])
+    ]
+    txn = renft.rent(*Batch(rentings).rent_args(), {"from": renter})
+    for renting in rentings:
+        renting.rented_at = txn.timestamp
+
+    # one lending that was stopped, and an id that was never used
+    stopped = lendings.pop(0)
+    renft.stopLending(*Batch([stopped]).stop_lending_args(), {"from": lender})
+    keys = [(lending.nft, lending.token_id, lending.lending_id) for lending in lendings]
+    keys += [(stopped.nft, stopped.token_id, stopped.lending_id), (nfts[0].address, 1, 10 ** 6)]
+
+    expected = [
+        LendingRenting(
+            lending,
+            next((r for r in rentings if r.lending_id == lending.lending_id), None),
+        )
+        for lending in lendings
+    ] + [None, None]
+    endpoint = web3.provider.endpoint_uri
+    assert LendingRentingReader(endpoint, renft, chunk_size=2).read(keys) == expected
+
+    read = StorageReader(endpoint, renft, chunk_size=2).read(keys)
+    assert [read[i] for i in range(len(keys))] == expected
+    assert read.exists.tolist() == [True, True, True, False, False]
+    assert read.rented.tolist() == [True, False, True, False, False]
@@ -0,0 +1,110 @@
+import brownie
+import pytest
+from brownie import accounts
+
+from renft.batch import Batch
+from renft.lending import (
+    Lending,
+    PaymentToken,
+    Renting,
+    unpack_lending,
+    unpack_renting,
+)
+from renft.price import quote
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+@pytest.fixture(scope="module")
+def lender():
+    return accounts[2]
+
+
+@pytest.fixture(scope="module")
+def renter():
+    return accounts[3]
+
+
+@pytest.fixture
+def lendings(nfts, renft, payment_tokens, mint_lending, lend, lender, renter):
+    """a 721 and two 1155s of one contract, lent in one batch"""
+    e721, e1155 = nfts[0], nfts[-1]
+    lendings = [
+        mint_lending(
+            lender,
+            nft,
+            lent_amount=lent_amount,
+            max_rent_duration=4,
+            daily_rent_price=bytes.fromhex("00020000"),
+            nft_price=bytes.fromhex("00010000"),
+        )
+        for nft, lent_amount in ((e721, 1), (e1155, 3), (e1155, 7))
+    ]
+    lend(lendings)
+
+    dai = payment_tokens[PaymentToken.DAI.value]
+    dai.faucet({"from": renter})
+    dai.approve(renft, 2 ** 256 - 1, {"from": renter})
+    return lendings
+
+
+def test_rent_records_renting_and_charges_the_quote(renft, payment_tokens, lendings, renter):
+    dai = payment_tokens[PaymentToken.DAI.value]
+    durations = [1, 4, 2]
+    before = dai.balanceOf(renter)
+    rentings = [
+        Renting.from_lending(lending, renter.address, duration)
+        for lending, duration in zip(lendings, durations)
+    ]
+    txn = renft.rent(*Batch(rentings).rent_args(), {"from": renter})
+
+    assert before - dai.balanceOf(renter) == sum(quote(lendings, durations).total)
+    rented = {event["lendingId"]: event for event in txn.events["Rented"]}
+    lending_words, renting_words = renft.getLendingRenting(
+        [lending.nft for lending in lendings],
+        [lending.token_id for lending in lendings],
+        [lending.lending_id for lending in lendings],
+    )
+    for lending, duration, lending_word, renting_word in zip(
+        lendings, durations, lending_words, renting_words
+    ):
+        # renting the lending leaves its slot as lend wrote it
+        stored = unpack_lending(lending_word, lending.nft, lending.token_id, lending.lending_id)
+        assert stored == lending
+        renting = unpack_renting(renting_word, lending)
+        assert renting.renter_address == renter
+        assert renting.rent_duration == duration
+        assert renting.rented_at == txn.timestamp
+        event = rented[lending.lending_id]
+        assert (event["renterAddress"], event["rentDuration"], event["rentedAt"]) == (
+            renter,
+            duration,
+            txn.timestamp,
+        )
+
+
+def test_rent_checks_the_cached_lending(renft, lendings, lender, renter):
+    lending = lendings[0]
+
+    def rent(lending, account, rent_duration):
+        renting = Renting.from_lending(lending, account.address, rent_duration)
+        return renft.rent(*Batch([renting]).rent_args(), {"from": account})
+
+    with brownie.reverts("ReNFT::cant rent own nft"):
+        rent(lending, lender, 1)
+    with brownie.reverts("ReNFT::duration is zero"):
+        rent(lending, renter, 0)
+    with brownie.reverts("ReNFT::rent duration exceeds allowed max"):
+        rent(lending, renter, 5)
+
+    unknown = Lending(**{**lending.__dict__, "lending_id": lending.lending_id + 100})
+    with brownie.reverts("ReNFT::zero address"):
+        rent(unknown, renter, 1)
+
+    rent(lending, renter, 1)
+    other = accounts[4]
+    with brownie.reverts("ReNFT::not a zero address"):
+        rent(lending, other, 1)
@@ -0,0 +1,30 @@
+"""
+Replays the traces that --record-traces wrote, one test per trace:
+
+    brownie test tests/replay_test.py --replay build/traces
+"""
+from pathlib import Path
+
+import pytest
+from brownie import web3
+
+from renft import trace
+
+
+def pytest_generate_tests(metafunc):
+    directory = metafunc.config.getoption("--replay")
+    paths = sorted(Path(directory).glob("*.jsonl.gz")) if directory else []
+    metafunc.parametrize("path", paths, ids=[path.name for path in paths])
+
+
+@pytest.fixture(autouse=True)
+def shared_setup(fn_isolation):
+    pass
+
+
+def test_replay(path, manifest):
+    recorded = trace.load(path)
+    if recorded["world"] != manifest:
+        pytest.skip("recorded against a different deployment")
+    divergences = trace.replay(web3.provider.endpoint_uri, recorded)
+    assert not divergences, "\n".join(divergences)
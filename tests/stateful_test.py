@@ -1,46 +1,29 @@
-from dataclasses import dataclass
+from collections import defaultdict
 from decimal import Decimal
-from enum import Enum
-from typing import List
 
 import pytest
 import brownie
-from brownie import (
-    WETH,
-    DAI,
-    TUSD,
-    USDC,
-    E721,
-    E1155,
-    Resolver,
-    ReNFT,
-    accounts,
-)
+from brownie import web3
 from brownie.test import strategy, contract_strategy
 
-BILLION = Decimal("1_000_000_000e18")
-SEPARATOR = "::"
-
-
-class NFTStandard(Enum):
-    E721 = 0
-    E1155 = 1
-
-
-class PaymentToken(Enum):
-    SENTINEL = 0
-    WETH = 1
-    DAI = 2
-    USDC = 3
-    TUSD = 4
+from renft.aiotx import AsyncSender
+from renft.batch import Batch
+from renft.price import quote
+from renft.shadow import ShadowReNFT
+from renft.lending import (
+    NFTStandard,
+    PaymentToken,
+    Lending,
+    Renting,
+    LendingRenting,
+    concat_lending_id,
+    lendings_to_lend_args,
+    lendings_to_stop_lending_args,
+    rentings_to_rent_args,
+)
 
+BILLION = Decimal("1_000_000_000e18")
 
-class Accounts:
-    def __init__(self, accounts):
-        self.deployer = accounts[0]
-        self.beneficiary = accounts[1]
-        self.lender = accounts[2]
-        self.renter = accounts[3]
 
 # reset state before each test
 
@@ -50,149 +33,154 @@ def shared_setup(fn_isolation):
     pass
 
 
-@pytest.fixture(scope="module")
-def A():
-    A = Accounts(accounts)
-    return A
-
-
-@pytest.fixture(scope="module")
-def payment_tokens(A):
-    weth = WETH.deploy({"from": A.deployer})
-    dai = DAI.deploy({"from": A.deployer})
-    usdc = USDC.deploy({"from": A.deployer})
-    tusd = TUSD.deploy({"from": A.deployer})
-    return {1: weth, 2: dai, 3: usdc, 4: tusd}
-
-
-@pytest.fixture(scope="module")
-def resolver(A):
-    resolver = Resolver.deploy(A.deployer, {"from": A.deployer})
-    return resolver
-
-
-@pytest.fixture(scope="module")
-def nfts(A):
-    for i in range(5):
-        E721.deploy({"from": A.deployer})
-    for i in range(5):
-        E1155.deploy({"from": A.deployer})
+class Prepare:
+    """
+    faucet and approval transactions a rule needs before its ReNFT call.
+    balances, allowances and approvals the shadow already expects on chain
+    are not sent again, and the rest go out together through AsyncSender
+    """
+
+    def __init__(self, sender, shadow, renft, payment_tokens):
+        self.sender = sender
+        self.shadow = shadow
+        self.renft = renft.address
+        self.payment_tokens = payment_tokens
+        self.scales = {
+            pt: 10 ** decimals for pt, (_, decimals) in shadow.payment_tokens.items()
+        }
+
+    def nfts(self, owner, nfts):
+        """mints one token of every (contract, nft standard) to owner; returns the token ids"""
+        owner = str(owner)
+        contracts = {nft.address: nft for nft, _ in nfts}
+        approve = [
+            nft
+            for nft in contracts.values()
+            if not self.shadow.holdings.is_approved_for_all(nft, owner, self.renft)
+        ]
+        receipts = self.sender.run(
+            [self._tx(owner, nft, nft.faucet) for nft, _ in nfts]
+            + [self._tx(owner, nft, nft.setApprovalForAll, self.renft, True) for nft in approve]
+        )
+
+        token_ids = []
+        for (nft, nft_standard), receipt in zip(nfts, receipts):
+            log = receipt["logs"][0]
+            if nft_standard == NFTStandard.E721.value:
+                token_id, amount = int(log["topics"][3], 16), 1
+            else:
+                data = log["data"][2:]
+                token_id, amount = int(data[:64], 16), int(data[64:128], 16)
+            self.shadow.mint_nft(nft.address, nft_standard, token_id, owner, amount)
+            token_ids.append(token_id)
+        for nft in approve:
+            self.shadow.holdings.set_approval_for_all(nft, owner, self.renft)
+        return token_ids
+
+    def payment(self, owner, lendings, rent_duration=1):
+        """funds owner and approves ReNFT for the rent of every lending"""
+        owner = str(owner)
+        quoted = quote(lendings, [rent_duration] * len(lendings), self.scales)
+        needed = defaultdict(int)
+        for lending, total in zip(lendings, quoted.total):
+            needed[lending.payment_token] += total
+
+        faucets, approvals = [], []
+        for pt, amount in needed.items():
+            token = self.payment_tokens[pt]
+            if self.shadow.holdings.balance(token, owner) < amount:
+                faucets.append(token)
+            if self.shadow.holdings.allowance(token, owner, self.renft) < amount:
+                approvals.append(token)
+        receipts = self.sender.run(
+            [self._tx(owner, token, token.faucet) for token in faucets]
+            + [self._tx(owner, token, token.approve, self.renft, BILLION) for token in approvals]
+        )
+        for token, receipt in zip(faucets, receipts):
+            self.shadow.mint_erc20(token, owner, int(receipt["logs"][0]["data"], 16))
+        for token in approvals:
+            self.shadow.holdings.approve(token, owner, self.renft, int(BILLION))
+
+    @staticmethod
+    def _tx(owner, contract, method, *args):
+        return {"from": owner, "to": contract.address, "data": method.encode_input(*args)}
+
+
+class Ledger:
+    """
+    open lendings keyed by concat_lending_id, indexed by
+    (nft standard, lender, rented) so that rules never scan every lending
+    """
+
+    def __init__(self):
+        self.lending_renting = dict()
+        # (nft_standard, lender_address, is_rented) -> ids in insertion order
+        self.index = defaultdict(dict)
+        # (nft_standard, is_rented) -> lenders with at least one id in index
+        self.lenders = defaultdict(dict)
+
+    def __getitem__(self, _id):
+        return self.lending_renting[_id]
+
+    def __len__(self):
+        return len(self.lending_renting)
+
+    def add(self, _id, lending_renting):
+        self.lending_renting[_id] = lending_renting
+        self._link(_id, lending_renting)
+
+    def remove(self, _id):
+        self._unlink(_id, self.lending_renting.pop(_id))
+
+    def rent(self, _id, renting):
+        lending_renting = self.lending_renting[_id]
+        self._unlink(_id, lending_renting)
+        lending_renting.renting = renting
+        self._link(_id, lending_renting)
+
+    def find(self, nft_standard, is_rented=None, lender_blacklist=(), exclude=()):
+        for rented in (False, True) if is_rented is None else (is_rented,):
+            for lender in self.lenders.get((nft_standard, rented), ()):
+                if lender in lender_blacklist:
+                    continue
+                for _id in self.index.get((nft_standard, lender, rented), ()):
+                    if _id not in exclude:
+                        return _id
+        return ""
 
+    def find_rentable(self, nft_standard, renter, exclude=()):
+        return self.find(
+            nft_standard, is_rented=False, lender_blacklist=(renter,), exclude=exclude
+        )
 
-def find_first(
-    nft_standard: NFTStandard,
-    lending_renting: dict,
-    lender_blacklist: List[str] = None,
-    id_blacklist: List[str] = None,
-):
-    if lender_blacklist is None:
-        lender_blacklist = []
-
-    if id_blacklist is None:
-        id_blacklist = []
-
-    for _id, lending_renting_instance in lending_renting.items():
-        _, _, lending_id = _id.split(SEPARATOR)
-        item = lending_renting_instance.lending
-        if (
-            (item.nft_standard == nft_standard) and
-            (item.lender_address not in lender_blacklist) and
-            (lending_id not in id_blacklist)
-        ):
-            return _id
-    return ""
-
-
-def find_from_lender(
-    lender_address: str, nft_standard: NFTStandard, lending_renting: dict, not_in_id: List[str]
-):
-    for _id, lending_renting_instance in lending_renting.items():
-        item = lending_renting_instance.lending
-        if (
-            item.nft_standard == nft_standard and
-            item.lender_address == lender_address and
-            _id not in not_in_id
-        ):
-            return _id
+    def find_from_lender(self, lender_address, nft_standard, is_rented=None, exclude=()):
+        for rented in (False, True) if is_rented is None else (is_rented,):
+            for _id in self.index.get((nft_standard, lender_address, rented), ()):
+                if _id not in exclude:
+                    return _id
         return ""
 
+    def _link(self, _id, lending_renting):
+        key = self._key(lending_renting)
+        self.index[key][_id] = None
+        self.lenders[(key[0], key[2])][key[1]] = None
 
-def mint_and_approve(payment_token_contract, renter_address, registry_address):
-    payment_token_contract.faucet({"from": renter_address})
-    payment_token_contract.approve(registry_address, BILLION, {
-                                   "from": renter_address})
-
-
-@dataclass
-class Lending:
-    nft_standard: NFTStandard
-    lender_address: str
-    max_rent_duration: str
-    daily_rent_price: bytes
-    nft_price: bytes
-    lent_amount: int
-    payment_token: PaymentToken
-    # below are not part of the contract struct
-    nft: str
-    token_id: int
-    lending_id: int
-
-
-@dataclass
-class Renting:
-    renter_address: str
-    rent_duration: int
-    rented_at: int
-    # below are not part of the contract struct
-    nft_standard: NFTStandard
-    nft: str
-    token_id: int
-    lending_id: int
-
-
-@dataclass
-class LendingRenting:
-    lending: Lending
-    renting: Renting
-
-
-def concat_lending_id(nft, token_id, lending_id):
-    return f"{nft}{SEPARATOR}{token_id}{SEPARATOR}{lending_id}"
-
-
-def lendings_to_lend_args(lendings):
-    args = [[], [], [], [], [], [], [], []]
-    for lending in lendings:
-        args[0].append(lending.nft_standard)
-        args[1].append(lending.nft)
-        args[2].append(lending.token_id)
-        args[3].append(lending.lent_amount)
-        args[4].append(lending.max_rent_duration)
-        args[5].append(lending.daily_rent_price)
-        args[6].append(lending.nft_price)
-        args[7].append(lending.payment_token)
-    return args
-
-
-def lendings_to_stop_lending_args(lendings):
-    args = [[], [], [], []]
-    for lending in lendings:
-        args[0].append(lending.nft_standard)
-        args[1].append(lending.nft)
-        args[2].append(lending.token_id)
-        args[3].append(lending.lending_id)
-    return args
-
-
-def rentings_to_rent_args(rentings):
-    args = [[], [], [], [], []]
-    for renting in rentings:
-        args[0].append(renting.nft_standard)
-        args[1].append(renting.nft)
-        args[2].append(renting.token_id)
-        args[3].append(renting.lending_id)
-        args[4].append(renting.rent_duration)
-    return args
+    def _unlink(self, _id, lending_renting):
+        key = self._key(lending_renting)
+        ids = self.index[key]
+        del ids[_id]
+        if not ids:
+            del self.index[key]
+            del self.lenders[(key[0], key[2])][key[1]]
+
+    @staticmethod
+    def _key(lending_renting):
+        lending = lending_renting.lending
+        return (
+            lending.nft_standard,
+            lending.lender_address,
+            lending_renting.renting is not None,
+        )
 
 
 class StateMachine:
@@ -201,19 +189,47 @@ class StateMachine:
     e1155 = contract_strategy("E1155")
     e1155_lent_amount = strategy("uint256", min_value="1", max_value="10")
 
-    def __init__(cls, accounts, ReNFT, resolver, beneficiary, payment_tokens):
+    def __init__(
+        cls, accounts, renft, payment_tokens, beneficiary, differential, recorder, profiler
+    ):
         cls.accounts = accounts
-        cls.contract = ReNFT.deploy(
-            resolver.address, beneficiary.address, accounts[0], {"from": accounts[0]})
+        cls.contract = renft
         cls.payment_tokens = payment_tokens
+        cls.beneficiary = beneficiary
+        cls.differential = differential
+        cls.recorder = recorder
+        cls.profiler = profiler
+        cls.shadow_tokens = {
+            pt: (token.address, token.decimals()) for pt, token in payment_tokens.items()
+        }
+        cls.rent_fee = renft.rentFee()
 
     def setup(self):
-        self.lending_renting = dict()
+        self.ledger = Ledger()
+        self.shadow = ShadowReNFT(
+            self.contract.address, self.beneficiary, self.shadow_tokens, self.rent_fee
+        )
+        self.prepare = Prepare(
+            AsyncSender(
+                web3.provider.endpoint_uri,
+                on_sent=None if self.recorder is None else self.recorder.sent,
+                profiler=self.profiler,
+            ),
+            self.shadow,
+            self.contract,
+            self.payment_tokens,
+        )
+
+    def invariant_balances(self):
+        # differential mode: every balance the shadow tracks must match the chain
+        if not self.differential:
+            return
+        mismatches = self.shadow.diff(web3.provider.endpoint_uri)
+        assert not mismatches, "\n".join(mismatches)
 
     def rule_lend_721(self, address, e721):
         print(f"rule_lend_721. a,e721. {address},{e721}")
-        txn = e721.faucet({"from": address})
-        e721.setApprovalForAll(self.contract.address, True, {"from": address})
+        (token_id,) = self.prepare.nfts(address, [(e721, NFTStandard.E721.value)])
 
         # todo: max_rent_duration is a strategy, and some cases revert
         lending = Lending(
@@ -226,7 +242,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e721.address,
-            token_id=txn.events["Transfer"]["tokenId"],
+            token_id=token_id,
             lending_id=0,
         )
         lending_renting = LendingRenting(lending, None)
@@ -237,15 +253,15 @@ class StateMachine:
         )
 
         lending.lending_id = txn.events["Lent"]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lending.nft,
-                              lending.token_id, lending.lending_id)
-        ] = lending_renting
+        self.shadow.lend([lending])
+        self.ledger.add(
+            concat_lending_id(lending.nft, lending.token_id, lending.lending_id),
+            lending_renting,
+        )
 
     def rule_lend_1155(self, address, e1155, e1155_lent_amount):
         print(f"rule_lend_1155. a,e1155. {address},{e1155}")
-        txn = e1155.faucet({"from": address})
-        e1155.setApprovalForAll(self.contract.address, True, {"from": address})
+        (token_id,) = self.prepare.nfts(address, [(e1155, NFTStandard.E1155.value)])
 
         # todo: max_rent_duration is a strategy, and some cases revert
         lending = Lending(
@@ -258,7 +274,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e1155.address,
-            token_id=txn.events["TransferSingle"]["id"],
+            token_id=token_id,
             lending_id=0,
         )
         lending_renting = LendingRenting(lending, None)
@@ -269,17 +285,21 @@ class StateMachine:
         )
 
         lending.lending_id = txn.events["Lent"]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lending.nft,
-                              lending.token_id, lending.lending_id)
-        ] = lending_renting
+        self.shadow.lend([lending])
+        self.ledger.add(
+            concat_lending_id(lending.nft, lending.token_id, lending.lending_id),
+            lending_renting,
+        )
 
     def rule_lend_batch_721(self, address, e721a="e721", e721b="e721"):
         print(f"rule_lend_batch_721. a,e721. {address},{e721a},{e721b}")
-        txna = e721a.faucet({"from": address})
-        e721a.setApprovalForAll(self.contract.address, True, {"from": address})
-        txnb = e721b.faucet({"from": address})
-        e721b.setApprovalForAll(self.contract.address, True, {"from": address})
+        token_ida, token_idb = self.prepare.nfts(
+            address,
+            [
+                (e721a, NFTStandard.E721.value),
+                (e721b, NFTStandard.E721.value),
+            ],
+        )
 
         # todo: max_rent_duration is a strategy, and some cases revert
         lendinga = Lending(
@@ -292,7 +312,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e721a.address,
-            token_id=txna.events["Transfer"]["tokenId"],
+            token_id=token_ida,
             lending_id=0,
         )
         lending_rentinga = LendingRenting(lendinga, None)
@@ -307,36 +327,35 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e721b.address,
-            token_id=txnb.events["Transfer"]["tokenId"],
+            token_id=token_idb,
             lending_id=0,
         )
         lending_rentingb = LendingRenting(lendingb, None)
 
-        txn = self.contract.lend(
-            *lendings_to_lend_args([lendinga, lendingb]),
-            {"from": address},
-        )
+        batch = Batch([lendinga, lendingb])
+        txn = self.contract.lend(*batch.lend_args(), {"from": address})
+        batch.assign_lending_ids(txn)
+        self.shadow.lend(batch.items)
 
-        lendinga.lending_id = txn.events["Lent"][0]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendinga.nft,
-                              lendinga.token_id, lendinga.lending_id)
-        ] = lending_rentinga
+        self.ledger.add(
+            concat_lending_id(lendinga.nft, lendinga.token_id, lendinga.lending_id),
+            lending_rentinga,
+        )
 
-        lendingb.lending_id = txn.events["Lent"][1]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendingb.nft,
-                              lendingb.token_id, lendingb.lending_id)
-        ] = lending_rentingb
+        self.ledger.add(
+            concat_lending_id(lendingb.nft, lendingb.token_id, lendingb.lending_id),
+            lending_rentingb,
+        )
 
     def rule_lend_batch_1155(self, address, e1155a="e1155", e1155b="e1155", e1155a_lent_amount="e1155_lent_amount", e1155b_lent_amount="e1155_lent_amount"):
         print(f"rule_lend_batch_1155. a,e1155. {address},{e1155a},{e1155b}")
-        txna = e1155a.faucet({"from": address})
-        e1155a.setApprovalForAll(
-            self.contract.address, True, {"from": address})
-        txnb = e1155b.faucet({"from": address})
-        e1155b.setApprovalForAll(
-            self.contract.address, True, {"from": address})
+        token_ida, token_idb = self.prepare.nfts(
+            address,
+            [
+                (e1155a, NFTStandard.E1155.value),
+                (e1155b, NFTStandard.E1155.value),
+            ],
+        )
 
         # todo: max_rent_duration is a strategy, and some cases revert
         lendinga = Lending(
@@ -349,7 +368,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e1155a.address,
-            token_id=txna.events["TransferSingle"]["id"],
+            token_id=token_ida,
             lending_id=0,
         )
         lending_rentinga = LendingRenting(lendinga, None)
@@ -364,40 +383,37 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e1155b.address,
-            token_id=txnb.events["TransferSingle"]["id"],
+            token_id=token_idb,
             lending_id=0,
         )
         lending_rentingb = LendingRenting(lendingb, None)
 
-        txn = self.contract.lend(
-            *lendings_to_lend_args([lendinga, lendingb]),
-            {"from": address},
-        )
+        batch = Batch([lendinga, lendingb])
+        txn = self.contract.lend(*batch.lend_args(), {"from": address})
+        batch.assign_lending_ids(txn)
+        self.shadow.lend(batch.items)
 
-        lendinga.lending_id = txn.events["Lent"][0]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendinga.nft,
-                              lendinga.token_id, lendinga.lending_id)
-        ] = lending_rentinga
+        self.ledger.add(
+            concat_lending_id(lendinga.nft, lendinga.token_id, lendinga.lending_id),
+            lending_rentinga,
+        )
 
-        lendingb.lending_id = txn.events["Lent"][1]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendingb.nft,
-                              lendingb.token_id, lendingb.lending_id)
-        ] = lending_rentingb
+        self.ledger.add(
+            concat_lending_id(lendingb.nft, lendingb.token_id, lendingb.lending_id),
+            lending_rentingb,
+        )
 
     def rule_lend_batch_721_1155(self, address, e721a="e721", e721b="e721", e1155a="e1155", e1155b="e1155", e1155a_lent_amount="e1155_lent_amount", e1155b_lent_amount="e1155_lent_amount"):
         print(f"rule_lend_batch_721_1155. a,e1155,e721. {address},{e1155a},{e1155b},{e721a},{e721b}")
-        txna = e1155a.faucet({"from": address})
-        e1155a.setApprovalForAll(
-            self.contract.address, True, {"from": address})
-        txnb = e1155b.faucet({"from": address})
-        e1155b.setApprovalForAll(
-            self.contract.address, True, {"from": address})
-        txnc = e721a.faucet({"from": address})
-        e721a.setApprovalForAll(self.contract.address, True, {"from": address})
-        txnd = e721b.faucet({"from": address})
-        e721b.setApprovalForAll(self.contract.address, True, {"from": address})
+        token_ida, token_idb, token_idc, token_idd = self.prepare.nfts(
+            address,
+            [
+                (e1155a, NFTStandard.E1155.value),
+                (e1155b, NFTStandard.E1155.value),
+                (e721a, NFTStandard.E721.value),
+                (e721b, NFTStandard.E721.value),
+            ],
+        )
 
         # todo: max_rent_duration is a strategy, and some cases revert
         lendinga = Lending(
@@ -410,7 +426,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e1155a.address,
-            token_id=txna.events["TransferSingle"]["id"],
+            token_id=token_ida,
             lending_id=0,
         )
         lending_rentinga = LendingRenting(lendinga, None)
@@ -425,7 +441,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e1155b.address,
-            token_id=txnb.events["TransferSingle"]["id"],
+            token_id=token_idb,
             lending_id=0,
         )
         lending_rentingb = LendingRenting(lendingb, None)
@@ -440,7 +456,7 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e721a.address,
-            token_id=txnc.events["Transfer"]["tokenId"],
+            token_id=token_idc,
             lending_id=0,
         )
         lending_rentingc = LendingRenting(lendingc, None)
@@ -455,47 +471,43 @@ class StateMachine:
             payment_token=PaymentToken.DAI.value,
             # not part of the contract's lending struct
             nft=e721b.address,
-            token_id=txnd.events["Transfer"]["tokenId"],
+            token_id=token_idd,
             lending_id=0,
         )
         lending_rentingd = LendingRenting(lendingd, None)
 
-        txn = self.contract.lend(
-            *lendings_to_lend_args([lendinga, lendingb, lendingc, lendingd]),
-            {"from": address},
-        )
+        batch = Batch([lendinga, lendingb, lendingc, lendingd])
+        txn = self.contract.lend(*batch.lend_args(), {"from": address})
+        batch.assign_lending_ids(txn)
+        self.shadow.lend(batch.items)
 
-        lendinga.lending_id = txn.events["Lent"][0]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendinga.nft,
-                              lendinga.token_id, lendinga.lending_id)
-        ] = lending_rentinga
+        self.ledger.add(
+            concat_lending_id(lendinga.nft, lendinga.token_id, lendinga.lending_id),
+            lending_rentinga,
+        )
 
-        lendingb.lending_id = txn.events["Lent"][1]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendingb.nft,
-                              lendingb.token_id, lendingb.lending_id)
-        ] = lending_rentingb
+        self.ledger.add(
+            concat_lending_id(lendingb.nft, lendingb.token_id, lendingb.lending_id),
+            lending_rentingb,
+        )
 
-        lendingc.lending_id = txn.events["Lent"][2]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendingc.nft,
-                              lendingc.token_id, lendingc.lending_id)
-        ] = lending_rentingc
+        self.ledger.add(
+            concat_lending_id(lendingc.nft, lendingc.token_id, lendingc.lending_id),
+            lending_rentingc,
+        )
 
-        lendingd.lending_id = txn.events["Lent"][3]["lendingId"]
-        self.lending_renting[
-            concat_lending_id(lendingd.nft,
-                              lendingd.token_id, lendingd.lending_id)
-        ] = lending_rentingd
+        self.ledger.add(
+            concat_lending_id(lendingd.nft, lendingd.token_id, lendingd.lending_id),
+            lending_rentingd,
+        )
 
     def rule_stop_lending_721(self):
-        first = find_first(NFTStandard.E721.value, self.lending_renting)
+        first = self.ledger.find(NFTStandard.E721.value)
         if first == "":
             return
         print(f"rule_stop_lending_721.a,{first}")
-        lending = self.lending_renting[first].lending
-        renting = self.lending_renting[first].renting
+        lending = self.ledger[first].lending
+        renting = self.ledger[first].renting
         if renting is not None:
             with brownie.reverts("ReNFT::not a zero address"):
                 self.contract.stopLending(
@@ -507,15 +519,16 @@ class StateMachine:
                 *lendings_to_stop_lending_args([lending]),
                 {"from": lending.lender_address},
             )
-            del self.lending_renting[first]
+            self.shadow.stop_lending([lending])
+            self.ledger.remove(first)
 
     def rule_stop_lending_1155(self):
-        first = find_first(NFTStandard.E1155.value, self.lending_renting)
+        first = self.ledger.find(NFTStandard.E1155.value)
         if first == "":
             return
         print(f"rule_stop_lending_1155.a,{first}")
-        lending = self.lending_renting[first].lending
-        renting = self.lending_renting[first].renting
+        lending = self.ledger[first].lending
+        renting = self.ledger[first].renting
         if renting is not None:
             with brownie.reverts("ReNFT::not a zero address"):
                 self.contract.stopLending(
@@ -527,23 +540,25 @@ class StateMachine:
                 *lendings_to_stop_lending_args([lending]),
                 {"from": lending.lender_address},
             )
-            del self.lending_renting[first]
+            self.shadow.stop_lending([lending])
+            self.ledger.remove(first)
 
     def rule_stop_lending_batch_721(self):
-        first = find_first(NFTStandard.E721.value, self.lending_renting)
+        first = self.ledger.find(NFTStandard.E721.value)
         if first == "":
             return
-        lendinga = self.lending_renting[first].lending
-        rentinga = self.lending_renting[first].renting
+        lendinga = self.ledger[first].lending
+        rentinga = self.ledger[first].renting
 
-        second = find_from_lender(
-            lendinga.lender_address, NFTStandard.E721.value, self.lending_renting, [
-                first]
+        second = self.ledger.find_from_lender(
+            lendinga.lender_address,
+            NFTStandard.E721.value,
+            exclude=[first],
         )
         if second == "":
             return
-        lendingb = self.lending_renting[second].lending
-        rentingb = self.lending_renting[second].renting
+        lendingb = self.ledger[second].lending
+        rentingb = self.ledger[second].renting
 
         print(f"rule_stop_lending_batch_721.a,{first},{second}")
 
@@ -551,31 +566,33 @@ class StateMachine:
             with brownie.reverts("ReNFT::not a zero address"):
                 self.contract.stopLending(
                     *lendings_to_stop_lending_args([lendinga, lendingb]),
-                    {"from": lending.lender_address},
+                    {"from": lendinga.lender_address},
                 )
         else:
             self.contract.stopLending(
                 *lendings_to_stop_lending_args([lendinga, lendingb]),
-                {"from": lending.lender_address},
+                {"from": lendinga.lender_address},
             )
-            del self.lending_renting[first]
-            del self.lending_renting[second]
+            self.shadow.stop_lending([lendinga, lendingb])
+            self.ledger.remove(first)
+            self.ledger.remove(second)
 
     def rule_stop_lending_batch_1155(self):
-        first = find_first(NFTStandard.E1155.value, self.lending_renting)
+        first = self.ledger.find(NFTStandard.E1155.value)
         if first == "":
             return
-        lendinga = self.lending_renting[first].lending
-        rentinga = self.lending_renting[first].renting
+        lendinga = self.ledger[first].lending
+        rentinga = self.ledger[first].renting
 
-        second = find_from_lender(
-            lendinga.lender_address, NFTStandard.E1155.value, self.lending_renting, [
-                first]
+        second = self.ledger.find_from_lender(
+            lendinga.lender_address,
+            NFTStandard.E1155.value,
+            exclude=[first],
         )
         if second == "":
             return
-        lendingb = self.lending_renting[second].lending
-        rentingb = self.lending_renting[second].renting
+        lendingb = self.ledger[second].lending
+        rentingb = self.ledger[second].renting
 
         print(f"rule_stop_lending_batch_1155.a,{first},{second}")
 
@@ -583,81 +600,84 @@ class StateMachine:
             with brownie.reverts("ReNFT::not a zero address"):
                 self.contract.stopLending(
                     *lendings_to_stop_lending_args([lendinga, lendingb]),
-                    {"from": lending.lender_address},
+                    {"from": lendinga.lender_address},
                 )
         else:
             self.contract.stopLending(
                 *lendings_to_stop_lending_args([lendinga, lendingb]),
-                {"from": lending.lender_address},
+                {"from": lendinga.lender_address},
             )
-            del self.lending_renting[first]
-            del self.lending_renting[second]
+            self.shadow.stop_lending([lendinga, lendingb])
+            self.ledger.remove(first)
+            self.ledger.remove(second)
 
     def rule_stop_lending_batch_721_1155(self):
-        first = find_first(NFTStandard.E1155.value, self.lending_renting)
+        first = self.ledger.find(NFTStandard.E1155.value)
         if first == "":
             return
-        lendinga = self.lending_renting[first].lending
-        rentinga = self.lending_renting[first].renting
+        lendinga = self.ledger[first].lending
+        rentinga = self.ledger[first].renting
 
-        second = find_from_lender(
-            lendinga.lender_address, NFTStandard.E1155.value, self.lending_renting, [
-                first]
+        second = self.ledger.find_from_lender(
+            lendinga.lender_address,
+            NFTStandard.E1155.value,
+            exclude=[first],
         )
         if second == "":
             return
-        lendingb = self.lending_renting[second].lending
-        rentingb = self.lending_renting[second].renting
+        lendingb = self.ledger[second].lending
+        rentingb = self.ledger[second].renting
 
-        third = find_from_lender(
-            lendinga.lender_address, NFTStandard.E721.value, self.lending_renting, [
-                first, second]
+        third = self.ledger.find_from_lender(
+            lendinga.lender_address,
+            NFTStandard.E721.value,
+            exclude=[first, second],
         )
         if third == "":
             return
-        lendingc = self.lending_renting[third].lending
-        rentingc = self.lending_renting[third].renting
+        lendingc = self.ledger[third].lending
+        rentingc = self.ledger[third].renting
 
-        fourth = find_from_lender(
-            lendinga.lender_address, NFTStandard.E721.value, self.lending_renting, [
-                first, second, third]
+        fourth = self.ledger.find_from_lender(
+            lendinga.lender_address,
+            NFTStandard.E721.value,
+            exclude=[first, second, third],
         )
         if fourth == "":
             return
-        lendingd = self.lending_renting[fourth].lending
-        rentingd = self.lending_renting[fourth].renting
+        lendingd = self.ledger[fourth].lending
+        rentingd = self.ledger[fourth].renting
 
         print(f"rule_stop_lending_batch_721_1155.a,{first},{second},{third},{fourth}")
 
         if rentinga is not None or rentingb is not None or rentingc is not None or rentingd is not None:
             with brownie.reverts("ReNFT::not a zero address"):
                 self.contract.stopLending(
-                    *lendings_to_stop_lending_args([lendinga, lendingb]),
-                    {"from": lending.lender_address},
+                    *lendings_to_stop_lending_args(
+                        [lendinga, lendingb, lendingc, lendingd]
+                    ),
+                    {"from": lendinga.lender_address},
                 )
         else:
             self.contract.stopLending(
-                *lendings_to_stop_lending_args([lendinga, lendingb]),
-                {"from": lending.lender_address},
+                *lendings_to_stop_lending_args(
+                    [lendinga, lendingb, lendingc, lendingd]
+                ),
+                {"from": lendinga.lender_address},
             )
-            del self.lending_renting[first]
-            del self.lending_renting[second]
-            del self.lending_renting[third]
-            del self.lending_renting[fourth]
+            self.shadow.stop_lending([lendinga, lendingb, lendingc, lendingd])
+            self.ledger.remove(first)
+            self.ledger.remove(second)
+            self.ledger.remove(third)
+            self.ledger.remove(fourth)
 
     def rule_rent_721(self, address):
-        first = find_first(
-            NFTStandard.E721.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-        )
+        first = self.ledger.find_rentable(NFTStandard.E721.value, renter=address)
         if first == "":
             return
         print(f"rule_rent_721.a,{first}")
-        lending = self.lending_renting[first].lending
-        mint_and_approve(
-            self.payment_tokens[lending.payment_token], address, self.contract.address
-        )
+        lending = self.ledger[first].lending
+        self.prepare.payment(address, [lending])
         renting = Renting(
             renter_address=address,
             rent_duration=1,
@@ -668,32 +688,20 @@ class StateMachine:
             token_id=lending.token_id,
             lending_id=lending.lending_id,
         )
-        if self.lending_renting[first].renting is not None:
-            with brownie.reverts("ReNFT::not a zero address"):
-                txn = self.contract.rent(
-                    *rentings_to_rent_args([renting]),
-                    {"from": address},
-                )
-        else:
-            txn = self.contract.rent(
-                *rentings_to_rent_args([renting]),
-                {"from": address},
-            )
-            self.lending_renting[first].renting = renting
+        txn = self.contract.rent(
+            *rentings_to_rent_args([renting]),
+            {"from": address},
+        )
+        self.shadow.rent([renting], txn.timestamp)
+        self.ledger.rent(first, renting)
 
     def rule_rent_1155(self, address):
-        first = find_first(
-            NFTStandard.E1155.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-        )
+        first = self.ledger.find_rentable(NFTStandard.E1155.value, renter=address)
         if first == "":
             return
         print(f"rule_rent_1155.a,{first}")
-        lending = self.lending_renting[first].lending
-        mint_and_approve(
-            self.payment_tokens[lending.payment_token], address, self.contract.address
-        )
+        lending = self.ledger[first].lending
+        self.prepare.payment(address, [lending])
         renting = Renting(
             renter_address=address,
             rent_duration=1,
@@ -704,48 +712,30 @@ class StateMachine:
             token_id=lending.token_id,
             lending_id=lending.lending_id,
         )
-        if self.lending_renting[first].renting is not None:
-            with brownie.reverts("ReNFT::not a zero address"):
-                txn = self.contract.rent(
-                    *rentings_to_rent_args([renting]),
-                    {"from": address},
-                )
-        else:
-            txn = self.contract.rent(
-                *rentings_to_rent_args([renting]),
-                {"from": address},
-            )
-            self.lending_renting[first].renting = renting
+        txn = self.contract.rent(
+            *rentings_to_rent_args([renting]),
+            {"from": address},
+        )
+        self.shadow.rent([renting], txn.timestamp)
+        self.ledger.rent(first, renting)
 
     def rule_rent_batch_721(self, address):
-        first = find_first(
-            NFTStandard.E721.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-        )
+        first = self.ledger.find_rentable(NFTStandard.E721.value, renter=address)
         if first == "":
             return
 
-        lendinga = self.lending_renting[first].lending
+        lendinga = self.ledger[first].lending
 
-        second = find_first(
-            NFTStandard.E721.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-            id_blacklist=[lendinga.lending_id]
+        second = self.ledger.find_rentable(
+            NFTStandard.E721.value, renter=address, exclude=[first]
         )
         if second == "":
             return
 
-        lendingb = self.lending_renting[second].lending
+        lendingb = self.ledger[second].lending
 
         print(f"rule_rent_batch_721.a,{first},{second}")
-        mint_and_approve(
-            self.payment_tokens[lendinga.payment_token], address, self.contract.address
-        )
-        mint_and_approve(
-            self.payment_tokens[lendingb.payment_token], address, self.contract.address
-        )
+        self.prepare.payment(address, [lendinga, lendingb])
         rentinga = Renting(
             renter_address=address,
             rent_duration=1,
@@ -767,50 +757,32 @@ class StateMachine:
             lending_id=lendingb.lending_id,
         )
 
-        if self.lending_renting[first].renting is not None or self.lending_renting[second].renting is not None:
-            with brownie.reverts("ReNFT::not a zero address"):
-                txn = self.contract.rent(
-                    *rentings_to_rent_args([rentinga, rentingb]),
-                    {"from": address},
-                )
-        else:
-            txn = self.contract.rent(
-                *rentings_to_rent_args([rentinga, rentingb]),
-                {"from": address},
-            )
+        txn = self.contract.rent(
+            *rentings_to_rent_args([rentinga, rentingb]),
+            {"from": address},
+        )
 
-            self.lending_renting[first].renting = rentinga
-            self.lending_renting[second].renting = rentingb
+        self.shadow.rent([rentinga, rentingb], txn.timestamp)
+        self.ledger.rent(first, rentinga)
+        self.ledger.rent(second, rentingb)
 
     def rule_rent_batch_1155(self, address):
-        first = find_first(
-            NFTStandard.E1155.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-        )
+        first = self.ledger.find_rentable(NFTStandard.E1155.value, renter=address)
         if first == "":
             return
 
-        lendinga = self.lending_renting[first].lending
+        lendinga = self.ledger[first].lending
 
-        second = find_first(
-            NFTStandard.E1155.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-            id_blacklist=[lendinga.lending_id]
+        second = self.ledger.find_rentable(
+            NFTStandard.E1155.value, renter=address, exclude=[first]
         )
         if second == "":
             return
 
-        lendingb = self.lending_renting[second].lending
+        lendingb = self.ledger[second].lending
 
         print(f"rule_rent_batch_1155.a,{first},{second}")
-        mint_and_approve(
-            self.payment_tokens[lendinga.payment_token], address, self.contract.address
-        )
-        mint_and_approve(
-            self.payment_tokens[lendingb.payment_token], address, self.contract.address
-        )
+        self.prepare.payment(address, [lendinga, lendingb])
         rentinga = Renting(
             renter_address=address,
             rent_duration=1,
@@ -832,79 +804,48 @@ class StateMachine:
             lending_id=lendingb.lending_id
         )
 
-        if self.lending_renting[first].renting is not None or self.lending_renting[second].renting is not None:
-            with brownie.reverts("ReNFT::not a zero address"):
-                txn = self.contract.rent(
-                    *rentings_to_rent_args([rentinga, rentingb]),
-                    {"from": address},
-                )
-        else:
-            txn = self.contract.rent(
-                *rentings_to_rent_args([rentinga, rentingb]),
-                {"from": address},
-            )
+        txn = self.contract.rent(
+            *rentings_to_rent_args([rentinga, rentingb]),
+            {"from": address},
+        )
 
-            self.lending_renting[first].renting = rentinga
-            self.lending_renting[second].renting = rentingb
+        self.shadow.rent([rentinga, rentingb], txn.timestamp)
+        self.ledger.rent(first, rentinga)
+        self.ledger.rent(second, rentingb)
 
     def rule_rent_batch_721_1155(self, address):
-        first = find_first(
-            NFTStandard.E1155.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-        )
+        first = self.ledger.find_rentable(NFTStandard.E1155.value, renter=address)
         if first == "":
             return
 
-        lendinga = self.lending_renting[first].lending
+        lendinga = self.ledger[first].lending
 
-        second = find_first(
-            NFTStandard.E1155.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-            id_blacklist=[lendinga.lending_id]
+        second = self.ledger.find_rentable(
+            NFTStandard.E1155.value, renter=address, exclude=[first]
         )
         if second == "":
             return
 
-        lendingb = self.lending_renting[second].lending
+        lendingb = self.ledger[second].lending
 
-        third = find_first(
-            NFTStandard.E721.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-            id_blacklist=[lendinga.lending_id, lendingb.lending_id]
+        third = self.ledger.find_rentable(
+            NFTStandard.E721.value, renter=address, exclude=[first, second]
         )
         if third == "":
             return
 
-        lendingc = self.lending_renting[third].lending
+        lendingc = self.ledger[third].lending
 
-        fourth = find_first(
-            NFTStandard.E721.value,
-            self.lending_renting,
-            lender_blacklist=[address],
-            id_blacklist=[lendinga.lending_id,
-                          lendingb.lending_id, lendingc.lending_id]
+        fourth = self.ledger.find_rentable(
+            NFTStandard.E721.value, renter=address, exclude=[first, second, third]
         )
         if fourth == "":
             return
 
-        lendingd = self.lending_renting[fourth].lending
+        lendingd = self.ledger[fourth].lending
 
         print(f"rule_rent_batch_721_1155.a,{first},{second},{third},{fourth}")
-        mint_and_approve(
-            self.payment_tokens[lendinga.payment_token], address, self.contract.address
-        )
-        mint_and_approve(
-            self.payment_tokens[lendingb.payment_token], address, self.contract.address
-        )
-        mint_and_approve(
-            self.payment_tokens[lendingc.payment_token], address, self.contract.address
-        )
-        mint_and_approve(
-            self.payment_tokens[lendingd.payment_token], address, self.contract.address
-        )
+        self.prepare.payment(address, [lendinga, lendingb, lendingc, lendingd])
 
         rentinga = Renting(
             renter_address=address,
@@ -947,40 +888,30 @@ class StateMachine:
             lending_id=lendingd.lending_id
         )
 
-        if self.lending_renting[first].renting is not None or self.lending_renting[second].renting is not None or self.lending_renting[third].renting is not None or self.lending_renting[fourth].renting is not None:
-            with brownie.reverts("ReNFT::not a zero address"):
-                txn = self.contract.rent(
-                    *rentings_to_rent_args([rentinga, rentingb, rentingc, rentingd]),
-                    {"from": address},
-                )
-        else:
-            txn = self.contract.rent(
-                *rentings_to_rent_args([rentinga, rentingb, rentingc, rentingd]),
-                {"from": address},
-            )
+        txn = self.contract.rent(
+            *rentings_to_rent_args([rentinga, rentingb, rentingc, rentingd]),
+            {"from": address},
+        )
 
-            self.lending_renting[first].renting = rentinga
-            self.lending_renting[second].renting = rentingb
-            self.lending_renting[third].renting = rentingc
-            self.lending_renting[fourth].renting = rentingd
+        self.shadow.rent([rentinga, rentingb, rentingc, rentingd], txn.timestamp)
+        self.ledger.rent(first, rentinga)
+        self.ledger.rent(second, rentingb)
+        self.ledger.rent(third, rentingc)
+        self.ledger.rent(fourth, rentingd)
 
 
-def test_stateful(ReNFT, accounts, state_machine, nfts, resolver, payment_tokens):
-    beneficiary = accounts.from_mnemonic(
-        "test test test test test test test test test test test junk", count=1
-    )
-    resolver.setPaymentToken(
-        PaymentToken.WETH.value, payment_tokens[PaymentToken.WETH.value]
-    )
-    resolver.setPaymentToken(
-        PaymentToken.DAI.value, payment_tokens[PaymentToken.DAI.value]
-    )
-    resolver.setPaymentToken(
-        PaymentToken.USDC.value, payment_tokens[PaymentToken.USDC.value]
-    )
-    resolver.setPaymentToken(
-        PaymentToken.TUSD.value, payment_tokens[PaymentToken.TUSD.value]
-    )
+def test_stateful(
+    accounts,
+    state_machine,
+    nfts,
+    renft,
+    payment_tokens,
+    beneficiary,
+    differential,
+    profiler,
+    recorder,
+):
+    machine = StateMachine if profiler is None else profiler.instrument(StateMachine)
     state_machine(
-        StateMachine, accounts, ReNFT, resolver, beneficiary, payment_tokens
+        machine, accounts, renft, payment_tokens, beneficiary, differential, recorder, profiler
     )
@@ -0,0 +1,91 @@
+from renft import aiotx
+from renft.aiotx import AsyncSender
+from renft.profiler import Profiler
+
+A, B = "0x" + "aa" * 20, "0x" + "bb" * 20
+
+
+class Node:
+    """eth_* answers for AsyncSender, in place of aiohttp.ClientSession"""
+
+    def __init__(self):
+        self.methods = []
+        self.sent = []
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def post(self, endpoint, json):
+        self.methods.append(json["method"])
+        params = json["params"]
+        if json["method"] == "eth_getTransactionCount":
+            result = "0x3"
+        elif json["method"] == "eth_estimateGas":
+            result = "0x5208"
+        elif json["method"] == "eth_sendTransaction":
+            self.sent.append(params[0])
+            result = "0x%064x" % len(self.sent)
+        else:
+            result = {"transactionHash": params[0], "status": "0x1", "gasUsed": "0x5208"}
+        return Response({"jsonrpc": "2.0", "id": json["id"], "result": result})
+
+
+class Response:
+    def __init__(self, body):
+        self.body = body
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    async def json(self):
+        return self.body
+
+
+def test_runs_are_spans_with_their_requests_and_gas(monkeypatch):
+    node = Node()
+    monkeypatch.setattr(aiotx.aiohttp, "ClientSession", node)
+    profiler = Profiler()
+    sender = AsyncSender("http://node", profiler=profiler)
+
+    with profiler.span("rule_rent", "rule"):
+        receipts = sender.run(
+            [
+                {"from": A, "to": B, "data": "0x01"},
+                {"from": A, "to": B, "data": "0x02", "gas": 50000},
+            ]
+        )
+
+    assert [tx["nonce"] for tx in node.sent] == ["0x3", "0x4"]
+    assert [tx["gas"] for tx in node.sent] == ["0x5208", "0xc350"]
+    assert len(receipts) == 2
+
+    (rule,) = profiler.root.children
+    (span,) = rule.children
+    assert (span.name, span.kind, span.gas) == ("AsyncSender.run", "aiotx", 2 * 0x5208)
+    assert dict(span.rpc) == {
+        "eth_getTransactionCount": 1,
+        "eth_estimateGas": 1,
+        "eth_sendTransaction": 2,
+        "eth_getTransactionReceipt": 2,
+    }
+    assert not rule.rpc
+    assert profiler.summary()["AsyncSender.run"]["rpc"] == len(node.methods)
+    assert set(span.rpc_time) == set(span.rpc)
+
+
+def test_without_a_profiler_nothing_is_recorded(monkeypatch):
+    monkeypatch.setattr(aiotx.aiohttp, "ClientSession", Node())
+    (receipt,) = AsyncSender("http://node").run([{"from": A, "to": B, "gas": 21000}])
+    assert receipt["status"] == "0x1"
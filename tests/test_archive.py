@@ -0,0 +1,74 @@
+import numpy as np
+
+from renft.indexer import Archive, Event, nft_report, rentals
+
+NFT = "0x00000000000000000000000000000000000000bB"
+LENDER = "0x00000000000000000000000000000000000000aA"
+RENTER = "0x00000000000000000000000000000000000000cC"
+DAY = 86400
+DAI = 2
+
+
+def event(name, block, **args):
+    return Event(name, args, block, b"", 0, b"")
+
+
+def lent(block, lending_id, token_id):
+    return event(
+        "Lent",
+        block,
+        nftAddress=NFT,
+        tokenId=token_id,
+        lentAmount=1,
+        lendingId=lending_id,
+        lenderAddress=LENDER,
+        maxRentDuration=5,
+        dailyRentPrice=bytes.fromhex("00010000"),  # 1 DAI
+        nftPrice=bytes.fromhex("000a0000"),  # 10 DAI
+        isERC721=True,
+        paymentToken=DAI,
+    )
+
+
+def rented(block, lending_id, at, days):
+    return event(
+        "Rented", block, lendingId=lending_id, renterAddress=RENTER, rentDuration=days, rentedAt=at
+    )
+
+
+def test_archive_report(tmp_path):
+    archive = Archive(tmp_path)
+    archive.append([lent(1, 1, 7), lent(1, 2, 2 ** 255)], {1: 0}, to_block=1)
+    archive.append(
+        [
+            rented(2, 1, DAY, 2),
+            event("Returned", 3, lendingId=1, returnedAt=DAY + DAY // 2),
+            rented(4, 1, 2 * DAY, 1),
+            rented(4, 2, 2 * DAY, 1),
+            event("CollateralClaimed", 5, lendingId=2, claimedAt=4 * DAY),
+        ],
+        {2: DAY, 3: DAY + DAY // 2, 4: 2 * DAY, 5: 4 * DAY},
+        to_block=5,
+    )
+
+    # reopening reads the same rows back, memory-mapped
+    archive = Archive(tmp_path)
+    assert (archive.to_block, len(archive)) == (5, 7)
+    assert isinstance(archive.column("Rented", "rentedAt"), np.memmap)
+
+    r = rentals(archive)
+    assert list(r["lending_id"]) == [1, 1, 2]
+    assert list(r["outcome"]) == [1, 0, 2]
+
+    report = nft_report(archive, now=10 * DAY, rent_fee=500)
+    assert report["token_id"] == [7, 2 ** 255]
+    assert list(report["rentals"]) == [2, 1]
+    # half a day of a 1 DAI daily price, 5% of it to the beneficiary
+    assert report["rent"][0] == 10 ** 18 // 2
+    assert report["fees"][0] == 10 ** 18 // 40
+    assert report["lender_income"][0] == report["rent"][0] - report["fees"][0]
+    # the second rental of lending 1 is still open: a whole day of its one
+    assert list(report["rented_seconds"]) == [DAY // 2 + DAY, DAY]
+    assert list(report["listed_seconds"]) == [10 * DAY, 4 * DAY]
+    assert report["collateral_claimed"][1] == 10 * 10 ** 18
+    assert report["rent"][1] == 10 ** 18
@@ -0,0 +1,51 @@
+from renft.batch import Batch, count_transfers
+from renft.lending import NFTStandard, Lending
+
+
+def lending(nft, nft_standard, token_id):
+    return Lending(
+        lender_address="0x0",
+        nft_standard=nft_standard.value,
+        lent_amount=1,
+        max_rent_duration=1,
+        daily_rent_price=1,
+        nft_price=3,
+        payment_token=2,
+        nft=nft,
+        token_id=token_id,
+        lending_id=0,
+    )
+
+
+class Txn:
+    def __init__(self, lending_ids):
+        self.events = {"Lent": [{"lendingId": i} for i in lending_ids]}
+
+
+def test_batch_groups_interleaved_1155s():
+    lendings = [
+        lending("0xB", NFTStandard.E1155, 1),
+        lending("0xA", NFTStandard.E1155, 1),
+        lending("0xb", NFTStandard.E1155, 2),
+        lending("0xC", NFTStandard.E721, 7),
+        lending("0xA", NFTStandard.E1155, 2),
+    ]
+    assert count_transfers(lendings) == 5
+
+    batch = Batch(lendings)
+    assert batch.transfers == 3
+    assert [(l.nft, l.token_id) for l in batch.items] == [
+        ("0xA", 1), ("0xA", 2), ("0xB", 1), ("0xb", 2), ("0xC", 7)
+    ]
+    assert batch.lend_args()[2] == [1, 2, 1, 2, 7]
+
+
+def test_batch_maps_lent_ids_back_to_caller_order():
+    lendings = [
+        lending("0xB", NFTStandard.E1155, 1),
+        lending("0xA", NFTStandard.E721, 1),
+        lending("0xB", NFTStandard.E1155, 2),
+    ]
+    batch = Batch(lendings)
+    assert batch.assign_lending_ids(Txn([10, 11, 12])) == [11, 10, 12]
+    assert [l.lending_id for l in lendings] == [11, 10, 12]
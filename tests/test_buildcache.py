@@ -0,0 +1,27 @@
+import shutil
+
+from renft import buildcache
+
+
+def test_artifacts_are_restored_for_the_same_sources(tmp_path):
+    project, cache = tmp_path / "project", tmp_path / "cache"
+    (project / "contracts").mkdir(parents=True)
+    (project / "interfaces").mkdir()
+    (project / "contracts" / "A.sol").write_text("contract A {}")
+    (project / "brownie-config.yaml").write_text("compiler: {}")
+    assert not buildcache.store(project, cache)
+
+    (project / "build" / "contracts").mkdir(parents=True)
+    (project / "build" / "contracts" / "A.json").write_text('{"sha1": "a"}')
+    assert buildcache.store(project, cache)
+    assert not buildcache.store(project, cache)
+
+    # a fresh checkout of the same sources
+    shutil.rmtree(project / "build")
+    assert buildcache.restore(project, cache)
+    assert (project / "build" / "contracts" / "A.json").read_text() == '{"sha1": "a"}'
+    assert not buildcache.restore(project, cache)
+
+    # changed sources have nothing cached yet
+    (project / "contracts" / "A.sol").write_text("contract A { uint x; }")
+    assert not buildcache.restore(project, cache)
@@ -0,0 +1,15 @@
+from renft.gas import fees_from_history
+
+
+def test_fees_ignore_empty_blocks():
+    fees = fees_from_history(
+        base_fees=[100, 110, 120, 130],
+        rewards=[[5], [0], [9]],
+        gas_used_ratios=[0.5, 0.0, 0.9],
+    )
+    assert fees == {"priority_fee": 7, "max_fee": 2 * 130 + 7}
+
+
+def test_fees_respect_min_priority_fee():
+    fees = fees_from_history([10, 10], [[0]], [0.0], min_priority_fee=30)
+    assert fees == {"priority_fee": 30, "max_fee": 50}
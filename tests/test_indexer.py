@@ -0,0 +1,149 @@
+import pytest
+from eth_utils import to_checksum_address
+
+from renft.indexer import Indexer, ReorgTooDeep, Store
+from renft.indexer.events import Event
+
+NFT = to_checksum_address("0x00000000000000000000000000000000000000bb")
+LENDER = to_checksum_address("0x00000000000000000000000000000000000000cc")
+RENTER = to_checksum_address("0x00000000000000000000000000000000000000dd")
+
+
+def block_hash(number, fork=0):
+    return bytes([fork]) + number.to_bytes(31, "big")
+
+
+def event(name, block_number, log_index=0, **args):
+    return Event(
+        name=name,
+        args=args,
+        block_number=block_number,
+        block_hash=block_hash(block_number),
+        log_index=log_index,
+        transaction_hash=bytes(32),
+    )
+
+
+def lent(block_number, lending_id, log_index=0):
+    return event(
+        "Lent",
+        block_number,
+        log_index,
+        nftAddress=NFT,
+        tokenId=100 + lending_id,
+        lentAmount=1,
+        lendingId=lending_id,
+        lenderAddress=LENDER,
+        maxRentDuration=5,
+        dailyRentPrice=bytes.fromhex("00010000"),
+        nftPrice=bytes.fromhex("00050000"),
+        isERC721=True,
+        paymentToken=2,
+    )
+
+
+def rented(block_number, lending_id, rent_duration=2):
+    return event(
+        "Rented",
+        block_number,
+        lendingId=lending_id,
+        renterAddress=RENTER,
+        rentDuration=rent_duration,
+        rentedAt=1000 * block_number,
+    )
+
+
+# block -> events: three lendings, rented, returned, rented again, stopped
+HISTORY = {
+    1: [lent(1, 1), lent(1, 2, 1), lent(1, 3, 2)],
+    2: [rented(2, 1), rented(2, 2)],
+    3: [event("Returned", 3, lendingId=1, returnedAt=3000)],
+    4: [rented(4, 1, 4), event("LendingStopped", 4, 1, lendingId=3, stoppedAt=4000)],
+    5: [event("CollateralClaimed", 5, lendingId=2, claimedAt=5000)],
+}
+
+
+def store_at(block_number):
+    store = Store()
+    with store:
+        for number in range(1, block_number + 1):
+            for e in HISTORY[number]:
+                store.apply(e)
+                store.record_block(number, e.block_hash)
+            store.set_checkpoint(number, block_hash(number))
+    return store
+
+
+def snapshot(store):
+    return sorted(
+        (row["lending_id"], row["renter_address"], row["rent_duration"], row["rented_at"])
+        for row in store.rows()
+    )
+
+
+@pytest.mark.parametrize("block_number", [1, 2, 3, 4])
+def test_rollback_restores_the_rows_of_a_block(block_number):
+    store = store_at(5)
+    with store:
+        store.rollback(block_number)
+
+    expected = store_at(block_number)
+    assert snapshot(store) == snapshot(expected)
+    assert [store.get(row["key"]) for row in expected.rows()] == list(expected.rows())
+    assert store.checkpoint == block_number
+    assert [number for number, _ in store.recorded_blocks()] == list(range(block_number, 0, -1))
+
+
+def test_rollback_to_the_middle_then_replay():
+    store = store_at(5)
+    with store:
+        store.rollback(3)
+    assert snapshot(store) == [
+        (1, None, None, None),
+        (2, RENTER, 2, 2000),
+        (3, None, None, None),
+    ]
+    # the journal of blocks 4 and 5 is gone, the rest still rolls back
+    with store:
+        for number in (4, 5):
+            for e in HISTORY[number]:
+                store.apply(e)
+        store.rollback(1)
+    assert snapshot(store) == snapshot(store_at(1))
+
+
+class Chain:
+    """the parts of web3 the indexer uses, over HISTORY with forks from a block on"""
+
+    def __init__(self, head, fork_from=None):
+        self.block_number = head
+        self.fork_from = fork_from
+
+    @property
+    def eth(self):
+        return self
+
+    def get_block(self, number):
+        fork = 1 if self.fork_from is not None and number >= self.fork_from else 0
+        return {"hash": block_hash(number, fork)}
+
+    def get_logs(self, params):
+        return []
+
+
+def test_handle_reorg_rolls_back_to_the_newest_canonical_block():
+    store = store_at(5)
+    Indexer(Chain(head=5), NFT, store).handle_reorg()
+    assert store.checkpoint == 5
+
+    Indexer(Chain(head=5, fork_from=4), NFT, store).handle_reorg()
+    assert store.checkpoint == 3
+    assert snapshot(store) == snapshot(store_at(3))
+
+
+def test_handle_reorg_below_the_recorded_blocks_raises():
+    store = store_at(5)
+    with store:
+        store.prune(3)
+    with pytest.raises(ReorgTooDeep):
+        Indexer(Chain(head=5, fork_from=2), NFT, store).handle_reorg()
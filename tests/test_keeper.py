@@ -0,0 +1,138 @@
+from eth_utils import to_checksum_address
+
+from renft.indexer import Indexer, Store
+from renft.indexer.events import Event
+from renft.keeper import SECONDS_IN_DAY, ExpiryQueue, Rental
+
+NFT = to_checksum_address("0x00000000000000000000000000000000000000bb")
+ADDRESS = to_checksum_address("0x00000000000000000000000000000000000000cc")
+
+
+def rental(lending_id, expires_at):
+    return Rental(expires_at=expires_at, lending_id=lending_id, nft=NFT, token_id=1, nft_standard=0)
+
+
+def test_expired_rentals_pop_in_expiry_order_in_batches():
+    queue = ExpiryQueue()
+    for lending_id, expires_at in [(1, 50), (2, 10), (3, 30), (4, 40), (5, 20)]:
+        queue.push(rental(lending_id, expires_at))
+
+    assert queue.next_expiry() == 10
+    assert [r.lending_id for r in queue.pop_expired(now=35, limit=2)] == [2, 5]
+    # expiring exactly now is not claimable yet
+    assert [r.lending_id for r in queue.pop_expired(now=40)] == [3]
+    assert len(queue) == 2 and queue.next_expiry() == 40
+
+
+def test_discarded_and_replaced_rentals_are_dropped_lazily():
+    queue = ExpiryQueue()
+    for lending_id in range(1, 6):
+        queue.push(rental(lending_id, 10 * lending_id))
+    queue.discard(1)
+    queue.discard(3)
+    queue.discard(99)
+    # rented again after a return: only the newer entry counts
+    queue.push(rental(2, 100))
+
+    assert len(queue) == 3 and len(queue.heap) == 6
+    assert queue.next_expiry() == 40
+    assert [(r.lending_id, r.expires_at) for r in queue.pop_expired(now=1000)] == [
+        (4, 40),
+        (5, 50),
+        (2, 100),
+    ]
+    assert not queue.heap and queue.next_expiry() is None
+
+
+def test_heap_is_rebuilt_once_stale_entries_outnumber_live_ones():
+    queue = ExpiryQueue()
+    for lending_id in range(200):
+        queue.push(rental(lending_id, lending_id))
+    for lending_id in range(200 - 1, 60, -1):
+        queue.discard(lending_id)
+    # 61 live; the heap was rebuilt when it passed 2 * live + 64 entries
+    assert len(queue) == 61
+    assert len(queue.heap) <= 2 * len(queue) + 64 + 1
+    assert [r.lending_id for r in queue.pop_expired(now=10 ** 6)] == list(range(61))
+
+
+def event(name, block_number, **args):
+    return Event(
+        name=name,
+        args=args,
+        block_number=block_number,
+        block_hash=block_number.to_bytes(32, "big"),
+        log_index=0,
+        transaction_hash=bytes(32),
+    )
+
+
+def lent(block_number, lending_id):
+    return event(
+        "Lent",
+        block_number,
+        nftAddress=NFT,
+        tokenId=lending_id,
+        lentAmount=1,
+        lendingId=lending_id,
+        lenderAddress=ADDRESS,
+        maxRentDuration=5,
+        dailyRentPrice=bytes.fromhex("00010000"),
+        nftPrice=bytes.fromhex("00050000"),
+        isERC721=True,
+        paymentToken=2,
+    )
+
+
+def rented(block_number, lending_id, rented_at):
+    return event(
+        "Rented",
+        block_number,
+        lendingId=lending_id,
+        renterAddress=ADDRESS,
+        rentDuration=1,
+        rentedAt=rented_at,
+    )
+
+
+class Chain:
+    def __init__(self, fork_from):
+        self.block_number = 3
+        self.fork_from = fork_from
+
+    @property
+    def eth(self):
+        return self
+
+    def get_block(self, number):
+        fork = b"\x01" if number >= self.fork_from else b"\x00"
+        return {"hash": fork + number.to_bytes(31, "big")}
+
+
+def test_reorg_listener_reloads_the_queue_from_the_rolled_back_store():
+    store = Store()
+    history = [
+        (1, [lent(1, 1), lent(1, 2), lent(1, 3), rented(1, 1, 100)]),
+        (2, [rented(2, 2, 200)]),
+        (3, [rented(3, 3, 300), event("Returned", 3, lendingId=1, returnedAt=300)]),
+    ]
+    queue = ExpiryQueue()
+    with store:
+        for number, events in history:
+            for e in events:
+                store.apply(e)
+                if e.name == "Rented":
+                    queue.push(Rental.from_row(store.get_by_lending_id(e.args["lendingId"])))
+                elif e.name == "Returned":
+                    queue.discard(e.args["lendingId"])
+            store.record_block(number, b"\x00" + number.to_bytes(31, "big"))
+    assert sorted(queue.live) == [2, 3]
+
+    # blocks 2 and 3 are replaced: rental 2 and 3 never happened, 1 was not returned
+    reload = [lambda _, rolled_back: queue.reload(rolled_back)]
+    Indexer(Chain(fork_from=2), NFT, store, reorg_listeners=reload).handle_reorg()
+    assert sorted(queue.live) == [1]
+    assert queue.next_expiry() == 100 + SECONDS_IN_DAY
+    # a Rented event mined again in the new block 2 is queued by the event listener
+    queue.push(rental(2, 250 + SECONDS_IN_DAY))
+    assert [r.lending_id for r in queue.pop_expired(now=10 ** 6)] == [1, 2]
@@ -0,0 +1,33 @@
+from renft.lending import unpack_lending, unpack_renting
+
+LENDER = "0x00000000000000000000000000000000000000aA"
+RENTER = "0x00000000000000000000000000000000000000bB"
+
+
+def test_unpack_lending_renting_slots():
+    # Lending: E1155, lender, 7 days, 0x00010002 daily, 0x00030000 price, 5 lent, DAI
+    lending_word = (
+        1
+        | int(LENDER, 16) << 8
+        | 7 << 168
+        | 0x00010002 << 176
+        | 0x00030000 << 208
+        | 5 << 240
+        | 2 << 248
+    )
+    lending = unpack_lending(lending_word, "0xnft", 9, 42)
+    assert (lending.nft_standard, lending.lender_address.lower()) == (1, LENDER.lower())
+    assert lending.max_rent_duration == 7
+    assert lending.daily_rent_price == bytes.fromhex("00010002")
+    assert lending.nft_price == bytes.fromhex("00030000")
+    assert (lending.lent_amount, lending.payment_token) == (5, 2)
+    assert (lending.nft, lending.token_id, lending.lending_id) == ("0xnft", 9, 42)
+
+    renting = unpack_renting(int(RENTER, 16) | 3 << 160 | 1_650_000_000 << 168, lending)
+    assert renting.renter_address.lower() == RENTER.lower()
+    assert (renting.rent_duration, renting.rented_at) == (3, 1_650_000_000)
+    assert renting.lending_id == 42
+
+    assert unpack_lending(0, "0xnft", 9, 42) is None
+    assert unpack_renting(0, lending) is None
+
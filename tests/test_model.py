@@ -0,0 +1,57 @@
+from renft.model import (
+    SECONDS_IN_DAY,
+    distribute_claim_payment,
+    distribute_payments,
+    rent_payment,
+    take_fee,
+)
+
+E18 = 10 ** 18
+
+
+def test_take_fee_rounds_down():
+    assert list(take_fee([9999, 10000, 3 * E18], 1000)) == [999, 1000, 3 * E18 // 10]
+
+
+def test_distribute_payments_matches_contract():
+    # 1.5 units per day, 3 days, returned after one and a half days, 5% fee
+    seconds = SECONDS_IN_DAY + SECONDS_IN_DAY // 2
+    p = distribute_payments(2, 0x00011388, 0x00020000, 3, seconds, 18, 500)
+    rent_price = E18 + 5000 * E18 // 10000
+    lender = seconds * rent_price // SECONDS_IN_DAY
+    fee = lender * 500 // 10000
+    assert not p.reverted[0]
+    assert p.beneficiary[0] == fee
+    assert p.lender[0] == lender - fee
+    assert p.renter[0] == 3 * rent_price - lender + 2 * 2 * E18
+
+
+def test_distribute_payments_flags_reverts():
+    # returned in the same second it was rented: lender payment is zero
+    p = distribute_payments([1, 1], 1, 3, 1, [0, SECONDS_IN_DAY], 6)
+    assert list(p.reverted) == [True, False]
+    assert p.lender[0] == p.renter[0] == p.beneficiary[0] == 0
+
+
+def test_claim_pays_lender_rent_and_collateral():
+    p = distribute_claim_payment([1, 3], 1, 3, 2, 6, 100)
+    rent = 2 * 100
+    fee = rent * 100 // 10000
+    assert list(p.lender) == [rent + 300 - fee, rent + 900 - fee]
+    assert list(p.renter) == [0, 0]
+
+
+def test_rent_payment():
+    amount, reverted = rent_payment([1, 1], [1, 0], 3, 1, 18)
+    assert list(amount) == [E18 // 10000 + 3 * E18 // 10000, 0]
+    assert list(reverted) == [False, True]
+
+
+def test_zero_nft_price_reverts():
+    p = distribute_payments([1, 1], 1, [0, 3], 1, SECONDS_IN_DAY, 6)
+    assert list(p.reverted) == [True, False]
+    assert p.lender[0] == p.renter[0] == p.beneficiary[0] == 0
+
+    p = distribute_claim_payment([1, 1], 1, [0, 3], 2, 6, 100)
+    assert list(p.reverted) == [True, False]
+    assert p.lender[0] == p.beneficiary[0] == 0
@@ -0,0 +1,74 @@
+import pytest
+from eth_keys import keys
+from eth_utils import to_checksum_address
+
+from renft.lending import Lending
+from renft.orders import LendOrder, OrderBook, recover_signer, rent_signed_args, sign_order
+
+LENDER_KEY = keys.PrivateKey(b"\x01" * 32)
+LENDER = LENDER_KEY.public_key.to_checksum_address()
+RENFT = to_checksum_address("0x00000000000000000000000000000000000000aa")
+NFT = to_checksum_address("0x00000000000000000000000000000000000000bb")
+
+
+def lending(token_id, nft_standard=1, lent_amount=3):
+    return Lending(
+        nft_standard=nft_standard,
+        lender_address=LENDER,
+        max_rent_duration=7,
+        daily_rent_price=bytes.fromhex("00010000"),
+        nft_price=bytes.fromhex("00050000"),
+        lent_amount=lent_amount,
+        payment_token=2,
+        nft=NFT,
+        token_id=token_id,
+        lending_id=0,
+    )
+
+
+def test_orders_are_signed_validated_and_pruned():
+    book = OrderBook(1337, RENFT)
+    signatures = book.sign([lending(1), lending(2, nft_standard=0)], LENDER_KEY, deadline=100)
+    assert len(book) == 2
+
+    (order, signature), = book.for_nft(NFT, 1)
+    assert signature == signatures[0] and order.nonce == 0
+    assert recover_signer(order, signature, book.domain) == LENDER
+    assert book.for_nft(NFT, 2)[0][0].to_lending().lent_amount == 1
+
+    # another chain or contract, a changed field or a late submission all fail
+    assert recover_signer(order, signature, OrderBook(1, RENFT).domain) != LENDER
+    tampered = LendOrder(**{**order.__dict__, "daily_rent_price": bytes.fromhex("00000001")})
+    assert book.validate(tampered, signature) == ["invalid signature"]
+    assert book.validate(order, signature, now=101) == ["expired"]
+    with pytest.raises(ValueError):
+        book.add(tampered, signature)
+
+    orders, sigs, durations = rent_signed_args(book.for_nft(NFT, 1), [2])
+    assert orders[0][0:4] == (1, NFT, 1, 3) and sigs == [signature] and durations == [2]
+
+    assert book.prune(now=50, used=lambda lender, nonce: nonce == 1) == 1
+    assert book.prune(now=101) == 1
+    assert len(book) == 0
+
+
+def test_nonces_skip_used_ones_and_those_in_the_book():
+    spent = {(LENDER, 0), (LENDER, 2)}
+    book = OrderBook(1337, RENFT, used=lambda lender, nonce: (lender, nonce) in spent)
+    assert [book.next_nonce(LENDER) for _ in range(3)] == [1, 3, 4]
+    assert book.next_nonce(NFT) == 0
+
+    # an order signed by a book before a restart, loaded back in
+    restored = OrderBook(1337, RENFT)
+    order = LendOrder.from_lending(lending(1), nonce=6, deadline=100)
+    restored.add(order, sign_order(order, LENDER_KEY, restored.domain))
+    assert restored.next_nonce(LENDER) == 7
+
+
+def test_zero_prices_are_rejected():
+    book = OrderBook(1337, RENFT)
+    order = LendOrder.from_lending(lending(1), nonce=0, deadline=100)
+    order.nft_price = bytes(4)
+    assert book.validate(order, sign_order(order, LENDER_KEY, book.domain)) == [
+        "nft price is zero"
+    ]
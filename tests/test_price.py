@@ -0,0 +1,40 @@
+from renft.lending import Lending, PaymentToken
+from renft.price import SCALES, pack_price, quote, to_bytes4, unpack_price
+
+E18 = 10 ** 18
+
+
+def test_unpack_price_clamps_and_scales():
+    prices = [0x00000001, 0x00010001, 0xFFFFFFFF, 0]
+    assert list(unpack_price(prices, E18)) == [
+        E18 // 10000,
+        E18 + E18 // 10000,
+        9999 * E18 + 9999 * (E18 // 10000),
+        0,
+    ]
+    assert list(unpack_price(0x00010000, 1000)) == [0]
+
+
+def test_pack_price_round_trips_to_a_ten_thousandth():
+    usdc = SCALES[PaymentToken.USDC.value]
+    amounts = [1, E18 + 5 * 10 ** 14 + 7, 9999 * E18]
+    assert list(pack_price(amounts, E18)) == [0, 0x00010005, 9999 << 16]
+    assert list(unpack_price(pack_price(12_345_678, usdc), usdc)) == [12_345_600]
+    assert to_bytes4([0x00010005]) == [bytes.fromhex("00010005")]
+
+
+def test_quote_mixes_payment_tokens():
+    def lending(payment_token, lent_amount):
+        return Lending(0, "0x0", 7, 0x00010000, 0x00020000, lent_amount, payment_token, "0x0", 1, 1)
+
+    q = quote([lending(PaymentToken.DAI.value, 1), lending(PaymentToken.USDC.value, 3)], [2, 5])
+    assert list(q.total) == [2 * E18 + 2 * E18, 5 * 10 ** 6 + 3 * 2 * 10 ** 6]
+    assert not q.reverted.any()
+
+
+def test_every_payment_token_but_the_sentinel_has_a_scale():
+    tokens = [pt.value for pt in PaymentToken if pt != PaymentToken.SENTINEL]
+    assert sorted(SCALES) == tokens
+    rent = Lending(0, "0x0", 7, 0x00010000, 0x00020000, 1, PaymentToken.RENT.value, "0x0", 1, 1)
+    q = quote([rent], [1])
+    assert list(q.total) == [3 * E18]
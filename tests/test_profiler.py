@@ -0,0 +1,136 @@
+import pytest
+
+from renft import profiler as profiler_module
+from renft.profiler import Profiler
+
+
+class Clock:
+    """perf_counter that only moves when told to"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(profiler_module, "time", clock)
+    return clock
+
+
+def test_nested_spans_and_middleware_requests(clock):
+    profiler = Profiler()
+
+    def make_request(method, params):
+        clock.advance(0.25)
+        return {"result": params}
+
+    make_request = profiler.middleware(make_request, web3=None)
+    with profiler.span("rule_rent", "rule"):
+        clock.advance(1)
+        with profiler.span("rent", "tx") as tx:
+            make_request("eth_sendTransaction", [])
+            make_request("eth_getTransactionReceipt", [])
+            tx.gas = 70_000
+        with profiler.span("rent", "tx") as tx:
+            make_request("eth_sendTransaction", [])
+            tx.gas = 50_000
+        make_request("eth_call", [])
+
+    (rule,) = profiler.root.children
+    first, second = rule.children
+    assert (rule.wall, first.wall, second.wall) == (2.0, 0.5, 0.25)
+    assert dict(rule.rpc) == {"eth_call": 1}
+    assert dict(first.rpc) == {"eth_sendTransaction": 1, "eth_getTransactionReceipt": 1}
+    assert first.path == ["rule_rent", "rent"]
+    assert rule.self_time() == 1.0 and first.self_time() == 0.0
+
+    records = profiler.records()
+    assert [r["path"] for r in records] == [["rule_rent"]] + [["rule_rent", "rent"]] * 2
+    assert (records[0]["gas"], records[0]["rpc"], records[0]["rpc_time"]) == (120_000, 4, 1.0)
+    assert records[0]["rpc_methods"] == {
+        "eth_call": 1,
+        "eth_sendTransaction": 2,
+        "eth_getTransactionReceipt": 1,
+    }
+    summary = profiler.summary()
+    assert summary["rent"] == {"count": 2, "wall": 0.75, "gas": 120_000, "rpc": 3, "rpc_time": 0.75}
+    assert summary["rule_rent"]["count"] == 1
+
+    assert sorted(profiler.folded()) == [
+        "rule_rent 1000000",
+        "rule_rent;rent;rpc:eth_getTransactionReceipt 250000",
+        "rule_rent;rent;rpc:eth_sendTransaction 500000",
+        "rule_rent;rpc:eth_call 250000",
+    ]
+
+
+def test_requests_outside_any_span_count_against_the_root():
+    profiler = Profiler()
+    profiler.rpc("eth_chainId", 0.1)
+    assert dict(profiler.root.rpc) == {"eth_chainId": 1}
+    assert profiler.records() == []
+
+
+def test_wrap_keeps_what_the_state_machine_reads(clock):
+    profiler = Profiler()
+
+    def rule_lend(self, amount="st_amount", duration="st_duration"):
+        clock.advance(1)
+        return (amount, duration)
+
+    wrapped = profiler.wrap(rule_lend, "rule_lend", "rule")
+    assert wrapped.__name__ == "rule_lend"
+    assert wrapped.__code__.co_varnames[: wrapped.__code__.co_argcount] == (
+        "self",
+        "amount",
+        "duration",
+    )
+    assert wrapped.__defaults__ == ("st_amount", "st_duration")
+    assert wrapped(None, 1, duration=2) == (1, 2)
+    assert profiler.root.children[0].name == "rule_lend"
+    assert profiler.root.children[0].wall == 1.0
+
+
+def test_instrument_wraps_rules_invariants_and_setup(clock):
+    profiler = Profiler()
+
+    class Machine:
+        def setup(self):
+            self.calls = ["setup"]
+
+        def rule_rent(self, x="st_x"):
+            self.calls.append(x)
+
+        def invariant_balances(self):
+            self.calls.append("invariant")
+
+        def helper(self):
+            self.calls.append("helper")
+
+    machine = profiler.instrument(Machine)()
+    machine.setup()
+    machine.rule_rent(3)
+    machine.invariant_balances()
+    machine.helper()
+
+    assert machine.calls == ["setup", 3, "invariant", "helper"]
+    assert [s.name for s in profiler.root.children] == ["setup", "rule_rent", "invariant_balances"]
+    assert {s.kind for s in profiler.root.children} == {"rule"}
+    assert type(machine).rule_rent.__defaults__ == ("st_x",)
+
+
+def test_write_dumps_spans_and_stacks(clock, tmp_path):
+    profiler = Profiler()
+    with profiler.span("rule_rent", "rule"):
+        clock.advance(0.5)
+    profiler.write(tmp_path / "profile")
+
+    assert (tmp_path / "profile" / "stacks.folded").read_text() == "rule_rent 500000\n"
+    assert '"rule_rent"' in (tmp_path / "profile" / "spans.json").read_text()
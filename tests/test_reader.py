@@ -0,0 +1,97 @@
+from eth_abi import decode_abi, encode_abi
+from eth_utils import to_checksum_address
+
+from renft import reader
+from renft.reader import GET_LENDING_RENTING, LendingRentingReader
+
+RENFT = to_checksum_address("0x00000000000000000000000000000000000000aa")
+NFTS = [to_checksum_address(f"0x{n:040x}") for n in (0xB1, 0xB2)]
+LENDER = to_checksum_address("0x00000000000000000000000000000000000000cc")
+RENTER = to_checksum_address("0x00000000000000000000000000000000000000dd")
+
+
+def lending_word(nft_standard, max_rent_duration, daily_rent_price, nft_price, lent_amount):
+    # ReNFT.Lending as it sits in its slot, paid in DAI
+    return (
+        nft_standard
+        | int(LENDER, 16) << 8
+        | max_rent_duration << 168
+        | daily_rent_price << 176
+        | nft_price << 208
+        | lent_amount << 240
+        | 2 << 248
+    )
+
+
+def renting_word(rent_duration, rented_at):
+    return int(RENTER, 16) | rent_duration << 160 | rented_at << 168
+
+
+def test_keys_are_read_in_chunks_at_one_block_and_decoded(monkeypatch):
+    keys = [(NFTS[i % 2], 100 + i, i + 1) for i in range(7)]
+    # every key but the last is lent; every other one is rented
+    state = {
+        key: (
+            lending_word(i % 2, 3 + i, 0x00010000 + i, 0x00050000 + i, 1 + i),
+            renting_word(1 + i % 3, 1_600_000_000 + i) if i % 2 == 0 else 0,
+        )
+        for i, key in enumerate(keys[:-1])
+    }
+
+    calls = []
+
+    def batch_request(endpoint, requests):
+        assert endpoint == "http://node" and len(requests) == 1
+        ((method, params),) = requests
+        if method == "eth_getBlockByNumber":
+            return [{"number": "0x2a"}]
+        tx, block = params
+        assert method == "eth_call" and tx["to"] == RENFT and block == "0x2a"
+        data = bytes.fromhex(tx["data"][2:])
+        assert data[:4] == GET_LENDING_RENTING
+        nfts, token_ids, lending_ids = decode_abi(["address[]", "uint256[]", "uint256[]"], data[4:])
+        chunk = [
+            (to_checksum_address(nft), token_id, lending_id)
+            for nft, token_id, lending_id in zip(nfts, token_ids, lending_ids)
+        ]
+        calls.append(chunk)
+        words = [state.get(key, (0, 0)) for key in chunk]
+        lendings, rentings = zip(*words)
+        return ["0x" + encode_abi(["uint256[]", "uint256[]"], [lendings, rentings]).hex()]
+
+    monkeypatch.setattr(reader, "batch_request", batch_request)
+    items = LendingRentingReader("http://node", RENFT, chunk_size=3, max_workers=2).read(keys)
+
+    assert sorted(calls) == sorted([keys[0:3], keys[3:6], keys[6:7]])
+    assert len(items) == len(keys) and items[-1] is None
+    for i, (key, item) in enumerate(zip(keys, items[:-1])):
+        lending, renting = item.lending, item.renting
+        assert (lending.nft, lending.token_id, lending.lending_id) == key
+        assert lending.nft_standard == i % 2
+        assert lending.lender_address == LENDER
+        assert lending.max_rent_duration == 3 + i
+        assert lending.daily_rent_price == (0x00010000 + i).to_bytes(4, "big")
+        assert lending.nft_price == (0x00050000 + i).to_bytes(4, "big")
+        assert lending.lent_amount == 1 + i
+        assert lending.payment_token == 2
+        if i % 2:
+            assert renting is None
+        else:
+            assert renting.renter_address == RENTER
+            assert renting.rent_duration == 1 + i % 3
+            assert renting.rented_at == 1_600_000_000 + i
+            assert (renting.nft, renting.token_id, renting.lending_id) == key
+
+
+def test_explicit_block_skips_the_head_lookup(monkeypatch):
+    methods = []
+
+    def batch_request(endpoint, requests):
+        methods.extend(method for method, _ in requests)
+        assert requests[0][1][1] == "0x7"
+        return ["0x" + encode_abi(["uint256[]", "uint256[]"], [[0], [0]]).hex()]
+
+    monkeypatch.setattr(reader, "batch_request", batch_request)
+    assert LendingRentingReader("http://node", RENFT).read([(NFTS[0], 1, 1)], block=7) == [None]
+    assert methods == ["eth_call"]
+    assert LendingRentingReader("http://node", RENFT).read([]) == []
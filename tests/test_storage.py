@@ -0,0 +1,60 @@
+import random
+
+import numpy as np
+from eth_utils import keccak, to_checksum_address
+
+from renft import storage
+from renft.lending import lending_key
+from renft.storage import LENDING_RENTING_SLOT, StorageReader, lending_renting_slot
+
+RENFT = to_checksum_address("0x00000000000000000000000000000000000000aa")
+NFT = to_checksum_address("0x00000000000000000000000000000000000000bb")
+
+
+def test_slots_are_read_in_batches_and_decoded(monkeypatch):
+    rng = random.Random(0)
+    keys = [(NFT, rng.getrandbits(256), lending_id) for lending_id in range(1, 8)]
+    state = {}
+    for nft, token_id, lending_id in keys[:-1]:
+        base = int.from_bytes(
+            keccak(lending_key(nft, token_id, lending_id) + LENDING_RENTING_SLOT.to_bytes(32, "big")),
+            "big",
+        )
+        assert lending_renting_slot(nft, token_id, lending_id) == base
+        state[base] = rng.getrandbits(256) | 1
+        if lending_id % 2:
+            state[base + 1] = rng.getrandbits(200) | 1
+
+    requests = []
+
+    def batch_request(endpoint, calls):
+        requests.append(calls)
+        if calls[0][0] == "eth_getBlockByNumber":
+            return [{"number": "0x10"}]
+        assert all(params[0] == RENFT and params[2] == "0x10" for _, params in calls)
+        return [hex(state.get(int(params[1], 16), 0)) for _, params in calls]
+
+    monkeypatch.setattr(storage, "batch_request", batch_request)
+    items = StorageReader("http://node", RENFT, chunk_size=3, max_workers=2).read(keys)
+    # the head block, then 3 chunks of at most 3 keys
+    assert len(requests) == 4 and max(len(calls) for calls in requests) == 6
+
+    assert items.exists.tolist() == [True] * 6 + [False]
+    assert items.rented.tolist() == [True, False, True, False, True, False, False]
+    assert items[6] is None
+    fields = items.fields
+    for i in range(6):
+        lending, renting = items[i].lending, items[i].renting
+        assert lending.token_id == keys[i][1] and lending.lending_id == keys[i][2]
+        assert fields["nft_standard"][i] == lending.nft_standard
+        assert bytes(fields["lender_address"][i]).hex() == lending.lender_address[2:].lower()
+        assert fields["daily_rent_price"][i] == int.from_bytes(lending.daily_rent_price, "big")
+        assert fields["nft_price"][i] == int.from_bytes(lending.nft_price, "big")
+        assert fields["lent_amount"][i] == lending.lent_amount
+        assert fields["payment_token"][i] == lending.payment_token
+        assert fields["max_rent_duration"][i] == lending.max_rent_duration
+        if renting is not None:
+            assert fields["rent_duration"][i] == renting.rent_duration
+            assert fields["rented_at"][i] == renting.rented_at
+            assert bytes(fields["renter_address"][i]).hex() == renting.renter_address[2:].lower()
+    assert not np.any(fields["rented_at"][~items.rented])
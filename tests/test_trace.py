@@ -0,0 +1,43 @@
+from renft import trace
+
+A, B = "0x" + "aa" * 20, "0x" + "bb" * 20
+
+
+def test_runs_are_recorded_in_chain_order_and_round_trip(tmp_path):
+    recorder = trace.Recorder(world={"renft": B})
+    recorder.request("eth_sendTransaction", [{"from": A, "to": B, "data": "0x01"}], {"result": "0x1"})
+    # a revert starts the next example
+    recorder.request("evm_revert", ["0x1"], {"result": True})
+    recorder.request(
+        "eth_sendTransaction",
+        [{"from": A, "to": B, "data": "0x02", "nonce": "0x5", "gas": "0x5208"}],
+        {"error": {"message": "VM Exception", "data": {"0x2": {"error": "revert"}, "stack": ""}}},
+    )
+    recorder.request("evm_increaseTime", [3600], {"result": 3600})
+    # sent together, mined in the opposite order
+    recorder.sent({"from": A, "to": B, "data": "0x03"}, "0x3")
+    recorder.sent({"from": B, "to": A, "data": "0x04"}, "0x4")
+    recorder.request("evm_mine", [], {"result": "0x0"})
+
+    receipts = {
+        "0x2": {"blockNumber": "0xa", "transactionIndex": "0x0", "status": "0x0"},
+        "0x3": {"blockNumber": "0xc", "transactionIndex": "0x0", "status": "0x1"},
+        "0x4": {"blockNumber": "0xb", "transactionIndex": "0x0", "status": "0x1"},
+    }
+    steps = trace.build_steps(recorder.steps, receipts, {10: 1000, 11: 4601, 12: 4601})
+    assert steps == [
+        ["tx", {"from": A, "to": B, "data": "0x02", "gas": "0x5208"}, 0, 0],
+        ["sleep", 3600],
+        ["tx", {"from": B, "to": A, "data": "0x04"}, 3601, 1],
+        ["tx", {"from": A, "to": B, "data": "0x03"}, 3601, 1],
+        ["mine"],
+    ]
+
+    path = tmp_path / "traces" / "test_stateful-0.jsonl.gz"
+    trace.save(path, {"version": trace.VERSION, "test": "t", "world": recorder.world, "steps": steps})
+    assert trace.load(path) == {
+        "version": trace.VERSION,
+        "test": "t",
+        "world": {"renft": B},
+        "steps": steps,
+    }